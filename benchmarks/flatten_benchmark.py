@@ -0,0 +1,300 @@
+"""
+Benchmark of the CSV/XLSX result flattening.
+
+Compares ``handelsregister.flatten`` with the per-row methods the client used
+before (kept below as ``LegacyFlattener``), checks that both produce the same
+rows, and times the optional process pool.
+
+Run from the repository root:
+
+    python benchmarks/flatten_benchmark.py --rows 100000 --processes 4
+    python benchmarks/flatten_benchmark.py --rows 100000 --unique-results 20000
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from handelsregister import flatten
+from handelsregister.formats import ERROR_FIELD, FETCHED_AT_FIELD
+
+
+class LegacyFlattener:
+    """The recursive flattening of ``Handelsregister`` before the flatten module."""
+
+    def _format_flat_result(self, result: Any) -> str:
+        """Create a short string summary from an API result."""
+        if not isinstance(result, dict):
+            return ""
+
+        parts = []
+        name = result.get("name")
+        if name:
+            parts.append(name)
+
+        status = result.get("status")
+        if status:
+            parts.append(f"Status: {status}")
+
+        reg = result.get("registration", {})
+        reg_no = reg.get("register_number")
+        court = reg.get("court")
+        reg_parts = []
+        if court:
+            reg_parts.append(court)
+        if reg_no:
+            reg_parts.append(str(reg_no))
+        if reg_parts:
+            parts.append("Reg: " + " ".join(reg_parts))
+
+        addr = result.get("address", {})
+        addr_components = []
+        street = addr.get("street")
+        house_no = addr.get("house_number")
+        if street or house_no:
+            addr_components.append(" ".join(filter(None, [street, str(house_no) if house_no else None])).strip())
+        pc = addr.get("postal_code")
+        city = addr.get("city")
+        if pc or city:
+            addr_components.append(" ".join(filter(None, [str(pc) if pc else None, city])).strip())
+        country = addr.get("country") or addr.get("country_code")
+        if country:
+            addr_components.append(str(country))
+        if addr_components:
+            parts.append(", ".join(addr_components))
+
+        return " | ".join(parts)
+
+    def _flatten_account(self, account: Any, prefix: str = "") -> List[str]:
+        """Flatten a single account structure to lines."""
+        if isinstance(account, dict) and "name" in account:
+            name_dict = account.get("name", {})
+            name = name_dict.get("de") or name_dict.get("en") or name_dict.get("in_report", "")
+            value = account.get("value")
+            line = f"{prefix}{name}: {value}" if value is not None else f"{prefix}{name}"
+            lines = [line]
+            for child in account.get("children", []):
+                lines.extend(self._flatten_account(child, prefix + "> "))
+            return lines
+        elif isinstance(account, dict):
+            lines = []
+            for k, v in account.items():
+                if isinstance(v, (dict, list)):
+                    lines.extend(self._flatten_account(v, prefix + f"{k} > "))
+                else:
+                    lines.append(f"{prefix}{k}: {v}")
+            return lines
+        elif isinstance(account, list):
+            lines = []
+            for item in account:
+                lines.extend(self._flatten_account(item, prefix))
+            return lines
+        else:
+            return [f"{prefix}{account}"]
+
+    def _flatten_result(self, result: Any) -> Dict[str, Any]:
+        """Flatten a full API result into human readable strings."""
+        if not isinstance(result, dict):
+            return {}
+
+        flat: Dict[str, Any] = {}
+
+        simple_keys = ["name", "status", "legal_form", "registration_date", "purpose"]
+        for key in simple_keys:
+            if key in result:
+                flat[key] = result.get(key)
+
+        reg = result.get("registration", {})
+        if reg:
+            reg_parts = [reg.get("court"), reg.get("register_type"), reg.get("register_number")]
+            flat["registration"] = " ".join(str(p) for p in reg_parts if p)
+
+        addr = result.get("address", {})
+        if addr:
+            addr_parts = []
+            if addr.get("street") or addr.get("house_number"):
+                addr_parts.append(" ".join(filter(None, [addr.get("street"), str(addr.get("house_number"))])).strip())
+            if addr.get("postal_code") or addr.get("city"):
+                addr_parts.append(" ".join(filter(None, [str(addr.get("postal_code")), addr.get("city")])).strip())
+            if addr.get("country"):
+                addr_parts.append(addr.get("country"))
+            flat["address"] = ", ".join(addr_parts)
+
+        contact = result.get("contact_data", {})
+        if contact:
+            c_parts = []
+            if contact.get("website"):
+                c_parts.append(contact.get("website"))
+            if contact.get("phone_number"):
+                c_parts.append(contact.get("phone_number"))
+            if contact.get("email"):
+                c_parts.append(contact.get("email"))
+            flat["contact_data"] = " | ".join(c_parts)
+
+        if result.get("keywords"):
+            flat["keywords"] = ", ".join(result["keywords"])
+        if result.get("products_and_services"):
+            flat["products_and_services"] = ", ".join(result["products_and_services"])
+
+        kpis = result.get("financial_kpi")
+        if kpis:
+            kp_parts = []
+            for entry in kpis:
+                year = entry.get("year")
+                metrics = [f"{k}: {v}" for k, v in entry.items() if k != "year" and v is not None]
+                kp_parts.append(f"{year}: " + ", ".join(metrics))
+            flat["financial_kpi"] = " | ".join(kp_parts)
+
+        pla = result.get("profit_and_loss_account")
+        if pla:
+            pla_parts = []
+            for entry in pla:
+                year = entry.get("year")
+                accounts_field = entry.get("profit_and_loss_accounts")
+                accounts = []
+                if isinstance(accounts_field, list):
+                    for acc in accounts_field:
+                        accounts.extend(self._flatten_account(acc))
+                elif accounts_field is not None:
+                    accounts.extend(self._flatten_account(accounts_field))
+                else:
+                    for k, v in entry.items():
+                        if k != "year":
+                            accounts.append(f"{k}: {v}")
+                pla_parts.append(f"{year}: " + "; ".join(accounts))
+            flat["profit_and_loss_account"] = " | ".join(pla_parts)
+
+        bsa = result.get("balance_sheet_accounts")
+        if bsa:
+            bs_parts = []
+            for entry in bsa:
+                year = entry.get("year")
+                accounts_field = entry.get("balance_sheet_accounts")
+                accounts = []
+                if isinstance(accounts_field, list):
+                    for acc in accounts_field:
+                        accounts.extend(self._flatten_account(acc))
+                elif accounts_field is not None:
+                    accounts.extend(self._flatten_account(accounts_field))
+                else:
+                    for k, v in entry.items():
+                        if k != "year":
+                            accounts.append(f"{k}: {v}")
+                bs_parts.append(f"{year}: " + "; ".join(accounts))
+            flat["balance_sheet_accounts"] = " | ".join(bs_parts)
+
+        history = result.get("history")
+        if history:
+            hist_parts = []
+            for h in history:
+                name = (h.get("name", {}).get("en") or h.get("name", {}).get("de") or "").strip()
+                start = h.get("start_date", "")
+                desc = (h.get("description", {}).get("short", {}).get("en") or h.get("description", {}).get("short", {}).get("de") or "").strip()
+                parts = [p for p in [name, desc, start] if p]
+                hist_parts.append(" - ".join(parts))
+            flat["history"] = " || ".join(hist_parts)
+
+        return flat
+
+    def output_row(self, item: dict) -> Dict[str, Any]:
+        result = item.get("_handelsregister_result")
+        row = {k: v for k, v in item.items() if k not in {"_handelsregister_result", "_in_file"}}
+        for k, v in self._flatten_result(result).items():
+            row[f"hr_{k}"] = v
+        row["_handelsregister_summary"] = self._format_flat_result(result)
+        return row
+
+
+def _account_tree(rng: random.Random, depth: int, breadth: int) -> Dict[str, Any]:
+    node = {
+        "name": {"de": f"Konto {rng.randrange(10_000)}", "en": "Account"},
+        "value": round(rng.uniform(-1e6, 1e6), 2),
+    }
+    if depth:
+        node["children"] = [_account_tree(rng, depth - 1, breadth) for _ in range(breadth)]
+    return node
+
+
+def make_result(rng: random.Random) -> Dict[str, Any]:
+    """A rich synthetic API result with account trees, KPIs and history."""
+    years = range(2018, 2024)
+    return {
+        "name": f"Company {rng.randrange(1_000_000)} GmbH",
+        "status": "ACTIVE",
+        "legal_form": "GmbH",
+        "registration_date": "2015-03-01",
+        "purpose": "Entwicklung und Vertrieb von Software. " * 5,
+        "registration": {"court": "München", "register_type": "HRB", "register_number": rng.randrange(300_000)},
+        "address": {"street": "Flößergasse", "house_number": 2, "postal_code": "81369", "city": "München",
+                    "country": "DEU"},
+        "contact_data": {"website": "https://example.com", "phone_number": "+49 89 123", "email": "info@example.com"},
+        "keywords": [f"keyword {i}" for i in range(10)],
+        "products_and_services": [f"product {i}" for i in range(8)],
+        "financial_kpi": [
+            {"year": year, "revenue": rng.uniform(1e5, 1e8), "employees": rng.randrange(500), "equity": None}
+            for year in years
+        ],
+        "balance_sheet_accounts": [
+            {"year": year, "balance_sheet_accounts": [_account_tree(rng, 3, 3), _account_tree(rng, 3, 3)]}
+            for year in years
+        ],
+        "profit_and_loss_account": [
+            {"year": year, "profit_and_loss_accounts": {"revenue": {"total": rng.random(), "other": [1, 2]}}}
+            for year in years
+        ],
+        "history": [
+            {"name": {"de": f"Eintrag {i}"}, "description": {"short": {"en": "Change of address"}},
+             "start_date": "2020-01-01"}
+            for i in range(10)
+        ],
+    }
+
+
+def make_items(rows: int, unique_results: int, seed: int = 1) -> List[Dict[str, Any]]:
+    """``rows`` items sharing ``unique_results`` result objects (like rows with equal queries)."""
+    rng = random.Random(seed)
+    results = [make_result(rng) for _ in range(min(rows, unique_results))]
+    return [
+        {"id": i, "company_name": f"Company {i}", "_in_file": True,
+         "_handelsregister_result": results[i % len(results)]}
+        for i in range(rows)
+    ]
+
+
+def _timed(label: str, func, *args) -> Any:
+    started = time.perf_counter()
+    value = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:8.3f}s")
+    return value, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument(
+        "--unique-results", type=int, default=None,
+        help="Number of distinct results shared by the rows (default: every row is distinct)",
+    )
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    items = make_items(args.rows, args.unique_results or args.rows)
+    legacy = LegacyFlattener()
+
+    legacy_rows, legacy_time = _timed("legacy (per row methods)", lambda: [legacy.output_row(i) for i in items])
+    rows, fast_time = _timed("flatten.output_rows", flatten.output_rows, items)
+    for old, new in zip(legacy_rows, rows):
+        # Status columns the legacy rows do not have
+        new.pop(ERROR_FIELD)
+        new.pop(FETCHED_AT_FIELD)
+        assert old == new, "flattened rows differ"
+    print(f"{'speedup':<28} {legacy_time / fast_time:8.2f}x")
+
+    if args.processes > 1:
+        _, pool_time = _timed(f"output_rows({args.processes} processes)", flatten.output_rows, items, args.processes)
+        print(f"{'speedup (pool)':<28} {legacy_time / pool_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,26 @@
-from .client import Handelsregister
-from .exceptions import HandelsregisterError, InvalidResponseError, AuthenticationError
+from .client import Handelsregister, get_default_client, set_default_client
+from .exceptions import HandelsregisterError, InvalidResponseError, AuthenticationError, EnrichmentInterrupted
 from .company import Company
+from .collection import CompanyCollection
+from .panel import KPIPanel
+from .accounts import AccountTree, account_matrix, balance_sheet_matrix
 from .cli import main as cli_main
 from .version import __version__
 
 __all__ = [
     "Handelsregister",
     "Company",
+    "CompanyCollection",
+    "KPIPanel",
+    "AccountTree",
+    "account_matrix",
+    "balance_sheet_matrix",
+    "get_default_client",
+    "set_default_client",
     "HandelsregisterError",
     "InvalidResponseError", 
     "AuthenticationError",
+    "EnrichmentInterrupted",
     "__version__",
     "cli_main",
 ]
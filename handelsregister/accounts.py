@@ -0,0 +1,253 @@
+"""
+Indexed balance sheet and profit and loss accounts.
+
+The API returns the accounts of a year as a tree of ``name``/``value``/
+``children`` nodes (or as a plain ``{"account": value}`` mapping).
+:class:`AccountTree` walks such a structure once and indexes every line item
+by its path (the account labels joined with ``" > "``, as in
+:func:`handelsregister.formats.account_items`) and by each of its names, so
+later lookups are dictionary accesses instead of recursive walks.
+
+:func:`account_matrix` and :func:`balance_sheet_matrix` align the trees of
+many companies on the union of their accounts and return a
+``companies x accounts`` matrix for vectorized peer comparisons.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .formats import _account_label, _to_float
+
+PATH_SEPARATOR = " > "
+
+_MISSING = object()
+
+
+def _names(name: Any) -> List[str]:
+    if isinstance(name, dict):
+        return [str(value) for value in name.values() if value]
+    return [str(name)] if name else []
+
+
+class AccountTree:
+    """
+    The accounts of one balance sheet or P&L year with O(1) lookups.
+
+    Usage:
+        tree = AccountTree(entry["balance_sheet_accounts"])
+        tree.get("Aktiva > Umlaufvermögen")      # by path
+        tree.find("current assets")               # by any name, case-insensitive
+        for path, value in tree.items():
+            ...
+
+    Names are matched in every language the API provides (``de``, ``en``,
+    ``in_report``). If several accounts share a name, :meth:`find` returns
+    the first one in document order and :meth:`find_all` returns all of them.
+    """
+
+    __slots__ = ("_values", "_by_name")
+
+    def __init__(self, accounts: Any) -> None:
+        """
+        :param accounts: The account structure of one year.
+        """
+        self._values: Dict[str, Any] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._walk(accounts, "")
+
+    def _add(self, path: str, value: Any, names: List[str]) -> None:
+        if path in self._values:
+            # Keep the first account of a duplicated path, like a top-down search
+            return
+        self._values[path] = value
+        for name in {name.casefold() for name in names}:
+            self._by_name.setdefault(name, []).append(path)
+
+    def _walk(self, node: Any, prefix: str) -> None:
+        if isinstance(node, list):
+            for child in node:
+                self._walk(child, prefix)
+        elif isinstance(node, dict) and "name" in node:
+            label = _account_label(node)
+            path = f"{prefix}{PATH_SEPARATOR}{label}" if prefix else label
+            self._add(path, node.get("value"), _names(node["name"]) or [label])
+            self._walk(node.get("children") or [], path)
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                path = f"{prefix}{PATH_SEPARATOR}{key}" if prefix else str(key)
+                if isinstance(value, (dict, list)):
+                    self._walk(value, path)
+                else:
+                    self._add(path, value, [str(key)])
+        elif node is not None and prefix:
+            self._add(prefix, node, [prefix.rsplit(PATH_SEPARATOR, 1)[-1]])
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """Get the value of the account at ``path`` (``default`` if there is none)."""
+        return self._values.get(path, default)
+
+    def __getitem__(self, path: str) -> Any:
+        return self._values[path]
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def find(self, name: str, default: Any = None) -> Any:
+        """Get the value of the first account called ``name`` (case-insensitive)."""
+        paths = self._by_name.get(name.casefold())
+        return self._values[paths[0]] if paths else default
+
+    def find_path(self, name: str) -> Optional[str]:
+        """Get the path of the first account called ``name`` (case-insensitive)."""
+        paths = self._by_name.get(name.casefold())
+        return paths[0] if paths else None
+
+    def find_all(self, name: str) -> List[Tuple[str, Any]]:
+        """Get ``(path, value)`` of every account called ``name`` (case-insensitive)."""
+        return [(path, self._values[path]) for path in self._by_name.get(name.casefold(), ())]
+
+    def lookup(self, key: str, default: Any = None) -> Any:
+        """Get an account's value by path, falling back to a name lookup."""
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            return self.find(key, default)
+        return value
+
+    @property
+    def paths(self) -> List[str]:
+        """All account paths, in document order."""
+        return list(self._values)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over ``(path, value)`` pairs in document order."""
+        return iter(self._values.items())
+
+    def __repr__(self) -> str:
+        return f"AccountTree({len(self)} accounts)"
+
+
+def union_paths(trees: Iterable[AccountTree]) -> List[str]:
+    """
+    Merge the accounts of several trees into one hierarchy.
+
+    :return: Every path that occurs in any tree, in hierarchy order: each
+             account follows its parent and earlier siblings, siblings in
+             the order they are first seen.
+    """
+    root: Dict[str, dict] = {}
+    present = set()
+    for tree in trees:
+        for path in tree:
+            if path in present:
+                continue
+            present.add(path)
+            node = root
+            for label in path.split(PATH_SEPARATOR):
+                node = node.setdefault(label, {})
+
+    paths: List[str] = []
+
+    def emit(node: Dict[str, dict], prefix: str) -> None:
+        for label, children in node.items():
+            path = f"{prefix}{PATH_SEPARATOR}{label}" if prefix else label
+            # Intermediate keys of plain mappings are not accounts themselves
+            if path in present:
+                paths.append(path)
+            emit(children, path)
+
+    emit(root, "")
+    return paths
+
+
+def account_matrix(
+    trees: Sequence[AccountTree],
+    sparse: bool = False,
+    labels: Optional[Sequence[Any]] = None,
+    accounts: Optional[Sequence[str]] = None,
+):
+    """
+    Align account trees in a ``companies x accounts`` DataFrame.
+
+    :param trees: One tree per company, e.g. ``company.balance_sheet_tree(2022)``.
+    :param sparse: Store the columns as ``SparseDtype(float, nan)``. Worth it
+                   when the companies share only few of the union's accounts.
+    :param labels: One index label per company; defaults to the position.
+    :param accounts: The account paths (columns) to return; defaults to the
+                     union of all trees in hierarchy order (:func:`union_paths`).
+    :return: A float DataFrame; NaN where a company has no such account or
+             the value is not numeric.
+    """
+    import pandas as pd
+
+    columns = union_paths(trees) if accounts is None else list(accounts)
+    column_index = {path: position for position, path in enumerate(columns)}
+    rows: List[int] = []
+    cols: List[int] = []
+    values: List[float] = []
+    for row, tree in enumerate(trees):
+        for path, value in tree.items():
+            col = column_index.get(path)
+            number = _to_float(value) if col is not None else None
+            if number is None:
+                continue
+            rows.append(row)
+            cols.append(col)
+            values.append(number)
+
+    index = pd.RangeIndex(len(trees)) if labels is None else pd.Index(labels)
+    rows_array = np.asarray(rows, dtype=np.intp)
+    cols_array = np.asarray(cols, dtype=np.intp)
+    values_array = np.asarray(values, dtype=float)
+    if not sparse:
+        matrix = np.full((len(trees), len(columns)), np.nan)
+        matrix[rows_array, cols_array] = values_array
+        return pd.DataFrame(matrix, index=index, columns=columns)
+
+    # Column by column, so the dense matrix never exists as a whole
+    order = np.argsort(cols_array, kind="stable")
+    bounds = np.searchsorted(cols_array[order], np.arange(len(columns) + 1))
+    dtype = pd.SparseDtype(float, np.nan)
+    data = {}
+    column = np.empty(len(trees))
+    for position, path in enumerate(columns):
+        selected = order[bounds[position]:bounds[position + 1]]
+        column.fill(np.nan)
+        column[rows_array[selected]] = values_array[selected]
+        data[path] = pd.arrays.SparseArray(column, dtype=dtype)
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def balance_sheet_matrix(
+    companies: Iterable[Any],
+    year: int,
+    sparse: bool = False,
+    labels: Optional[Sequence[Any]] = None,
+):
+    """
+    Compare the balance sheets of many companies for one year.
+
+    Usage:
+        matrix = balance_sheet_matrix(companies, 2022, labels=[c.name for c in companies])
+        equity_ratio = matrix["Passiva > Eigenkapital"] / matrix["Aktiva"]
+
+    :param companies: ``Company`` objects or fetch_organization results.
+    :param year: The balance sheet year.
+    :param sparse: See :func:`account_matrix`.
+    :param labels: One index label per company; defaults to the position.
+    :return: A ``companies x accounts`` float DataFrame over the union of
+             all accounts, in hierarchy order.
+    """
+    from .company import Company
+
+    trees = []
+    for company in companies:
+        if not isinstance(company, Company):
+            company = Company.from_data(company if isinstance(company, dict) else {})
+        trees.append(company.balance_sheet_tree(year))
+    return account_matrix(trees, sparse=sparse, labels=labels)
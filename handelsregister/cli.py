@@ -1,8 +1,11 @@
 import argparse
 import json
+import sys
 from typing import List, Optional, Any
 
 from .client import Handelsregister
+from .exceptions import EnrichmentInterrupted
+from .sharding import merge_shards
 
 DEFAULT_FEATURES = [
     "related_persons",
@@ -35,6 +38,19 @@ def parse_query_properties(props: List[str]):
     return mapping
 
 
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def _parse_duration(value: str) -> float:
+    """Parse ``30d``, ``12h``, ``90m``, ``45s`` or a plain number of seconds."""
+    value = value.strip().lower()
+    unit = _DURATION_UNITS.get(value[-1:]) if value else None
+    try:
+        return float(value[:-1]) * unit if unit else float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid duration: '{value}'") from None
+
+
 def _display_result(client: Handelsregister, result: dict) -> None:
     """Pretty-print the API result."""
     summary = client._format_flat_result(result)
@@ -150,6 +166,37 @@ def _display_result(client: Handelsregister, result: dict) -> None:
 
 
 
+def _display_plan(plan: dict) -> None:
+    """Print the result of a dry run."""
+    def fmt(value: Any) -> str:
+        if value is None:
+            return "unknown"
+        if isinstance(value, float):
+            return f"{value:,.1f}"
+        return f"{value:,}"
+
+    labels = [
+        ("total_items", "Items in input"),
+        ("already_enriched", "Already enriched"),
+        ("stale", "Stale (refreshed)"),
+        ("empty_query", "Empty query (skipped)"),
+        ("cached", "Served from cache"),
+        ("duplicates", "Duplicate queries"),
+        ("new_calls", "New API calls"),
+        ("avg_credit_cost", "Avg. credits per call"),
+        ("estimated_credits", "Estimated credits"),
+        ("estimated_seconds", "Estimated duration (s)"),
+    ]
+    if RICH_AVAILABLE:
+        table = Table(title="Enrichment plan", show_header=False)
+        for key, label in labels:
+            table.add_row(label, fmt(plan.get(key)))
+        Console().print(table)
+    else:
+        for key, label in labels:
+            print(f"{label}: {fmt(plan.get(key))}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Handelsregister.ai CLI")
     subparsers = parser.add_subparsers(dest="command")
@@ -160,10 +207,12 @@ def main():
     fetch_parser.add_argument("--ai-search", dest="ai_search")
 
     enrich_parser = subparsers.add_parser("enrich", help="Enrich a data file")
-    enrich_parser.add_argument("file_path")
+    enrich_parser.add_argument("file_path", help="Input file, or - to read from stdin")
     enrich_parser.add_argument("--input", dest="input_type", default="json")
     enrich_parser.add_argument("--snapshot-dir", dest="snapshot_dir", default="")
-    enrich_parser.add_argument("--output", dest="output_file", default="")
+    enrich_parser.add_argument(
+        "--output", dest="output_file", default="", help="Output file, or - to write to stdout"
+    )
     enrich_parser.add_argument("--output-format", dest="output_type", default="")
     enrich_parser.add_argument(
         "--query-properties",
@@ -173,6 +222,99 @@ def main():
     )
     enrich_parser.add_argument("--feature", dest="features", action="append")
     enrich_parser.add_argument("--ai-search", dest="ai_search")
+    enrich_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read, enrich and write records incrementally (jsonl/csv/xlsx/parquet output)",
+    )
+    enrich_parser.add_argument("--chunk-size", dest="chunk_size", type=int, default=1000)
+    enrich_parser.add_argument("--shard-index", dest="shard_index", type=int, default=0)
+    enrich_parser.add_argument(
+        "--shard-count",
+        dest="shard_count",
+        type=int,
+        default=1,
+        help="Split the input into this many shards and only process --shard-index",
+    )
+    enrich_parser.add_argument(
+        "--queue",
+        dest="queue_path",
+        default="",
+        help="SQLite work queue shared by several enrich workers",
+    )
+    enrich_parser.add_argument("--worker-id", dest="worker_id", default="")
+    enrich_parser.add_argument(
+        "--dry-run",
+        dest="dry_run",
+        action="store_true",
+        help="Only report how many API calls and credits the run would need",
+    )
+    enrich_parser.add_argument("--lease-timeout", dest="lease_timeout", type=float, default=600.0)
+    enrich_parser.add_argument(
+        "--id-column",
+        dest="id_column",
+        default="",
+        help="Column that uniquely identifies a record (used to match snapshot items)",
+    )
+    enrich_parser.add_argument(
+        "--field",
+        dest="fields",
+        action="append",
+        help="Result field to keep as a dotted path, e.g. registration.register_number (repeatable)",
+    )
+    enrich_parser.add_argument(
+        "--flatten-processes",
+        dest="flatten_processes",
+        type=int,
+        default=0,
+        help="Worker processes used to build CSV/XLSX output rows",
+    )
+    enrich_parser.add_argument(
+        "--max-age",
+        dest="max_age",
+        type=_parse_duration,
+        help="Fetch rows again whose result is older than this, e.g. 30d, 12h, 90m or seconds",
+    )
+    enrich_parser.add_argument(
+        "--max-refresh",
+        dest="max_refresh",
+        type=int,
+        help="Refresh at most this many stale rows per run",
+    )
+    enrich_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of requests sent at the same time (default: 1)",
+    )
+    enrich_parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Write streamed rows as soon as they are done, with their input position in _input_index",
+    )
+    enrich_parser.add_argument(
+        "--spill-results",
+        action="store_true",
+        help="Keep results in an on-disk store instead of memory until the output is written",
+    )
+    enrich_parser.add_argument(
+        "--retry-failed",
+        dest="retry_failed",
+        type=int,
+        default=1,
+        help="Retry passes over items whose request failed (default: 1)",
+    )
+    enrich_parser.add_argument(
+        "--report",
+        dest="report_file",
+        default="",
+        help="JSON file for the run report (latency, request rate, cache hits, credits, ETA)",
+    )
+
+    merge_parser = subparsers.add_parser("merge", help="Merge the outputs of a sharded enrichment")
+    merge_parser.add_argument("shard_files", nargs="+")
+    merge_parser.add_argument("--output", dest="output_file", required=True)
+    merge_parser.add_argument("--format", dest="file_type", default=None)
 
     document_parser = subparsers.add_parser("document", help="Download company documents")
     document_parser.add_argument("query", nargs="+", help="Company search query")
@@ -193,6 +335,12 @@ def main():
 
     args = parser.parse_args()
 
+    if args.command == "merge":
+        # Merging is a local operation and does not need an API key
+        count = merge_shards(args.shard_files, args.output_file, file_type=args.file_type)
+        print(f"Merged {count} records into {args.output_file}")
+        return
+
     client = Handelsregister()
 
     if args.command == "fetch":
@@ -234,15 +382,40 @@ def main():
             params["features"] = args.features
         if args.ai_search:
             params["ai_search"] = args.ai_search
-        client.enrich(
-            file_path=args.file_path,
-            input_type=args.input_type,
-            query_properties=query_props,
-            snapshot_dir=args.snapshot_dir,
-            params=params,
-            output_file=args.output_file,
-            output_type=args.output_type,
-        )
+        try:
+            plan = client.enrich(
+                file_path=args.file_path,
+                input_type=args.input_type,
+                query_properties=query_props,
+                snapshot_dir=args.snapshot_dir,
+                params=params,
+                output_file=args.output_file,
+                output_type=args.output_type,
+                stream=args.stream,
+                chunk_size=args.chunk_size,
+                shard_index=args.shard_index,
+                shard_count=args.shard_count,
+                queue_path=args.queue_path,
+                worker_id=args.worker_id,
+                lease_timeout=args.lease_timeout,
+                dry_run=args.dry_run,
+                report_file=args.report_file,
+                id_column=args.id_column,
+                retry_failed=args.retry_failed,
+                fields=args.fields,
+                flatten_processes=args.flatten_processes,
+                spill_results=args.spill_results,
+                concurrency=args.concurrency,
+                max_age=args.max_age,
+                max_refresh=args.max_refresh,
+                ordered=not args.unordered,
+            )
+        except EnrichmentInterrupted as exc:
+            # The progress is saved; exit like an interrupted shell command
+            print(exc, file=sys.stderr)
+            sys.exit(130)
+        if args.dry_run:
+            _display_plan(plan)
     elif args.command == "document":
         query_string = " ".join(args.query)
         
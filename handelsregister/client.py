@@ -3,9 +3,14 @@ import json
 import time
 import logging
 import hashlib
+import itertools
+import signal
+import threading
 import httpx
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Dict, Any, Iterable, Union
 from pathlib import Path
 from glob import glob
 
@@ -15,12 +20,25 @@ except ImportError as exc:
     raise ImportError("tqdm is required for this package to run. Please install it.") from exc
 
 from .version import __version__
-from .exceptions import HandelsregisterError, InvalidResponseError, AuthenticationError
+from .exceptions import HandelsregisterError, InvalidResponseError, AuthenticationError, EnrichmentInterrupted
+from . import flatten
+from . import formats
+from . import sharding
+from .pipeline import Pipeline
+from .spill import SPILL_FIELD, ResultStore
+from .workqueue import WorkQueue
+from .metrics import EnrichmentMetrics, read_report
 
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://handelsregister.ai/api/v1/"
 
+# Assumed duration of one fetch-organization request when planning a run
+DEFAULT_REQUEST_LATENCY = 2.0
+
+# Reused by _build_key; creating an encoder per call is measurably slower
+_KEY_ENCODER = json.JSONEncoder(sort_keys=True, ensure_ascii=False, default=str)
+
 class Handelsregister:
     """
     A modern Python client for interacting with handelsregister.ai.
@@ -40,6 +58,7 @@ class Handelsregister:
         base_url: str = BASE_URL,
         cache_enabled: bool = True,
         rate_limit: float = 0.0,
+        cache_size: Optional[int] = None,
     ) -> None:
         """
         Initialize the Handelsregister client.
@@ -48,6 +67,9 @@ class Handelsregister:
                         HANDELSREGISTER_API_KEY env var is not set).
         :param timeout: Timeout for HTTP requests (in seconds).
         :param base_url: Base URL for the handelsregister.ai API.
+        :param cache_size: Maximum number of responses kept in the in-memory
+                           cache. The least recently used entries are evicted
+                           first. ``None`` keeps every response.
         """
         # Support reading the API key from environment if none provided
         env_api_key = os.getenv("HANDELSREGISTER_API_KEY", "")
@@ -69,8 +91,15 @@ class Handelsregister:
 
         self.cache_enabled = cache_enabled
         self.rate_limit = rate_limit
-        self._cache: Dict[tuple, Dict[str, Any]] = {}
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
         self._last_request_time = 0.0
+        # Attached by enrich() for the duration of a run
+        self._metrics: Optional[EnrichmentMetrics] = None
+        self._stop_requested = threading.Event()
+        # fetch_organization may be called from several threads (enrich_dataframe)
+        self._cache_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
 
         logger.debug("Handelsregister client initialized with base_url=%s", self.base_url)
 
@@ -118,42 +147,50 @@ class Handelsregister:
 
         url = f"{self.base_url}/fetch-organization"
 
-        cache_key = (
-            q,
-            tuple(sorted(features)) if features else (),
-            ai_search,
-            tuple(sorted(kwargs.items())),
-        )
+        cache_key = self._cache_key(q, features, ai_search, kwargs)
 
-        if self.cache_enabled and cache_key in self._cache:
-            logger.debug("Returning cached result for %s", q)
-            return self._cache[cache_key]
+        if self.cache_enabled:
+            with self._cache_lock:
+                cached = self._cache.get(cache_key)
+                if cached is not None and self.cache_size is not None:
+                    self._cache.move_to_end(cache_key)
+            if cached is not None:
+                logger.debug("Returning cached result for %s", q)
+                if self._metrics is not None:
+                    self._metrics.record_cache_hit()
+                return cached
 
-        # Rate limiting
+        # Rate limiting; the lock spaces out requests started by concurrent threads
         if self.rate_limit > 0:
-            elapsed = time.time() - self._last_request_time
-            if elapsed < self.rate_limit:
-                time.sleep(self.rate_limit - elapsed)
+            with self._rate_lock:
+                elapsed = time.time() - self._last_request_time
+                if elapsed < self.rate_limit:
+                    time.sleep(self.rate_limit - elapsed)
+                self._last_request_time = time.time()
 
         # Up to 3 retries with exponential backoff
         max_retries = 3
+        metrics = self._metrics
         for attempt in range(max_retries):
             try:
                 with httpx.Client(timeout=self.timeout) as client:
                     logger.debug("Making GET request to %s with params=%s", url, params)
+                    started = time.perf_counter() if metrics is not None else 0.0
                     response = client.get(url, headers=self.headers, params=params)
                     response.raise_for_status()
                     data = response.json()
                     self._last_request_time = time.time()
-                    if self.cache_enabled:
-                        self._cache[cache_key] = data
-                    return data
+                    latency = time.perf_counter() - started if metrics is not None else 0.0
 
             except httpx.RequestError as exc:
                 logger.warning("Request error (attempt %d/%d): %s", attempt + 1, max_retries, exc)
                 time.sleep(2 ** attempt)
                 if attempt == max_retries - 1:
+                    if metrics is not None:
+                        metrics.record_failure()
                     raise HandelsregisterError(f"Error while requesting data: {exc}") from exc
+                if metrics is not None:
+                    metrics.record_retry()
 
             except httpx.HTTPStatusError as exc:
                 logger.warning("HTTP status error (attempt %d/%d): %s", attempt + 1, max_retries, exc)
@@ -161,13 +198,29 @@ class Handelsregister:
                     raise AuthenticationError("Invalid API key or unauthorized access.") from exc
                 time.sleep(2 ** attempt)
                 if attempt == max_retries - 1:
+                    if metrics is not None:
+                        metrics.record_failure()
                     raise HandelsregisterError(f"HTTP error occurred: {exc}") from exc
+                if metrics is not None:
+                    metrics.record_retry()
 
             except ValueError as exc:
                 # Could not parse JSON
                 logger.error("Invalid JSON response: %s", exc)
+                if metrics is not None:
+                    metrics.record_failure()
                 raise InvalidResponseError(f"Received non-JSON response: {exc}") from exc
 
+            else:
+                if metrics is not None:
+                    # Outside the try: an odd cost must not turn a valid response into an error
+                    meta = data.get("meta") if isinstance(data, dict) else None
+                    cost = meta.get("request_credit_cost") if isinstance(meta, dict) else None
+                    metrics.record_request(latency, formats._to_float(cost) or 0.0)
+                if self.cache_enabled:
+                    self._store_in_cache(cache_key, data)
+                return data
+
     def fetch_organization_df(self, *args, **kwargs):
         """Fetch organization data and return a pandas DataFrame."""
         data = self.fetch_organization(*args, **kwargs)
@@ -184,12 +237,30 @@ class Handelsregister:
         snapshots: int = 120,
         params: Dict[str, Any] = None,
         output_file: str = "",
-        output_type: str = ""
+        output_type: str = "",
+        stream: bool = False,
+        chunk_size: int = 1000,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        queue_path: str = "",
+        worker_id: str = "",
+        lease_timeout: float = 600.0,
+        dry_run: bool = False,
+        report_file: str = "",
+        id_column: str = "",
+        retry_failed: int = 1,
+        fields: Optional[List[str]] = None,
+        flatten_processes: int = 0,
+        spill_results: bool = False,
+        concurrency: int = 1,
+        max_age: Union[float, timedelta, None] = None,
+        max_refresh: Optional[int] = None,
+        ordered: bool = True,
     ):
         """
         Enrich a local data file with Handelsregister.ai results.
 
-        Supported input formats: JSON, CSV and XLSX.
+        Supported input formats: JSON, JSON Lines, CSV, XLSX and Parquet.
 
         The process:
           1. If there's a snapshot, load it.
@@ -199,9 +270,24 @@ class Handelsregister:
              - Add or update items from the file.
           4. Only re-process items that appear in the file and have not been enriched.
           5. Take periodic snapshots to allow resuming.
+
+        With ``stream=True`` the file is instead processed record by record:
+        each record is read, enriched and appended to the output before the
+        next one is read, so memory use stays bounded regardless of the file
+        size (see :meth:`_enrich_stream`).
+
+        Large jobs can be split across processes or machines with
+        ``shard_index``/``shard_count``: each shard only enriches the items
+        whose stable key hash falls into it, keeps its own snapshots and writes
+        its own output (including an ``_input_index`` column), which
+        :func:`handelsregister.sharding.merge_shards` combines again.
+
+        Alternatively, several processes started with the same ``queue_path``
+        share a SQLite work queue and pull items as they become free (see
+        :meth:`_enrich_queue`), which balances slow and fast items dynamically.
         
         :param file_path: Path to the input file.
-        :param input_type: Type of input file ('json', 'csv' or 'xlsx').
+        :param input_type: Type of input file ('json', 'jsonl', 'csv', 'xlsx' or 'parquet').
         :param query_properties: Dict describing which fields are combined to form 'q'.
                                  Example: {'name': 'company_name', 'location': 'city'}
         :param snapshot_dir: Directory in which to store intermediate snapshots.
@@ -211,16 +297,106 @@ class Handelsregister:
         :param output_file: Optional path for the enriched output file. If not
                             provided, ``file_path`` will be used as a base name
                             with ``_handelsregister_ai_enriched`` appended.
-        :param output_type: Desired output type ('json', 'csv' or 'xlsx'). If empty,
-                            defaults to the ``input_type``.
+        :param output_type: Desired output type ('json', 'jsonl', 'csv', 'xlsx' or
+                            'parquet'). If empty, defaults to the ``input_type``.
+                            Parquet output expands each result into typed
+                            ``hr_*`` columns (see :func:`formats.result_arrow_schema`).
+        :param stream: Process the input incrementally and append results to the
+                       output as they complete. Requires a 'jsonl', 'csv', 'xlsx'
+                       or 'parquet' output; only jsonl and csv can be resumed.
+                       The columns of csv, xlsx and parquet output are fixed
+                       by the first record: fields that only later records
+                       have are dropped, with a warning naming them.
+        :param chunk_size: Number of CSV/Parquet rows parsed at a time in streaming
+                           mode, and number of rows per Parquet row group.
+        :param shard_index: Zero-based number of the shard processed by this run.
+        :param shard_count: Total number of shards the input is split into.
+        :param queue_path: Path of a SQLite work queue shared by all workers of
+                           the job. Replaces snapshots and sharding.
+        :param worker_id: Name of this worker in the queue (default ``<host>-<pid>``).
+        :param lease_timeout: Seconds after which an item leased by a worker that
+                              did not finish it is handed to another worker.
+        :param dry_run: Do not call the API or write any file; return the plan
+                        computed by :meth:`plan_enrichment` instead.
+        :param report_file: Where to write the JSON run report (latency
+                            percentiles, request rate, cache hits, retries,
+                            failures, credits, ETA). Defaults to
+                            ``run_report_<params>.json`` in the snapshot
+                            directory. The report is refreshed at every
+                            snapshot and at the end of the run.
+        :param id_column: Column that uniquely identifies a record. It is used
+                          to match input records with snapshot items (and to
+                          assign shards) instead of the ``query_properties``
+                          values. See :meth:`_build_key`.
+        :param retry_failed: Number of retry passes over the items whose
+                             request failed, run once all other items are
+                             done. Items that still fail are written with a
+                             ``_handelsregister_error`` field (and retried by
+                             the next run resuming from the snapshot). In
+                             streaming mode failed items are written at once
+                             and not retried within the run.
+        :param fields: Dotted paths of the result fields to keep, e.g.
+                       ``["name", "status", "registration.register_number"]``.
+                       Each response is reduced to these fields as soon as it
+                       arrives (``meta.request_credit_cost`` is always kept),
+                       and CSV/XLSX outputs only get the matching ``hr_*``
+                       columns. A different set of fields starts a new set
+                       of snapshots.
+        :param flatten_processes: Build the rows of a CSV/XLSX output in this
+                                  many worker processes (see
+                                  :func:`flatten.iter_output_rows`). Not
+                                  used in streaming mode.
+        :param spill_results: Move every result into an on-disk
+                              :class:`spill.ResultStore` as soon as it arrives
+                              and only join it back while the output is
+                              written, so memory no longer grows with the
+                              size of the responses. The store lives next to
+                              the snapshots (``results_<params>.sqlite``),
+                              which then only hold references, or in a
+                              temporary file without a snapshot directory.
+                              Streaming and queue mode never keep results in
+                              memory and ignore this option.
+        :param concurrency: Number of threads fetching items at the same time.
+                            Above 1, reading the input, fetching (and
+                            flattening) and writing the output overlap in a
+                            :class:`pipeline.Pipeline` with bounded
+                            buffers; the output keeps the input order.
+                            ``rate_limit`` still applies to all threads
+                            together. Queue mode fetches one item at a time
+                            per worker.
+        :param max_age: Fetch items again whose result is older than this
+                        (a ``timedelta`` or seconds), oldest first. Every
+                        successful fetch is timestamped in the
+                        ``_handelsregister_fetched_at`` field; results from
+                        before that field existed count as the oldest. A
+                        failed refresh keeps the old result. Needs the
+                        results of earlier runs, i.e. a ``snapshot_dir``;
+                        ignored in streaming and queue mode.
+        :param max_refresh: Refresh at most this many stale items per run.
+        :param ordered: Write streamed records in input order. With
+                        ``ordered=False`` every record is written as soon as
+                        it is done and carries its input position in
+                        ``_input_index``; such runs cannot be resumed.
+
+        ``file_path="-"`` reads JSON, JSONL or CSV from stdin and
+        ``output_file="-"`` writes JSONL or CSV to stdout (the default for
+        stdin input), flushing every record. Both imply ``stream=True`` and
+        disable resuming from a checkpoint. Progress and log output go to
+        stderr.
+
+        SIGINT and SIGTERM do not kill a running enrichment: the item being
+        fetched is finished, the snapshot / checkpoint is written (queue
+        workers hand their leased items back) and
+        :class:`EnrichmentInterrupted` is raised. Running the same call again
+        resumes from there. A second signal aborts immediately.
         """
         input_type = input_type.lower()
-        if input_type not in {"json", "csv", "xlsx"}:
-            raise ValueError("enrich() supports only 'json', 'csv' or 'xlsx' input_type.")
+        if input_type not in formats.INPUT_TYPES:
+            raise ValueError("enrich() supports only 'json', 'jsonl', 'csv', 'xlsx' or 'parquet' input_type.")
 
         output_type = (output_type or input_type).lower()
-        if output_type not in {"json", "csv", "xlsx"}:
-            raise ValueError("enrich() supports only 'json', 'csv' or 'xlsx' output_type.")
+        if output_type not in formats.OUTPUT_TYPES:
+            raise ValueError("enrich() supports only 'json', 'jsonl', 'csv', 'xlsx' or 'parquet' output_type.")
 
         if not file_path:
             raise ValueError("file_path is required for enrich().")
@@ -231,17 +407,310 @@ class Handelsregister:
         if params is None:
             params = {}
 
-        param_hash = self._params_hash(params)
+        stdio = formats.STDIO in (file_path, output_file)
+        if file_path == formats.STDIO and not output_file:
+            output_file = formats.STDIO
+        if output_file == formats.STDIO and output_type not in formats.STDIO_OUTPUT_TYPES:
+            raise ValueError("Only 'jsonl' or 'csv' output can be written to stdout.")
+        if stdio and not queue_path:
+            # A pipe can only be read (or written) once, front to back
+            stream = True
+
+        sharding.validate_shard(shard_index, shard_count)
+        shard = (shard_index, shard_count) if shard_count > 1 else None
+        if queue_path and (shard or stream):
+            raise ValueError("queue_path cannot be combined with stream or sharding.")
+
+        if dry_run:
+            return self.plan_enrichment(
+                file_path=file_path,
+                input_type=input_type,
+                query_properties=query_properties,
+                snapshot_dir="" if queue_path else snapshot_dir,
+                params=params,
+                output_type=output_type,
+                stream=stream,
+                chunk_size=chunk_size,
+                shard_index=shard_index,
+                shard_count=shard_count,
+                report_file=report_file,
+                concurrency=concurrency,
+                id_column=id_column,
+                fields=fields,
+                max_age=max_age,
+                max_refresh=max_refresh,
+            )
+
+        param_hash = self._params_hash(params, fields)
+        projection = self._projection(fields)
 
-        snapshot_path = Path(snapshot_dir) if snapshot_dir else None
+        snapshot_path = self._snapshot_path(snapshot_dir, shard)
         if snapshot_path:
             snapshot_path.mkdir(parents=True, exist_ok=True)
 
+        if not output_file:
+            output_file = self._default_output_file(file_path, output_type, shard)
+
+        if stream and output_type not in formats.STREAMING_OUTPUT_TYPES:
+            raise ValueError("Streaming enrichment supports only 'jsonl', 'csv', 'xlsx' or 'parquet' output_type.")
+
+        report_path = report_file or (
+            snapshot_path / f"run_report_{param_hash}.json" if snapshot_path else None
+        )
+        if max_age is not None and (stream or queue_path):
+            logger.info("max_age is ignored in streaming and queue mode; every item is fetched.")
+
+        previous_metrics = self._metrics
+        self._metrics = EnrichmentMetrics(report_path=report_path)
+        with self._stop_on_signals():
+            try:
+                if queue_path:
+                    if snapshot_path:
+                        logger.info("Snapshots are not used in queue mode; the queue keeps all progress.")
+                    return self._enrich_queue(
+                        file_path, input_type, query_properties, params, param_hash,
+                        output_file, output_type, chunk_size, queue_path, worker_id, lease_timeout,
+                        retry_failed, projection, flatten_processes,
+                    )
+
+                if stream:
+                    return self._enrich_stream(
+                        file_path, input_type, query_properties, snapshot_path,
+                        snapshot_steps, params, param_hash, output_file, output_type, chunk_size,
+                        shard, id_column, projection, concurrency, ordered,
+                    )
+
+                return self._enrich_snapshots(
+                    file_path, input_type, query_properties, snapshot_path, snapshot_steps,
+                    snapshots, params, param_hash, output_file, output_type, chunk_size, shard,
+                    id_column, retry_failed, projection, flatten_processes, spill_results,
+                    concurrency, max_age, max_refresh,
+                )
+            finally:
+                self._metrics.save()
+                self._metrics = previous_metrics
+
+    @contextmanager
+    def _stop_on_signals(self):
+        """
+        Turn SIGINT/SIGTERM into a request to stop :meth:`enrich` gracefully.
+
+        The handlers only set ``_stop_requested``; the enrichment loops check
+        it between items. The previous handlers are restored on exit, and
+        already after the first signal so that a second one aborts at once.
+        Signal handlers can only be installed from the main thread; elsewhere
+        the run is simply not interruptible this way.
+        """
+        self._stop_requested.clear()
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+
+        previous = {}
+
+        def restore():
+            for signum, handler in previous.items():
+                signal.signal(signum, handler if handler is not None else signal.SIG_DFL)
+
+        def request_stop(signum, frame):
+            logger.warning(
+                "Received %s: finishing the current item and saving progress. "
+                "Send it again to abort immediately.", signal.Signals(signum).name
+            )
+            self._stop_requested.set()
+            restore()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous[signum] = signal.signal(signum, request_stop)
+        try:
+            yield
+        finally:
+            restore()
+
+    def _interrupted(self, detail: str) -> EnrichmentInterrupted:
+        """Build the exception raised after an interrupted run saved its progress."""
+        logger.warning("Enrichment interrupted; %s", detail)
+        return EnrichmentInterrupted(f"Enrichment interrupted; {detail}")
+
+    def _enrich_snapshots(
+        self,
+        file_path: str,
+        input_type: str,
+        query_properties: Dict[str, str],
+        snapshot_path: Optional[Path],
+        snapshot_steps: int,
+        snapshots: int,
+        params: Dict[str, Any],
+        param_hash: str,
+        output_file: str,
+        output_type: str,
+        chunk_size: int,
+        shard: Optional[tuple] = None,
+        id_column: str = "",
+        retry_failed: int = 1,
+        projection: Optional[Dict[str, Any]] = None,
+        flatten_processes: int = 0,
+        spill_results: bool = False,
+        concurrency: int = 1,
+        max_age: Union[float, timedelta, None] = None,
+        max_refresh: Optional[int] = None,
+    ):
+        """
+        Default variant of :meth:`enrich`: load and merge everything in memory,
+        enrich the missing items and take periodic JSON snapshots.
+
+        With ``spill_results`` the results are kept in a :class:`ResultStore`
+        instead (see :meth:`_open_result_store`). With ``concurrency > 1``
+        the items are fetched by a :class:`Pipeline` of that many threads.
+        Items older than ``max_age`` are fetched again after the new ones
+        (see :meth:`_stale_items`).
+        """
         logger.debug(
             "Starting enrichment process with file_path=%s, snapshot_dir=%s",
-            file_path, snapshot_dir
+            file_path, snapshot_path
         )
 
+        # ------------------------------------------------
+        # 1.-3. Load snapshot and file, merge them
+        # ------------------------------------------------
+        merged_data = self._load_merged_data(
+            file_path, input_type, query_properties, snapshot_path, param_hash, shard, id_column
+        )
+
+        logger.debug("Merged dataset size: %d items (includes removed items from snapshots).", len(merged_data))
+
+        store = self._open_result_store(snapshot_path, param_hash, spill_results)
+        try:
+            if store is not None:
+                self._reconcile_spilled(merged_data, store, query_properties, id_column, spill_results)
+                if not spill_results:
+                    # Only opened to take the results of an earlier spilling run back
+                    store.close()
+                    store = None
+
+            def spill(item: dict) -> None:
+                if store is not None:
+                    store.spill(item, self._result_ref(item, query_properties, id_column))
+
+            def snapshot() -> None:
+                # Snapshots may only refer to committed results
+                if store is not None:
+                    store.commit()
+                self._create_snapshot(merged_data, snapshot_path, snapshots, param_hash)
+
+            # ------------------------------------------------
+            # 4. Only re-process items that are in the file and not yet enriched (or stale)
+            # ------------------------------------------------
+            processed_so_far = sum(1 for item in merged_data if self._is_enriched(item))
+
+            logger.debug("Already processed %d items (via snapshots).", processed_so_far)
+
+            # Prepare progress bar
+            total_file_items = sum(1 for x in merged_data if x["_in_file"])  # how many are in the new file
+            already_done = sum(1 for x in merged_data if x["_in_file"] and self._is_enriched(x))
+
+            # Enriched items older than max_age are fetched again, oldest first
+            stale = self._stale_items(merged_data, max_age, max_refresh)
+            already_done -= len(stale)
+
+            logger.info(
+                "Enriching %d new items and refreshing %d stale ones (file has %d total, %d already enriched).",
+                total_file_items - already_done - len(stale), len(stale), total_file_items, already_done
+            )
+
+            metrics = self._metrics
+            metrics.total_items = total_file_items - already_done
+            current_step_count = 0  # track how many new items we've processed since last snapshot
+
+            # Only enrich items that are in the file and not enriched yet; old
+            # items removed from the current file are kept but not re-processed
+            pending = (
+                (position, item) for position, item in enumerate(merged_data)
+                if item["_in_file"] and not self._is_enriched(item)
+            )
+
+            def enrich_pending(entry: tuple) -> tuple:
+                # Workers enrich a copy, so snapshots never see an item change
+                enriched = dict(entry[1])
+                return self._enrich_item(enriched, query_properties, params, projection), enriched
+
+            pipeline = Pipeline(
+                enrich_pending, workers=concurrency if concurrency > 1 else 0, stop=self._stop_requested
+            )
+            with tqdm(total=total_file_items, initial=already_done, desc="Enriching data") as pbar:
+                for (position, original), (enriched, item) in pipeline.run(itertools.chain(pending, stale)):
+                    if enriched or not self._is_enriched(original):
+                        merged_data[position] = item
+                        spill(item)
+                    # else: a failed refresh keeps the stale result for the next run
+
+                    # Update progress
+                    metrics.record_item()
+                    pbar.set_postfix_str(metrics.postfix(), refresh=False)
+                    pbar.update(1)
+                    current_step_count += 1
+
+                    # Snapshot logic: create snapshot every 'snapshot_steps' new items processed
+                    if snapshot_path and current_step_count % snapshot_steps == 0:
+                        snapshot()
+                        metrics.save()
+
+            if pipeline.stopped:
+                if not snapshot_path:
+                    raise self._interrupted("no snapshot_dir was given, so the progress is lost.")
+                snapshot()
+                raise self._interrupted(f"progress saved to {snapshot_path}; run again to resume.")
+
+            # ------------------------------------------------
+            # 5. Retry the items whose request failed
+            # ------------------------------------------------
+            self._retry_failed(
+                [item for item in merged_data if item["_in_file"]], query_properties, params, retry_failed,
+                projection,
+            )
+            for item in merged_data:
+                spill(item)
+
+            # ------------------------------------------------
+            # 6. Final snapshot after the loop, if requested
+            # ------------------------------------------------
+            if snapshot_path:
+                snapshot()
+
+            logger.info("Enrichment process completed.")
+
+            # ------------------------------------------------
+            # 7. Write enriched output file
+            # ------------------------------------------------
+            if shard:
+                # Shard outputs are ordered by input position so they can be merged lazily
+                for item in merged_data:
+                    if not item["_in_file"]:
+                        item[sharding.INDEX_FIELD] = None
+                merged_data.sort(key=sharding._sort_key)
+
+            self._write_output(
+                store.join(merged_data) if store is not None else merged_data,
+                output_file, output_type, chunk_size, flatten_processes, projection,
+                self._parquet_schema(file_path, input_type, output_type),
+            )
+        finally:
+            if store is not None:
+                store.close()
+
+        logger.info("Enriched data written to %s", output_file)
+
+    def _load_merged_data(
+        self,
+        file_path: str,
+        input_type: str,
+        query_properties: Dict[str, str],
+        snapshot_path: Optional[Path],
+        param_hash: str,
+        shard: Optional[tuple] = None,
+        id_column: str = "",
+    ) -> List[dict]:
+        """Load the latest snapshot and the input file and merge them (see :meth:`_merge_data`)."""
         # ------------------------------------------------
         # 1. Load snapshot if available
         # ------------------------------------------------
@@ -258,124 +727,441 @@ class Handelsregister:
         # ------------------------------------------------
         # 2. Load the current file
         # ------------------------------------------------
-        if input_type == "json":
-            with open(file_path, "r", encoding="utf-8") as f:
-                file_data = json.load(f)
-                if not isinstance(file_data, list):
-                    raise ValueError("JSON data must be a list of items for enrichment.")
-        else:
+        if input_type in {"csv", "xlsx"}:
             import pandas as pd
             if input_type == "csv":
                 df = pd.read_csv(file_path)
             else:  # xlsx
-                df = pd.read_excel(file_path)
+                df = formats.read_xlsx(file_path)
             file_data = df.to_dict(orient="records")
+        else:
+            file_data = list(formats.iter_records(file_path, input_type))
 
         logger.debug("Loaded %d items from file '%s'.", len(file_data), file_path)
 
+        if shard:
+            file_data = [
+                item for _, item in self._select_shard(enumerate(file_data), query_properties, shard, id_column)
+            ]
+            logger.debug("Shard %d/%d keeps %d items.", shard[0], shard[1], len(file_data))
+
         # ------------------------------------------------
         # 3. Merge snapshot_data + file_data
         # ------------------------------------------------
         # We'll use a dictionary keyed by a "unique key" derived from query_properties.
-        merged_data = self._merge_data(snapshot_data, file_data, query_properties)
+        return self._merge_data(snapshot_data, file_data, query_properties, id_column)
 
-        logger.debug("Merged dataset size: %d items (includes removed items from snapshots).", len(merged_data))
-
-        # ------------------------------------------------
-        # 4. Only re-process items that are both in the file and not yet enriched
-        # ------------------------------------------------
-        processed_so_far = 0  # number of items that won't need re-processing
-        for item in merged_data:
-            if item.get("_handelsregister_result") is not None:
-                processed_so_far += 1
-
-        logger.debug("Already processed %d items (via snapshots).", processed_so_far)
-
-        # Prepare progress bar
-        total_file_items = sum(1 for x in merged_data if x["_in_file"])  # how many are in the new file
-        already_done = sum(1 for x in merged_data if x["_in_file"] and x.get("_handelsregister_result") is not None)
-
-        logger.info(
-            "Enriching %d new items (file has %d total, %d already enriched).",
-            total_file_items - already_done, total_file_items, already_done
+    def _enrich_stream(
+        self,
+        file_path: str,
+        input_type: str,
+        query_properties: Dict[str, str],
+        snapshot_path: Optional[Path],
+        snapshot_steps: int,
+        params: Dict[str, Any],
+        param_hash: str,
+        output_file: str,
+        output_type: str,
+        chunk_size: int,
+        shard: Optional[tuple] = None,
+        id_column: str = "",
+        projection: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        ordered: bool = True,
+    ):
+        """
+        Streaming variant of :meth:`enrich`.
+
+        Records are read one at a time, enriched and appended to
+        ``output_file``, so only the current record is held in memory. When a
+        snapshot directory is given, a small checkpoint (number of records
+        written and the output byte offset) is stored there every
+        ``snapshot_steps`` records. A later run with the same parameters cuts
+        the output back to the checkpointed offset and skips the records that
+        were already written. Parquet output is written in row groups and
+        XLSX output is assembled on close; neither can be cut back, so they
+        are always rewritten from the start.
+
+        With ``concurrency > 1`` reading, fetching (plus flattening) and
+        writing run as a :class:`Pipeline`: ``concurrency`` worker threads
+        fetch while the input is parsed and the output written, and records
+        are still written in input order unless ``ordered`` is False.
+        """
+        checkpoint_file = self._stream_checkpoint_file(snapshot_path, param_hash, output_type)
+        if checkpoint_file and (formats.STDIO in (file_path, output_file) or not ordered):
+            logger.info("Streams from stdin, to stdout or out of order cannot be resumed; not checkpointing.")
+            checkpoint_file = None
+        checkpoint = formats.read_checkpoint(checkpoint_file) if checkpoint_file else None
+        if checkpoint and (
+            checkpoint.get("input") != str(file_path)
+            or checkpoint.get("output") != str(output_file)
+            or not os.path.exists(output_file)
+        ):
+            logger.info("Ignoring stream checkpoint for a different input or output.")
+            checkpoint = None
+
+        skip = 0
+        if checkpoint:
+            skip = checkpoint["records"]
+            formats.truncate(output_file, checkpoint["offset"])
+            logger.info("Resuming streaming enrichment after %d records.", skip)
+
+        metrics = self._metrics
+
+        def save_checkpoint(records: int) -> None:
+            metrics.save()
+            if checkpoint_file:
+                formats.write_checkpoint(checkpoint_file, {
+                    "input": str(file_path),
+                    "output": str(output_file),
+                    "records": records,
+                    "offset": writer.tell(),
+                })
+
+        flat_output = output_type in ("csv", "xlsx")
+
+        def enrich_record(record: tuple) -> Optional[tuple]:
+            # Runs in the pipeline workers: fetch, then flatten for CSV/XLSX
+            index, item = record
+            if index < skip:
+                return None
+            if not ordered:
+                item[sharding.INDEX_FIELD] = index
+            enriched = self._enrich_item(item, query_properties, params, projection)
+            return enriched, self._output_row(item) if flat_output else item
+
+        pipeline = Pipeline(
+            enrich_record, workers=concurrency if concurrency > 1 else 0, stop=self._stop_requested,
+            ordered=ordered,
         )
+        schema = self._parquet_schema(file_path, input_type, output_type)
+        writer = None
+        written = failed = 0
+        try:
+            records = enumerate(formats.iter_records(file_path, input_type, chunk_size))
+            if shard:
+                records = self._select_shard(records, query_properties, shard, id_column)
+            with tqdm(initial=skip, desc="Enriching data", unit=" items") as pbar:
+                for (index, item), outcome in pipeline.run(records):
+                    if writer is None:
+                        writer = formats.open_writer(
+                            output_file, output_type, item, append=skip > 0,
+                            summary=self._format_flat_result, chunk_size=chunk_size,
+                            projection=projection, schema=schema,
+                        )
+                    if outcome is None:
+                        continue
+
+                    enriched, output = outcome
+                    if not enriched:
+                        failed += 1
+                    writer.write(output)
+
+                    written = index + 1 if ordered else written + 1
+                    metrics.record_item()
+                    pbar.set_postfix_str(metrics.postfix(), refresh=False)
+                    pbar.update(1)
+                    if written % snapshot_steps == 0:
+                        save_checkpoint(written)
+            if writer is None:
+                # Empty input: still leave an (empty) output file behind
+                writer = formats.open_writer(
+                    output_file, output_type, {}, append=skip > 0,
+                    summary=self._format_flat_result, chunk_size=chunk_size,
+                    projection=projection, schema=schema,
+                )
+            save_checkpoint(max(written, skip))
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if failed:
+            logger.warning(
+                "%d items could not be enriched; see their %s field.", failed, formats.ERROR_FIELD
+            )
+        if pipeline.stopped:
+            if not checkpoint_file:
+                raise self._interrupted(
+                    f"{output_file} holds {written} records, but without a snapshot_dir "
+                    f"(or with {output_type} output) the run cannot be resumed."
+                )
+            raise self._interrupted(f"checkpoint saved to {checkpoint_file}; run again to resume.")
 
-        current_step_count = 0  # track how many new items we've processed since last snapshot
-        with tqdm(total=total_file_items, initial=already_done, desc="Enriching data") as pbar:
-            for item in merged_data:
-                # Only enrich if item is in the file and not enriched
-                if not item["_in_file"]:
-                    # It's an old item removed from the current file, keep but skip re-processing
-                    continue
-                if "_handelsregister_result" in item and item["_handelsregister_result"] is not None:
-                    # Already enriched from snapshot
-                    continue
-
-                # Build q parameter from query_properties
-                q_string = self._build_q_string(item, query_properties)
-                if not q_string:
-                    logger.debug("Skipping item because q-string is empty: %s", item)
-                    item["_handelsregister_result"] = None
-                else:
-                    # Call the API
-                    logger.debug("Enriching new item with q=%s", q_string)
-                    api_response = self.fetch_organization(q=q_string, **params)
-                    item["_handelsregister_result"] = api_response
-
-                # Update progress
-                pbar.update(1)
-                current_step_count += 1
-
-                # Snapshot logic: create snapshot every 'snapshot_steps' new items processed
-                if snapshot_path and current_step_count % snapshot_steps == 0:
-                    self._create_snapshot(
-                        merged_data, snapshot_path, snapshots, param_hash
-                    )
-
-        # ------------------------------------------------
-        # 5. Final snapshot after the loop, if requested
-        # ------------------------------------------------
-        if snapshot_path:
-            self._create_snapshot(merged_data, snapshot_path, snapshots, param_hash)
+        logger.info("Enriched data written to %s", output_file)
 
-        logger.info("Enrichment process completed.")
+    def _enrich_queue(
+        self,
+        file_path: str,
+        input_type: str,
+        query_properties: Dict[str, str],
+        params: Dict[str, Any],
+        param_hash: str,
+        output_file: str,
+        output_type: str,
+        chunk_size: int,
+        queue_path: str,
+        worker_id: str,
+        lease_timeout: float,
+        retry_failed: int = 1,
+        projection: Optional[Dict[str, Any]] = None,
+        flatten_processes: int = 0,
+    ):
+        """
+        Work-queue variant of :meth:`enrich`.
+
+        The first worker to open the queue loads the input file into it. Every
+        worker then repeatedly leases a small batch of items, enriches them and
+        stores the results in the queue. When no pending items are left the
+        worker waits for the leases of the other workers; leases of crashed
+        workers expire after ``lease_timeout`` and are picked up again. The
+        worker that observes the drained queue first writes the output file;
+        if it fails, the next worker to run on the drained queue writes it
+        instead (see :meth:`WorkQueue.claim_finalize`).
+        """
+        source = f"{Path(file_path).resolve()}|{param_hash}"
+        batch_size = 10
+        processed = 0
+        metrics = self._metrics
+
+        with WorkQueue(queue_path, lease_timeout=lease_timeout, worker_id=worker_id or None) as queue:
+            queue.populate(formats.iter_records(file_path, input_type, chunk_size), source)
+            counts = queue.counts()
+            total = sum(counts.values())
+            metrics.total_items = total - counts["done"]
+            logger.info(
+                "Worker %s joined queue %s (%d items, %d done).",
+                queue.worker_id, queue_path, total, counts["done"]
+            )
 
-        # ------------------------------------------------
-        # 6. Write enriched output file
-        # ------------------------------------------------
-        if not output_file:
-            in_path = Path(file_path)
-            suffix_map = {"json": ".json", "csv": ".csv", "xlsx": ".xlsx"}
-            out_suffix = suffix_map.get(output_type, in_path.suffix)
-            output_name = f"{in_path.stem}_handelsregister_ai_enriched{out_suffix}"
-            output_file = str(in_path.with_name(output_name))
+            with tqdm(total=total, initial=counts["done"], desc="Enriching data") as pbar:
+                while not self._stop_requested.is_set():
+                    batch = queue.lease(batch_size)
+                    if not batch:
+                        if queue.is_drained():
+                            break
+                        queue.wait()
+                        pbar.n = queue.counts()["done"]
+                        pbar.refresh()
+                        continue
+
+                    remaining = dict(batch)
+                    try:
+                        for position, item in batch:
+                            if self._stop_requested.is_set():
+                                break
+                            self._enrich_item(item, query_properties, params, projection)
+                            queue.complete(position, item)
+                            del remaining[position]
+                            processed += 1
+                            metrics.record_item()
+                            pbar.set_postfix_str(metrics.postfix(), refresh=False)
+                            pbar.update(1)
+                        metrics.save()
+                    finally:
+                        # Hand unfinished items straight back instead of waiting for the lease to expire
+                        for position in remaining:
+                            queue.release(position)
+
+            logger.info("Worker %s enriched %d items.", queue.worker_id, processed)
+            if self._stop_requested.is_set():
+                raise self._interrupted(f"leased items were returned to {queue_path}; run again to resume.")
+
+            if queue.claim_finalize():
+                try:
+                    failed = [
+                        (position, item) for position, item in queue.iter_results(with_positions=True)
+                        if item.get(formats.ERROR_FIELD)
+                    ]
+                    self._retry_failed(
+                        [item for _, item in failed], query_properties, params, retry_failed, projection
+                    )
+                    for position, item in failed:
+                        queue.complete(position, item)
+                    self._write_output(
+                        queue.iter_results(), output_file, output_type, chunk_size, flatten_processes,
+                        projection, self._parquet_schema(file_path, input_type, output_type),
+                    )
+                except BaseException:
+                    # Let the next worker (or a rerun) write the output
+                    queue.release_finalize()
+                    raise
+                queue.finish_finalize()
+                logger.info("Enriched data written to %s", output_file)
+            else:
+                logger.info("Queue is drained; the output is written by another worker.")
 
-        if output_type == "json":
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(merged_data, f, ensure_ascii=False, indent=2)
+    def plan_enrichment(
+        self,
+        file_path: str,
+        input_type: str = "json",
+        query_properties: Dict[str, str] = None,
+        snapshot_dir: str = "",
+        params: Dict[str, Any] = None,
+        output_type: str = "",
+        stream: bool = False,
+        chunk_size: int = 1000,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        concurrency: int = 1,
+        latency: Optional[float] = None,
+        report_file: str = "",
+        id_column: str = "",
+        fields: Optional[List[str]] = None,
+        max_age: Union[float, timedelta, None] = None,
+        max_refresh: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Estimate what :meth:`enrich` would do, without calling the API.
+
+        The input is loaded and merged with the latest snapshot (or, in
+        streaming mode, the checkpoint is honoured) exactly like a real run,
+        the q strings are built and checked against the client cache.
+
+        :param concurrency: Number of requests assumed to run in parallel.
+        :param latency: Assumed duration of one API request in seconds. By
+                        default the median latency of the previous run report
+                        is used, or ``DEFAULT_REQUEST_LATENCY`` without one.
+        :param report_file: Run report to take the latency from; defaults to
+                            the report in the snapshot directory.
+        :return: A dict with the counts ``total_items``, ``already_enriched``,
+                 ``stale`` (items due for a refresh, see ``max_age``),
+                 ``empty_query``, ``cached``, ``duplicates`` and ``new_calls``,
+                 the ``avg_credit_cost`` seen in past responses (None if there
+                 are none), ``estimated_credits`` and ``estimated_seconds``.
+        """
+        input_type = input_type.lower()
+        output_type = (output_type or input_type).lower()
+        query_properties = query_properties or {}
+        params = params or {}
+        sharding.validate_shard(shard_index, shard_count)
+        shard = (shard_index, shard_count) if shard_count > 1 else None
+        param_hash = self._params_hash(params, fields)
+        snapshot_path = self._snapshot_path(snapshot_dir, shard)
+        if snapshot_path and not snapshot_path.is_dir():
+            snapshot_path = None
+
+        if latency is None:
+            report_path = report_file or (
+                snapshot_path / f"run_report_{param_hash}.json" if snapshot_path else None
+            )
+            report = read_report(report_path) if report_path else None
+            latency = (report or {}).get("latency_p50") or DEFAULT_REQUEST_LATENCY
+
+        past_results = [r for r in self._cache.values() if isinstance(r, dict)]
+        if stream:
+            checkpoint_file = None
+            if file_path != formats.STDIO:
+                checkpoint_file = self._stream_checkpoint_file(snapshot_path, param_hash, output_type)
+            checkpoint = formats.read_checkpoint(checkpoint_file) if checkpoint_file else None
+            skip = checkpoint["records"] if checkpoint else 0
+            records = enumerate(formats.iter_records(file_path, input_type, chunk_size))
+            if shard:
+                records = self._select_shard(records, query_properties, shard, id_column)
+            total = done = 0
+
+            def records_after_checkpoint():
+                # Counted while iterating so the input is read only once
+                nonlocal total, done
+                for position, record in records:
+                    total += 1
+                    if position < skip:
+                        done += 1
+                    else:
+                        yield record
+
+            pending = records_after_checkpoint()
+            stale = []
         else:
-            import pandas as pd
-            for item in merged_data:
-                flat = self._flatten_result(item.get("_handelsregister_result"))
-                for k, v in flat.items():
-                    item[f"hr_{k}"] = v
-            df = pd.DataFrame(merged_data)
-            df["_handelsregister_summary"] = df["_handelsregister_result"].apply(self._format_flat_result)
-            df = df.drop(columns=["_handelsregister_result", "_in_file"], errors="ignore")
-            if output_type == "csv":
-                df.to_csv(output_file, index=False)
+            merged_data = self._load_merged_data(
+                file_path, input_type, query_properties, snapshot_path, param_hash, shard, id_column
+            )
+            in_file = [item for item in merged_data if item["_in_file"]]
+            past_results.extend(
+                item["_handelsregister_result"] for item in merged_data
+                if isinstance(item.get("_handelsregister_result"), dict)
+            )
+            refs = [item[SPILL_FIELD] for item in merged_data if SPILL_FIELD in item]
+            if refs:
+                # Results of a spilling run are only referenced by the snapshot
+                store = self._open_result_store(snapshot_path, param_hash, False)
+                if store is not None:
+                    with store:
+                        for ref in refs:
+                            result = store.get(ref)
+                            if isinstance(result, dict):
+                                # Only the meta, so the results are not all held in memory
+                                past_results.append({"meta": result.get("meta")})
+            stale = [item for _, item in self._stale_items(merged_data, max_age, max_refresh)]
+            pending = [item for item in in_file if not self._is_enriched(item)] + stale
+            total = len(in_file)
+            done = total - len(pending)
+
+        fetch_params = dict(params)
+        features = fetch_params.pop("features", None)
+        ai_search = fetch_params.pop("ai_search", None)
+        empty = cached = duplicates = new_calls = 0
+        seen = set()
+        for item in pending:
+            q_string = self._build_q_string(item, query_properties)
+            if not q_string:
+                empty += 1
+                continue
+            cache_key = self._cache_key(q_string, features, ai_search, fetch_params)
+            if self.cache_enabled and cache_key in self._cache:
+                cached += 1
+            elif self.cache_enabled and cache_key in seen:
+                duplicates += 1
             else:
-                df.to_excel(output_file, index=False)
-
-        logger.info("Enriched data written to %s", output_file)
+                seen.add(cache_key)
+                new_calls += 1
+
+        costs = [
+            float(r["meta"]["request_credit_cost"]) for r in past_results
+            if isinstance(r.get("meta"), dict) and r["meta"].get("request_credit_cost") is not None
+        ]
+        avg_cost = sum(costs) / len(costs) if costs else None
+        seconds_per_call = max(latency / max(concurrency, 1), self.rate_limit)
+
+        return {
+            "total_items": total,
+            "already_enriched": done,
+            "stale": len(stale),
+            "empty_query": empty,
+            "cached": cached,
+            "duplicates": duplicates,
+            "new_calls": new_calls,
+            "avg_credit_cost": avg_cost,
+            "estimated_credits": avg_cost * new_calls if avg_cost is not None else None,
+            "estimated_seconds": new_calls * seconds_per_call,
+        }
 
     def enrich_dataframe(
         self,
         df,
         query_properties: Dict[str, str] = None,
         params: Dict[str, Any] = None,
+        max_workers: int = 1,
+        normalize: bool = False,
+        fields: Optional[List[str]] = None,
     ):
-        """Enrich a pandas DataFrame with Handelsregister.ai results."""
+        """
+        Enrich a pandas DataFrame with Handelsregister.ai results.
+
+        The q strings are built column-wise with pandas string operations.
+        Every distinct q is fetched only once, and the results are mapped back
+        onto all rows that share it.
+
+        :param df: DataFrame with the input rows; it is not modified.
+        :param query_properties: Dict describing which columns are combined to form 'q'.
+        :param params: Additional parameters for fetch_organization (e.g. features, ai_search).
+        :param max_workers: Number of requests sent concurrently. ``rate_limit``
+                            still applies across all threads.
+        :param normalize: Replace the ``_handelsregister_result`` column of
+                          raw dicts by the typed ``hr_*`` columns of
+                          :func:`formats.result_columns`.
+        :param fields: Dotted paths of the result fields to keep (see :meth:`enrich`).
+        :return: A copy of ``df`` with the results; rows with an empty q get None.
+        """
         import pandas as pd
 
         if query_properties is None:
@@ -383,18 +1169,64 @@ class Handelsregister:
         if params is None:
             params = {}
 
-        records = df.to_dict(orient="records")
-        enriched = []
-        for record in records:
-            q_string = self._build_q_string(record, query_properties)
-            if q_string:
-                result = self.fetch_organization(q=q_string, **params)
-            else:
-                result = None
-            record["_handelsregister_result"] = result
-            enriched.append(record)
+        q = self._build_q_series(df, query_properties)
+        unique_q = [value for value in pd.unique(q) if value]
+        logger.debug("Enriching %d rows with %d distinct queries.", len(df), len(unique_q))
+
+        projection = self._projection(fields)
+
+        def fetch(q_string: str) -> Dict[str, Any]:
+            return formats.project(self.fetch_organization(q=q_string, **params), projection)
+
+        if max_workers > 1 and len(unique_q) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            futures = [executor.submit(fetch, q_string) for q_string in unique_q]
+            try:
+                results = {q_string: future.result() for q_string, future in zip(unique_q, futures)}
+            finally:
+                # Do not keep sending requests after the first failure
+                # (shutdown(cancel_futures=True) needs Python 3.9)
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=True)
+        else:
+            results = {q_string: fetch(q_string) for q_string in unique_q}
+
+        enriched = df.copy()
+        if not normalize:
+            column = q.map(results)
+            enriched["_handelsregister_result"] = column.astype(object).where(column.notna(), None)
+            return enriched
+
+        columns = pd.DataFrame.from_dict(
+            {q_string: formats.result_columns(result) for q_string, result in results.items()},
+            orient="index",
+            columns=formats.result_columns(None).keys(),
+        )
+        columns = columns.reindex(q.to_numpy()).set_axis(df.index)
+        return pd.concat([enriched, columns], axis=1)
+
+    def _build_q_series(self, df, query_properties: Dict[str, str]):
+        """
+        Vectorized :meth:`_build_q_string`: the stripped, non-empty values of
+        the ``query_properties`` columns joined by spaces, one q per row.
+        Missing values (None/NaN) and missing columns are skipped.
+        """
+        import pandas as pd
 
-        return pd.DataFrame(enriched)
+        q = pd.Series("", index=df.index, dtype=object)
+        for field_key in query_properties.values():
+            if field_key not in df.columns:
+                continue
+            column = df[field_key]
+            # object like q: pandas 3 cannot add its str dtype to object (e.g. in an empty frame)
+            part = column.astype(str).str.strip().where(column.notna(), "").astype(object)
+            both = (q != "") & (part != "")
+            # Plain concatenation is correct whenever one side is empty
+            q = (q + " " + part).where(both, q + part)
+        return q
 
     def fetch_document(
         self,
@@ -501,189 +1333,271 @@ class Handelsregister:
     # Helper Methods
     # -------------------------------------------------------------------
 
+    def _store_in_cache(self, cache_key: tuple, data: Dict[str, Any]) -> None:
+        """Insert a response into the cache, evicting the oldest entries if full."""
+        with self._cache_lock:
+            self._cache[cache_key] = data
+            if self.cache_size is not None:
+                self._cache.move_to_end(cache_key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    def _enrich_item(
+        self,
+        item: dict,
+        query_properties: Dict[str, str],
+        params: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Fetch the result for a single item and store it under ``_handelsregister_result``,
+        reduced to ``projection`` (see :func:`formats.field_tree`) if given.
+
+        A successful fetch is timestamped under ``_handelsregister_fetched_at``
+        (see ``max_age`` of :meth:`enrich`). A failed request does not abort
+        the run: the result stays None and the error (class name, message and
+        number of failed attempts) is stored under ``_handelsregister_error``.
+        Authentication errors are raised, since no other item can succeed
+        either.
+
+        :return: False if the item could not be enriched.
+        """
+        # Build q parameter from query_properties
+        q_string = self._build_q_string(item, query_properties)
+        if not q_string:
+            logger.debug("Skipping item because q-string is empty: %s", item)
+            item["_handelsregister_result"] = None
+            item.pop(formats.ERROR_FIELD, None)
+            return True
+
+        # Call the API
+        logger.debug("Enriching new item with q=%s", q_string)
+        try:
+            item["_handelsregister_result"] = formats.project(
+                self.fetch_organization(q=q_string, **params), projection
+            )
+        except AuthenticationError:
+            raise
+        except HandelsregisterError as exc:
+            previous = item.get(formats.ERROR_FIELD)
+            attempts = previous.get("attempts", 0) if isinstance(previous, dict) else 0
+            logger.warning("Could not enrich item with q=%s: %s", q_string, exc)
+            item["_handelsregister_result"] = None
+            item[formats.ERROR_FIELD] = {
+                "type": type(exc).__name__,
+                "message": str(exc),
+                "attempts": attempts + 1,
+            }
+            return False
+        item.pop(formats.ERROR_FIELD, None)
+        item[formats.FETCHED_AT_FIELD] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        return True
+
+    def _retry_failed(
+        self,
+        items: List[dict],
+        query_properties: Dict[str, str],
+        params: Dict[str, Any],
+        passes: int,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[dict]:
+        """
+        Re-run the failed ``items`` up to ``passes`` times.
+
+        :return: The items that still failed after the last pass.
+        """
+        failed = [item for item in items if item.get(formats.ERROR_FIELD)]
+        for retry_pass in range(passes):
+            if not failed:
+                break
+            logger.info("Retry pass %d/%d over %d failed items.", retry_pass + 1, passes, len(failed))
+            still_failed = []
+            for item in failed:
+                # After a stop request the remaining items are left for the next run
+                if self._stop_requested.is_set() or not self._enrich_item(
+                    item, query_properties, params, projection
+                ):
+                    still_failed.append(item)
+            failed = still_failed
+        if failed:
+            logger.warning(
+                "%d items could not be enriched; see their %s field.", len(failed), formats.ERROR_FIELD
+            )
+        return failed
+
+    def _output_row(self, item: dict) -> Dict[str, Any]:
+        """Build a flat CSV/XLSX output row for an enriched item."""
+        return flatten.output_row(item)
+
+    def _write_output(
+        self,
+        items: Iterable[dict],
+        output_file: str,
+        output_type: str,
+        chunk_size: int = 1000,
+        flatten_processes: int = 0,
+        projection: Optional[Dict[str, Any]] = None,
+        schema=None,
+    ) -> None:
+        """
+        Write enriched items to ``output_file``.
+
+        A list of items is written as a whole. Any other iterable is consumed
+        one item at a time; the column layout of CSV, XLSX and Parquet output
+        is then taken from the first item. ``flatten_processes`` is passed to
+        :func:`flatten.iter_output_rows` for CSV and XLSX. XLSX sheets that
+        reach Excel's row limit are continued on a new sheet. ``schema`` types
+        input fields of Parquet output (see :meth:`_parquet_schema`).
+        """
+        if output_type == "jsonl":
+            with formats.JSONLWriter(output_file) as writer:
+                for item in items:
+                    writer.write(item)
+            return
+
+        if output_type == "json":
+            if isinstance(items, list):
+                with open(output_file, "w", encoding="utf-8") as f:
+                    json.dump(items, f, ensure_ascii=False, indent=2)
+            else:
+                formats.write_json_array(output_file, items)
+            return
+
+        materialized = isinstance(items, list)
+        if materialized:
+            layout = dict.fromkeys(k for item in items for k in item)
+        else:
+            items = iter(items)
+            first = next(items, None)
+            layout = first or {}
+            items = itertools.chain([first] if first is not None else [], items)
+
+        if output_type == "parquet":
+            with formats.ParquetWriter(
+                output_file, list(layout), self._format_flat_result, chunk_size, schema
+            ) as writer:
+                for item in items:
+                    writer.write(item)
+            return
+
+        # One layout for every flat output, so CSV and XLSX get the same columns
+        columns = formats.flat_columns(layout, projection)
+        rows = flatten.iter_output_rows(items, processes=flatten_processes)
+        if output_type == "xlsx":
+            with formats.XLSXWriter(output_file, columns) as writer:
+                for row in rows:
+                    writer.write(row)
+        elif materialized:
+            import pandas as pd
+            pd.DataFrame(list(rows), columns=columns).to_csv(output_file, index=False)
+        else:
+            with formats.CSVWriter(output_file, columns) as writer:
+                for row in rows:
+                    writer.write(row)
+
+    def _snapshot_path(self, snapshot_dir: str, shard: Optional[tuple] = None) -> Optional[Path]:
+        """Snapshot directory of a run; every shard keeps its own history."""
+        if not snapshot_dir:
+            return None
+        snapshot_path = Path(snapshot_dir)
+        if shard:
+            snapshot_path = snapshot_path / sharding.shard_suffix(*shard)
+        return snapshot_path
+
+    def _parquet_schema(self, file_path: str, input_type: str, output_type: str):
+        """
+        Arrow types of the input fields that Parquet output keeps: the input
+        position of sharded and unordered runs, and the numeric, boolean and
+        string columns of a Parquet input (those survive snapshots and the
+        queue unchanged). All other input fields are written as strings.
+        """
+        if output_type != "parquet":
+            return None
+        pa = formats._require_pyarrow()
+        fields = [pa.field(sharding.INDEX_FIELD, pa.int64())]
+        if input_type == "parquet" and file_path != formats.STDIO:
+            for field in pa.parquet.read_schema(file_path):
+                kind = field.type
+                if field.name != sharding.INDEX_FIELD and (
+                    pa.types.is_integer(kind) or pa.types.is_floating(kind)
+                    or pa.types.is_boolean(kind) or pa.types.is_string(kind)
+                ):
+                    fields.append(field)
+        return pa.schema(fields)
+
+    def _stream_checkpoint_file(
+        self, snapshot_path: Optional[Path], param_hash: str, output_type: str
+    ) -> Optional[Path]:
+        """Checkpoint file of a streaming run, if its output can be resumed."""
+        if not snapshot_path or output_type not in formats.RESUMABLE_OUTPUT_TYPES:
+            return None
+        return snapshot_path / f"stream_{param_hash}.json"
+
+    def _default_output_file(self, file_path: str, output_type: str, shard: Optional[tuple] = None) -> str:
+        """Derive the output path ``<stem>_handelsregister_ai_enriched[_shardXofN].<ext>``."""
+        in_path = Path(file_path)
+        out_suffix = formats.SUFFIXES.get(output_type, in_path.suffix)
+        output_name = f"{in_path.stem}_handelsregister_ai_enriched"
+        if shard:
+            output_name += f"_{sharding.shard_suffix(*shard)}"
+        return str(in_path.with_name(output_name + out_suffix))
+
+    def _select_shard(self, records, query_properties: Dict[str, str], shard: tuple, id_column: str = ""):
+        """
+        Filter ``(position, record)`` pairs down to the records that belong to
+        ``shard`` (an ``(index, count)`` pair) and tag each with its position
+        in the input as ``_input_index``.
+        """
+        shard_index, shard_count = shard
+        for position, record in records:
+            key = self._shard_key(record, query_properties, id_column)
+            if sharding.shard_of(key, shard_count) != shard_index:
+                continue
+            record[sharding.INDEX_FIELD] = position
+            yield position, record
+
+    def _shard_key(self, item: dict, query_properties: Dict[str, str], id_column: str = "") -> Any:
+        """Stable, process-independent key used to assign an item to a shard."""
+        key = self._build_key(item, query_properties, id_column)
+        return list(key) if isinstance(key, tuple) else key
+
     def _format_flat_result(self, result: Any) -> str:
         """Create a short string summary from an API result."""
-        if not isinstance(result, dict):
-            return ""
-
-        parts = []
-        name = result.get("name")
-        if name:
-            parts.append(name)
-
-        status = result.get("status")
-        if status:
-            parts.append(f"Status: {status}")
-
-        reg = result.get("registration", {})
-        reg_no = reg.get("register_number")
-        court = reg.get("court")
-        reg_parts = []
-        if court:
-            reg_parts.append(court)
-        if reg_no:
-            reg_parts.append(str(reg_no))
-        if reg_parts:
-            parts.append("Reg: " + " ".join(reg_parts))
-
-        addr = result.get("address", {})
-        addr_components = []
-        street = addr.get("street")
-        house_no = addr.get("house_number")
-        if street or house_no:
-            addr_components.append(" ".join(filter(None, [street, str(house_no) if house_no else None])).strip())
-        pc = addr.get("postal_code")
-        city = addr.get("city")
-        if pc or city:
-            addr_components.append(" ".join(filter(None, [str(pc) if pc else None, city])).strip())
-        country = addr.get("country") or addr.get("country_code")
-        if country:
-            addr_components.append(str(country))
-        if addr_components:
-            parts.append(", ".join(addr_components))
-
-        return " | ".join(parts)
+        return flatten.format_summary(result)
 
     def _flatten_account(self, account: Any, prefix: str = "") -> List[str]:
         """Flatten a single account structure to lines."""
-        if isinstance(account, dict) and "name" in account:
-            name_dict = account.get("name", {})
-            name = name_dict.get("de") or name_dict.get("en") or name_dict.get("in_report", "")
-            value = account.get("value")
-            line = f"{prefix}{name}: {value}" if value is not None else f"{prefix}{name}"
-            lines = [line]
-            for child in account.get("children", []):
-                lines.extend(self._flatten_account(child, prefix + "> "))
-            return lines
-        elif isinstance(account, dict):
-            lines = []
-            for k, v in account.items():
-                if isinstance(v, (dict, list)):
-                    lines.extend(self._flatten_account(v, prefix + f"{k} > "))
-                else:
-                    lines.append(f"{prefix}{k}: {v}")
-            return lines
-        elif isinstance(account, list):
-            lines = []
-            for item in account:
-                lines.extend(self._flatten_account(item, prefix))
-            return lines
-        else:
-            return [f"{prefix}{account}"]
+        return flatten.account_lines(account, prefix)
 
     def _flatten_result(self, result: Any) -> Dict[str, Any]:
         """Flatten a full API result into human readable strings."""
-        if not isinstance(result, dict):
-            return {}
-
-        flat: Dict[str, Any] = {}
-
-        simple_keys = ["name", "status", "legal_form", "registration_date", "purpose"]
-        for key in simple_keys:
-            if key in result:
-                flat[key] = result.get(key)
-
-        reg = result.get("registration", {})
-        if reg:
-            reg_parts = [reg.get("court"), reg.get("register_type"), reg.get("register_number")]
-            flat["registration"] = " ".join(str(p) for p in reg_parts if p)
-
-        addr = result.get("address", {})
-        if addr:
-            addr_parts = []
-            if addr.get("street") or addr.get("house_number"):
-                addr_parts.append(" ".join(filter(None, [addr.get("street"), str(addr.get("house_number"))])).strip())
-            if addr.get("postal_code") or addr.get("city"):
-                addr_parts.append(" ".join(filter(None, [str(addr.get("postal_code")), addr.get("city")])).strip())
-            if addr.get("country"):
-                addr_parts.append(addr.get("country"))
-            flat["address"] = ", ".join(addr_parts)
-
-        contact = result.get("contact_data", {})
-        if contact:
-            c_parts = []
-            if contact.get("website"):
-                c_parts.append(contact.get("website"))
-            if contact.get("phone_number"):
-                c_parts.append(contact.get("phone_number"))
-            if contact.get("email"):
-                c_parts.append(contact.get("email"))
-            flat["contact_data"] = " | ".join(c_parts)
-
-        if result.get("keywords"):
-            flat["keywords"] = ", ".join(result["keywords"])
-        if result.get("products_and_services"):
-            flat["products_and_services"] = ", ".join(result["products_and_services"])
-
-        kpis = result.get("financial_kpi")
-        if kpis:
-            kp_parts = []
-            for entry in kpis:
-                year = entry.get("year")
-                metrics = [f"{k}: {v}" for k, v in entry.items() if k != "year" and v is not None]
-                kp_parts.append(f"{year}: " + ", ".join(metrics))
-            flat["financial_kpi"] = " | ".join(kp_parts)
-
-        pla = result.get("profit_and_loss_account")
-        if pla:
-            pla_parts = []
-            for entry in pla:
-                year = entry.get("year")
-                accounts_field = entry.get("profit_and_loss_accounts")
-                accounts = []
-                if isinstance(accounts_field, list):
-                    for acc in accounts_field:
-                        accounts.extend(self._flatten_account(acc))
-                elif accounts_field is not None:
-                    accounts.extend(self._flatten_account(accounts_field))
-                else:
-                    for k, v in entry.items():
-                        if k != "year":
-                            accounts.append(f"{k}: {v}")
-                pla_parts.append(f"{year}: " + "; ".join(accounts))
-            flat["profit_and_loss_account"] = " | ".join(pla_parts)
-
-        bsa = result.get("balance_sheet_accounts")
-        if bsa:
-            bs_parts = []
-            for entry in bsa:
-                year = entry.get("year")
-                accounts_field = entry.get("balance_sheet_accounts")
-                accounts = []
-                if isinstance(accounts_field, list):
-                    for acc in accounts_field:
-                        accounts.extend(self._flatten_account(acc))
-                elif accounts_field is not None:
-                    accounts.extend(self._flatten_account(accounts_field))
-                else:
-                    for k, v in entry.items():
-                        if k != "year":
-                            accounts.append(f"{k}: {v}")
-                bs_parts.append(f"{year}: " + "; ".join(accounts))
-            flat["balance_sheet_accounts"] = " | ".join(bs_parts)
-
-        history = result.get("history")
-        if history:
-            hist_parts = []
-            for h in history:
-                name = (h.get("name", {}).get("en") or h.get("name", {}).get("de") or "").strip()
-                start = h.get("start_date", "")
-                desc = (h.get("description", {}).get("short", {}).get("en") or h.get("description", {}).get("short", {}).get("de") or "").strip()
-                parts = [p for p in [name, desc, start] if p]
-                hist_parts.append(" - ".join(parts))
-            flat["history"] = " || ".join(hist_parts)
-
-        return flat
+        return flatten.flatten_result(result)
+
+    def _cache_key(
+        self,
+        q: str,
+        features: Optional[List[str]],
+        ai_search: Optional[str],
+        kwargs: Dict[str, Any],
+    ) -> tuple:
+        """Key under which a fetch_organization response is cached."""
+        return (
+            q,
+            tuple(sorted(features)) if features else (),
+            ai_search,
+            tuple(sorted(kwargs.items())),
+        )
 
     def _build_q_string(self, item: dict, query_properties: Dict[str, str]) -> str:
         """
         Given a single item and the query_properties mapping,
         build the 'q' string (space-separated combination of fields).
+        Missing values (None/NaN) are skipped.
         """
         parts = []
         for field_key in query_properties.values():
             raw_val = item.get(field_key)
-            if raw_val is None:
+            if raw_val is None or raw_val != raw_val:  # NaN from pandas is missing, not "nan"
                 continue
             val = str(raw_val).strip()
             if val:
@@ -694,98 +1608,177 @@ class Handelsregister:
         self,
         snapshot_data: List[dict],
         file_data: List[dict],
-        query_properties: Dict[str, str]
+        query_properties: Dict[str, str],
+        id_column: str = "",
     ) -> List[dict]:
         """
         Merge existing snapshot items with new file items, preserving:
           - Any items that were in the snapshot (even if removed from file).
           - Overwriting or adding items from the new file.
           - Retaining already-enriched data whenever possible.
-        
-        We identify items by a "key" built from query_properties.
-        If query_properties is empty, we treat all items as distinct, 
-        which can lead to duplicates unless the user manages IDs or fields.
+
+        Items are identified by :meth:`_build_key`, which is computed exactly
+        once per item. Records of the file that share a key are merged into
+        one item.
 
         Items get a boolean `_in_file` indicating if they are in the new file.
+        The result lists the snapshot items in their original order, followed
+        by the items that only exist in the file.
         """
-
-        # Build a dict keyed by item "signature"
+        # Dicts keep insertion order, so overwriting a key keeps its position
         merged_dict = {}
 
-        # 1. Insert snapshot items
         for snap_item in snapshot_data:
-            key = self._build_key(snap_item, query_properties)
-            merged_dict[key] = snap_item
+            snap_item["_in_file"] = False
+            merged_dict[self._build_key(snap_item, query_properties, id_column)] = snap_item
 
-        # 2. Incorporate file items
-        #    - If key already exists, update with new fields from file but keep _handelsregister_result if present
-        #    - If key doesn't exist, add it
-        #    - Mark items as "_in_file": True
         for file_item in file_data:
-            key = self._build_key(file_item, query_properties)
-            if key in merged_dict:
-                existing = merged_dict[key]
-                enriched_result = existing.get("_handelsregister_result")
-                # Overwrite with the new file item
-                merged_dict[key] = file_item
+            key = self._build_key(file_item, query_properties, id_column)
+            existing = merged_dict.get(key)
+            if existing is not None:
                 # Preserve the old result if it existed
+                enriched_result = existing.get("_handelsregister_result")
                 if enriched_result is not None:
-                    merged_dict[key]["_handelsregister_result"] = enriched_result
-            else:
-                merged_dict[key] = file_item
-
-            merged_dict[key]["_in_file"] = True
+                    file_item["_handelsregister_result"] = enriched_result
+                for field in (SPILL_FIELD, formats.FETCHED_AT_FIELD):
+                    if field in existing:
+                        file_item[field] = existing[field]
+                if not self._is_enriched(existing) and formats.ERROR_FIELD in existing:
+                    # Keep counting the failed attempts across runs
+                    file_item[formats.ERROR_FIELD] = existing[formats.ERROR_FIELD]
+            file_item["_in_file"] = True
+            merged_dict[key] = file_item
+
+        return list(merged_dict.values())
+
+    def _is_enriched(self, item: dict) -> bool:
+        """True if the item has a result, in memory or spilled to a :class:`ResultStore`."""
+        return item.get("_handelsregister_result") is not None or SPILL_FIELD in item
+
+    def _stale_items(
+        self,
+        items: List[dict],
+        max_age: Union[float, timedelta, None],
+        max_refresh: Optional[int] = None,
+    ) -> List[tuple]:
+        """
+        Select the enriched items in the file whose result is older than ``max_age``.
 
-        # 3. For any items leftover from the snapshot that aren't in the new file, keep them but mark _in_file=False
-        for key, item in merged_dict.items():
-            if "_in_file" not in item:
-                item["_in_file"] = False
+        Items without (or with an unreadable) fetch timestamp count as the
+        oldest. At most ``max_refresh`` items are returned.
 
-        # 4. Convert merged_dict back to a list in a stable order
-        #    The final list order will be:
-        #       - snapshot_data items (original order),
-        #       - plus any new items from file_data
-        #       - plus anything leftover not in either (unlikely in typical usage).
-        final_list = []
-        used_keys = set()
+        :param max_age: A ``timedelta`` or a number of seconds.
+        :return: ``(position, item)`` pairs, oldest first.
+        """
+        if max_age is None:
+            return []
+        if not isinstance(max_age, timedelta):
+            max_age = timedelta(seconds=max_age)
+        cutoff = datetime.now(timezone.utc) - max_age
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+
+        stale = []
+        for position, item in enumerate(items):
+            if not item["_in_file"] or not self._is_enriched(item):
+                continue
+            try:
+                fetched_at = datetime.fromisoformat(item[formats.FETCHED_AT_FIELD])
+            except (KeyError, TypeError, ValueError):
+                fetched_at = oldest
+            if fetched_at.tzinfo is None:
+                fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+            if fetched_at < cutoff:
+                stale.append((fetched_at, position, item))
+        stale.sort(key=lambda entry: (entry[0], entry[1]))
+        if max_refresh is not None:
+            stale = stale[:max_refresh]
+        return [(position, item) for _, position, item in stale]
+
+    def _result_ref(self, item: dict, query_properties: Dict[str, str], id_column: str = "") -> str:
+        """Reference of an item's spilled result: its :meth:`_build_key`, as JSON."""
+        return _KEY_ENCODER.encode(self._build_key(item, query_properties, id_column))
+
+    def _open_result_store(
+        self, snapshot_path: Optional[Path], param_hash: str, spill_results: bool
+    ) -> Optional[ResultStore]:
+        """
+        Open the result store of a run.
 
-        # Add items from the snapshot_data in original order if present in merged_dict
-        for snap_item in snapshot_data:
-            key = self._build_key(snap_item, query_properties)
-            if key in merged_dict and key not in used_keys:
-                final_list.append(merged_dict[key])
-                used_keys.add(key)
+        Spilling runs with a snapshot directory keep their store next to the
+        snapshots, so the references in the snapshots stay valid across runs;
+        without one a temporary store is used. A run that does not spill
+        still opens an existing store to take the spilled results back.
+        """
+        path = snapshot_path / f"results_{param_hash}.sqlite" if snapshot_path else None
+        if spill_results:
+            return ResultStore(str(path) if path else None)
+        if path and path.exists():
+            return ResultStore(str(path))
+        return None
+
+    def _reconcile_spilled(
+        self,
+        merged_data: List[dict],
+        store: ResultStore,
+        query_properties: Dict[str, str],
+        id_column: str,
+        spill_results: bool,
+    ) -> None:
+        """
+        Align the results of snapshot items with the spill mode of this run.
 
-        # Then add new items from the file that weren't in snapshot_data
-        for file_item in file_data:
-            key = self._build_key(file_item, query_properties)
-            if key in merged_dict and key not in used_keys:
-                final_list.append(merged_dict[key])
-                used_keys.add(key)
-
-        # Finally, if there are any leftover items in merged_dict not in snapshot_data or file_data, add them:
-        for key, item in merged_dict.items():
-            if key not in used_keys:
-                final_list.append(item)
-                used_keys.add(key)
-
-        return final_list
-
-    def _build_key(self, item: dict, query_properties: Dict[str, str]) -> tuple:
-        """
-        Build a tuple key based on query_properties. 
-        If query_properties is empty, returns a placeholder key 
-        that effectively treats every item as distinct.
-        """
-        if not query_properties:
-            # No user-defined properties => treat each item as unique
-            # Could also look for a built-in 'id' field, etc.
-            return id(item)
-        # If we have fields, build a tuple from those fields
-        return tuple(item.get(field_name, "") for field_name in query_properties.values())
-
-    def _params_hash(self, params: Dict[str, Any]) -> str:
-        """Create a stable hash for the given parameters."""
+        Spilling runs move results that are still in memory into ``store``;
+        other runs put spilled results back into their items. References
+        the store cannot resolve are dropped, so those items are enriched
+        again.
+        """
+        missing = 0
+        for item in merged_data:
+            ref = item.get(SPILL_FIELD)
+            if ref is not None and ref not in store:
+                item.pop(SPILL_FIELD)
+                missing += 1
+            elif spill_results:
+                store.spill(item, self._result_ref(item, query_properties, id_column))
+            elif ref is not None:
+                store.restore(item)
+        if missing:
+            logger.warning("%d spilled results are missing from %s; enriching them again.", missing, store.path)
+
+    def _build_key(self, item: dict, query_properties: Dict[str, str], id_column: str = "") -> Union[tuple, str]:
+        """
+        Build the key that identifies an item across the input file, snapshots
+        and shards.
+
+        - With ``id_column`` the key is the (string) value of that column.
+          Items without a value fall back to the rules below.
+        - With ``query_properties`` the key is the tuple of the query fields
+          (``""`` for a missing value, None or NaN).
+        - Otherwise the key is a hash of the item's content (all fields not
+          starting with ``_``), so identical records get the same key in
+          every run and process.
+        """
+        if id_column:
+            value = item.get(id_column)
+            if value is not None and value == value:  # NaN from pandas means "missing"
+                return (str(value),)
+        if query_properties:
+            values = (item.get(field_name) for field_name in query_properties.values())
+            # Missing is "": NaN never equals itself, so it would not match after a snapshot round trip
+            return tuple("" if value is None or value != value else value for value in values)
+        content = {k: v for k, v in item.items() if not k.startswith("_")}
+        return hashlib.blake2b(_KEY_ENCODER.encode(content).encode(), digest_size=16).hexdigest()
+
+    def _projection(self, fields: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        """Field tree for ``fields``; the credit cost is kept for run metrics and plans."""
+        if not fields:
+            return None
+        return formats.field_tree(list(fields) + ["meta.request_credit_cost"])
+
+    def _params_hash(self, params: Dict[str, Any], fields: Optional[List[str]] = None) -> str:
+        """Create a stable hash for the given parameters (and result fields, if any)."""
+        if fields:
+            params = dict(params, _fields=sorted(set(fields)))
         if not params:
             return "noparams"
 
@@ -830,4 +1823,46 @@ class Handelsregister:
         existing_snapshots = sorted(glob(pattern))
         if existing_snapshots:
             return existing_snapshots[-1]
-        return None
\ No newline at end of file
+        return None
+
+# Shared by every Company created without a client, see get_default_client()
+_default_client: Optional[Handelsregister] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> Handelsregister:
+    """
+    Return the process-wide default client, creating it on first use.
+
+    Sharing one client gives all users (e.g. ``Company`` objects created
+    without ``client=``) one response cache and one rate limit.
+
+    :raises AuthenticationError: If the client has to be created and no API
+                                 key is configured.
+    """
+    global _default_client
+    client = _default_client
+    if client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = Handelsregister()
+            client = _default_client
+    return client
+
+
+def set_default_client(client: Optional[Handelsregister] = None, **kwargs) -> Optional[Handelsregister]:
+    """
+    Replace the process-wide default client.
+
+    :param client: The client to use. Without a client and without
+                   ``kwargs`` the default is reset and created again on next use.
+    :param kwargs: Arguments for a new ``Handelsregister`` client, e.g.
+                   ``api_key`` or ``rate_limit``.
+    :return: The new default client (None after a reset).
+    """
+    global _default_client
+    if client is None and kwargs:
+        client = Handelsregister(**kwargs)
+    with _default_client_lock:
+        _default_client = client
+    return client
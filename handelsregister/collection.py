@@ -0,0 +1,298 @@
+"""
+Columnar storage of many company payloads for portfolio-scale analytics.
+
+:class:`CompanyCollection` parses fetch_organization results once into NumPy
+arrays: one array per attribute (status, legal form, register, address,
+coordinates) and a :class:`~handelsregister.panel.KPIPanel` of the financial
+KPIs. Filtering,
+sorting, aggregation and the conversion to pandas then work on whole arrays
+instead of calling ``Company`` properties one object at a time.
+"""
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .formats import _to_float
+from .panel import KPIPanel, _Collector
+
+logger = logging.getLogger(__name__)
+
+# Attribute columns and how to read them from a payload. Missing values are
+# "" for text columns and NaN for the coordinates.
+TEXT_COLUMNS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "entity_id": lambda data: data.get("entity_id"),
+    "name": lambda data: data.get("name"),
+    "status": lambda data: data.get("status"),
+    "legal_form": lambda data: _legal_form_name(data.get("legal_form")),
+    "register_type": lambda data: (data.get("registration") or {}).get("register_type"),
+    "register_number": lambda data: (data.get("registration") or {}).get("register_number"),
+    "register_court": lambda data: (data.get("registration") or {}).get("court"),
+    "postal_code": lambda data: (data.get("address") or {}).get("postal_code"),
+    "city": lambda data: (data.get("address") or {}).get("city"),
+}
+COORDINATE_COLUMNS = ("latitude", "longitude")
+
+_AGGREGATIONS = {
+    "count": lambda values: float(np.count_nonzero(~np.isnan(values))),
+    "sum": np.nansum,
+    "mean": np.nanmean,
+    "median": np.nanmedian,
+    "min": np.nanmin,
+    "max": np.nanmax,
+}
+
+
+def _legal_form_name(legal_form: Any) -> Any:
+    if isinstance(legal_form, dict):
+        return legal_form.get("name")
+    return legal_form
+
+
+def _coordinate(value: Any) -> float:
+    number = _to_float(value)
+    return np.nan if number is None else number
+
+
+def _coordinates(data: Dict[str, Any]) -> tuple:
+    coords = (data.get("address") or {}).get("coordinates")
+    if not isinstance(coords, dict):
+        return (np.nan, np.nan)
+    # A malformed value is missing instead of failing the whole collection
+    return (
+        _coordinate(coords.get("latitude", coords.get("lat"))),
+        _coordinate(coords.get("longitude", coords.get("lng"))),
+    )
+
+
+class CompanyCollection:
+    """
+    Many companies stored column by column.
+
+    Usage:
+        from handelsregister import CompanyCollection
+
+        portfolio = CompanyCollection.from_data(item["_handelsregister_result"] for item in items)
+        active = portfolio[portfolio.is_active]
+        revenue = active.kpi("revenue", 2022)            # one value per company
+        top = active.sort_by(revenue, descending=True)[:10]
+        by_form = active.aggregate("legal_form", revenue, "median")
+        df = active.to_pandas(kpis=["revenue", "employees"])
+
+    Indexing with a column name returns that column; indexing with a boolean
+    mask, an integer array or a slice returns a new collection.
+    """
+
+    __slots__ = ("_columns", "_panel")
+
+    def __init__(self, columns: Dict[str, np.ndarray], panel: KPIPanel) -> None:
+        """
+        Create a collection from prepared arrays; usually you want
+        :meth:`from_data` or :meth:`from_companies` instead.
+
+        :param columns: Attribute name -> 1-D array with one value per company.
+        :param panel: The financial KPIs of the same companies.
+        """
+        self._columns = columns
+        self._panel = panel
+
+    @classmethod
+    def from_data(cls, payloads: Iterable[Optional[Dict[str, Any]]]) -> "CompanyCollection":
+        """
+        Parse fetch_organization results into columns.
+
+        Every payload becomes one row, in order. Anything that is not a dict
+        (e.g. the ``None`` result of a failed enrichment) becomes a row of
+        missing values, so the rows stay aligned with their source.
+
+        :param payloads: API results, e.g. ``Company.data`` or the
+                         ``_handelsregister_result`` of enriched items.
+        :return: A new collection.
+        """
+        text: Dict[str, List[Any]] = {name: [] for name in TEXT_COLUMNS}
+        coordinates: List[tuple] = []
+        kpis = _Collector()
+        count = 0
+        for count, data in enumerate(payloads, start=1):
+            if not isinstance(data, dict):
+                data = {}
+            for name, read in TEXT_COLUMNS.items():
+                value = read(data)
+                text[name].append("" if value is None else str(value))
+            coordinates.append(_coordinates(data))
+            kpis.add(count - 1, data.get("financial_kpi"))
+
+        columns = {name: np.array(values, dtype=str) for name, values in text.items()}
+        coordinate_array = np.array(coordinates, dtype=float).reshape(count, 2)
+        for index, name in enumerate(COORDINATE_COLUMNS):
+            columns[name] = coordinate_array[:, index]
+        panel = kpis.build(count)
+        logger.debug("Loaded %d companies with KPI panel %r.", count, panel)
+        return cls(columns, panel)
+
+    @classmethod
+    def from_companies(cls, companies: Iterable[Any]) -> "CompanyCollection":
+        """
+        Build a collection from ``Company`` objects.
+
+        Only the data the companies already hold is used: lazy companies are
+        fetched, but missing feature sections are not.
+        """
+        return cls.from_data(company.data for company in companies)
+
+    # --------------------------------
+    # Columns
+    # --------------------------------
+
+    def __len__(self) -> int:
+        return len(self._columns["name"])
+
+    @property
+    def columns(self) -> List[str]:
+        """The attribute column names."""
+        return list(self._columns)
+
+    @property
+    def panel(self) -> KPIPanel:
+        """The financial KPIs as a ``companies x years x metrics`` panel."""
+        return self._panel
+
+    @property
+    def years(self) -> np.ndarray:
+        """The years of the KPI matrices: a contiguous range, ascending."""
+        return self._panel.years
+
+    @property
+    def kpi_names(self) -> List[str]:
+        """The names of the financial KPIs found in the payloads."""
+        return self._panel.metrics
+
+    @property
+    def is_active(self) -> np.ndarray:
+        """Boolean mask of the companies with status ``ACTIVE``."""
+        return np.char.upper(self._columns["status"]) == "ACTIVE"
+
+    def kpi(self, name: str, year: Optional[int] = None) -> np.ndarray:
+        """
+        Get the values of a financial KPI.
+
+        :param name: The KPI, e.g. "revenue" or "employees".
+        :param year: A single year. Without a year the whole
+                     ``(companies, years)`` matrix is returned (see :attr:`years`).
+        :return: A float array; missing values are NaN.
+        """
+        return self._panel.metric(name, year)
+
+    def latest_kpi(self, name: str) -> np.ndarray:
+        """Get each company's most recent non-missing value of a KPI (NaN if none)."""
+        return self._panel.latest(name)
+
+    def __getitem__(self, key: Union[str, slice, Sequence[int], np.ndarray]) -> Any:
+        if isinstance(key, str):
+            return self._columns[key]
+        return self.take(key)
+
+    def take(self, rows: Union[slice, Sequence[int], np.ndarray]) -> "CompanyCollection":
+        """
+        Select rows by a boolean mask, integer positions or a slice.
+
+        :return: A new collection with the selected companies.
+        """
+        if not isinstance(rows, slice):
+            rows = np.asarray(rows)
+        columns = {name: values[rows] for name, values in self._columns.items()}
+        return CompanyCollection(columns, self._panel.take(rows))
+
+    # --------------------------------
+    # Sorting and aggregation
+    # --------------------------------
+
+    def _values(self, key: Union[str, np.ndarray]) -> np.ndarray:
+        values = self._columns[key] if isinstance(key, str) else np.asarray(key)
+        if len(values) != len(self):
+            raise ValueError(f"Expected {len(self)} values, got {len(values)}.")
+        return values
+
+    def sort_by(self, key: Union[str, np.ndarray], descending: bool = False) -> "CompanyCollection":
+        """
+        Sort the companies by a column or by an array of values (e.g. a KPI).
+
+        The sort is stable; missing numbers (NaN) always come last.
+
+        :param key: A column name or an array with one value per company.
+        :param descending: Sort from the largest to the smallest value.
+        :return: A new, sorted collection.
+        """
+        values = self._values(key)
+        if values.dtype.kind != "f":
+            # Sort by rank, so text can be negated for a stable descending sort too
+            values = np.unique(values, return_inverse=True)[1].reshape(-1)
+        order = np.argsort(-values if descending else values, kind="stable")
+        return self.take(order)
+
+    def value_counts(self, column: str) -> Dict[Any, int]:
+        """Count the companies per value of a column, most frequent first."""
+        values, counts = np.unique(self._values(column), return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        return {values[i].item(): int(counts[i]) for i in order}
+
+    def aggregate(self, by: str, values: Union[str, np.ndarray], how: str = "mean") -> Dict[Any, float]:
+        """
+        Aggregate numbers per value of a column, ignoring NaN.
+
+        :param by: The column to group by, e.g. "legal_form".
+        :param values: A numeric column name or an array with one value per
+                       company, e.g. ``collection.kpi("revenue", 2022)``.
+        :param how: One of "count", "sum", "mean", "median", "min" or "max".
+        :return: Group value -> aggregate (NaN for groups without values).
+        """
+        if how not in _AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation '{how}'; use one of {', '.join(_AGGREGATIONS)}.")
+        groups, inverse = np.unique(self._values(by), return_inverse=True)
+        numbers = self._values(values).astype(float)
+        if how in ("count", "sum", "mean"):
+            present = ~np.isnan(numbers)
+            counts = np.bincount(inverse[present], minlength=len(groups)).astype(float)
+            sums = np.bincount(inverse[present], weights=numbers[present], minlength=len(groups))
+            if how == "count":
+                result = counts
+            elif how == "sum":
+                result = sums
+            else:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    result = np.where(counts > 0, sums / counts, np.nan)
+            return {group: float(value) for group, value in zip(groups.tolist(), result)}
+
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(groups) + 1))
+        aggregate = _AGGREGATIONS[how]
+        result = {}
+        with np.errstate(all="ignore"):
+            for group, start, end in zip(groups.tolist(), bounds[:-1], bounds[1:]):
+                chunk = numbers[order[start:end]]
+                result[group] = float(aggregate(chunk)) if not np.isnan(chunk).all() else np.nan
+        return result
+
+    # --------------------------------
+    # Conversion
+    # --------------------------------
+
+    def to_pandas(self, kpis: Optional[Iterable[str]] = None):
+        """
+        Convert the collection into a pandas DataFrame.
+
+        :param kpis: KPIs to add as one ``<kpi>_<year>`` column per year;
+                     all KPIs if None, none if empty.
+        :return: A DataFrame with one row per company.
+        """
+        import pandas as pd
+
+        frame: Dict[str, np.ndarray] = dict(self._columns)
+        for name in self.kpi_names if kpis is None else kpis:
+            matrix = self.kpi(name)
+            for index, year in enumerate(self.years):
+                frame[f"{name}_{year}"] = matrix[:, index]
+        return pd.DataFrame(frame)
+
+    def __repr__(self) -> str:
+        return f"CompanyCollection({len(self)} companies, {len(self.kpi_names)} KPIs, {len(self.years)} years)"
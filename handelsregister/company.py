@@ -2,13 +2,23 @@ import logging
 from typing import Dict, Any, Optional, List, Union, Tuple, TypeVar, Generic, Callable
 from datetime import datetime
 
-from .client import Handelsregister
+from .accounts import AccountTree
+from .client import Handelsregister, get_default_client
 from .exceptions import HandelsregisterError
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Feature flags and the result key each of them fills
+FEATURE_SECTIONS = {
+    "related_persons": "related_persons",
+    "financial_kpi": "financial_kpi",
+    "balance_sheet_accounts": "balance_sheet_accounts",
+    "profit_and_loss_account": "profit_and_loss_account",
+    "publications": "publications",
+}
+
 class Company:
     """
     A class representing a company from the Handelsregister.ai API.
@@ -32,23 +42,58 @@ class Company:
         # Get balance sheet data for a specific year
         balance_sheet_2022 = company.get_balance_sheet_for_year(2022)
         
+        # Look up single line items by path or by name
+        cash = company.balance_sheet_tree(2022).find("Kassenbestand")
+        
         # Get current managing directors
         managing_directors = company.get_related_persons_by_role("MANAGING_DIRECTOR", current_only=True)
+        
+        # Build companies from data you already have (no API call)
+        company = Company.from_data(snapshot_item["_handelsregister_result"])
+        
+        # Defer the API call until the first attribute is read
+        company = Company("OroraTech GmbH aus München", lazy=True)
+    
+    Feature sections (financial KPIs, related persons, ...) the company was
+    not fetched with are fetched the first time a property needs them and
+    merged into the data.
+    
+    The per-year accessors use year indexes that are built on first use and
+    rebuilt when a section is replaced or changes length; call
+    :meth:`invalidate_indexes` after editing entries in place.
     """
     
+    __slots__ = (
+        "_query",
+        "_client",
+        "_features",
+        "_ai_search",
+        "_fetch_kwargs",
+        "_fetch_missing",
+        "_loaded_features",
+        "_entity_id",
+        "_company_data",
+        "_year_indexes",
+        "_financial_years",
+        "_account_trees",
+    )
+    
     def __init__(
         self, 
         query: str, 
         client: Optional[Handelsregister] = None,
         features: Optional[List[str]] = None,
         ai_search: Optional[str] = "off",  # Changed from "on-default" to "off"
+        lazy: bool = False,
+        fetch_missing: bool = True,
         **kwargs
     ):
         """
         Initialize a Company instance by fetching data from Handelsregister.ai.
         
         :param query: A search query for the company (e.g. "OroraTech GmbH aus München").
-        :param client: An optional Handelsregister client instance. If None, a new client is created.
+        :param client: An optional Handelsregister client instance. If None, the
+                       shared default client is used (see :func:`get_default_client`).
         :param features: A list of desired feature flags to include in the request.
                          Commonly used features include:
                          - "related_persons"
@@ -57,17 +102,204 @@ class Company:
                          - "balance_sheet_accounts"
                          - "profit_and_loss_account"
         :param ai_search: Whether to use AI-based search, defaults to "off".
+        :param lazy: If True, the data is only fetched when an attribute is
+                     first accessed (or :meth:`load` is called).
+        :param fetch_missing: If True, feature sections that are not in the
+                              data are fetched when a property needs them.
+                              Otherwise such properties return empty values.
         :param kwargs: Additional parameters to pass to fetch_organization.
         :raises HandelsregisterError: If there was an error fetching the company data.
         """
         self._query = query
-        self._client = client or Handelsregister()
+        self._client = client
         self._features = features or []
         self._ai_search = ai_search
+        self._fetch_kwargs = kwargs
+        self._fetch_missing = fetch_missing
+        self._loaded_features = set()
+        self._entity_id = ""
+        self._company_data: Optional[Dict[str, Any]] = None
+        # Section key -> (entries, length, {year: entry}), see _year_index()
+        self._year_indexes: Dict[str, Tuple[list, int, Dict[Any, Dict[str, Any]]]] = {}
+        self._financial_years: Optional[Tuple[tuple, List[int]]] = None
+        # (section key, year) -> (entry, AccountTree), see _account_tree()
+        self._account_trees: Dict[Tuple[str, Any], Tuple[Dict[str, Any], AccountTree]] = {}
+        
+        if not lazy:
+            self.load()
+    
+    @classmethod
+    def from_data(
+        cls,
+        data: Dict[str, Any],
+        client: Optional[Handelsregister] = None,
+        features: Optional[List[str]] = None,
+        fetch_missing: bool = False,
+    ) -> "Company":
+        """
+        Create a Company from an API result you already have, e.g. the
+        ``_handelsregister_result`` of an enriched item or a cached response.
+        
+        No API call is made and no client is created.
+        
+        :param data: A fetch_organization result.
+        :param client: An optional client, used for document downloads.
+        :param features: The features the data was fetched with.
+        :param fetch_missing: Fetch feature sections that ``data`` lacks when
+                              a property needs them (off by default).
+        :return: A Company backed by ``data``.
+        """
+        company = cls(
+            data.get("entity_id") or data.get("name", ""),
+            client=client,
+            features=features,
+            lazy=True,
+            fetch_missing=fetch_missing,
+        )
+        company._company_data = data
+        company._loaded_features.update(company._features)
+        return company
+    
+    @classmethod
+    def from_entity_id(
+        cls,
+        entity_id: str,
+        client: Optional[Handelsregister] = None,
+        features: Optional[List[str]] = None,
+        ai_search: Optional[str] = "off",
+        **kwargs
+    ) -> "Company":
+        """
+        Create a lazy Company for a known entity ID.
+        
+        ``entity_id`` and :meth:`fetch_document` work without fetching the
+        company; the first access to any other attribute fetches the data,
+        using the entity ID as the search query.
         
-        # Fetch company data
-        self._data = self._fetch_company_data(query, **kwargs)
+        :param entity_id: The entity ID of the company.
+        :param client: An optional Handelsregister client instance.
+        :param features: A list of desired feature flags.
+        :param ai_search: Whether to use AI-based search, defaults to "off".
+        :param kwargs: Additional parameters to pass to fetch_organization.
+        :return: A Company that has not been fetched yet.
+        """
+        company = cls(entity_id, client=client, features=features, ai_search=ai_search, lazy=True, **kwargs)
+        company._entity_id = entity_id
+        return company
+    
+    @property
+    def client(self) -> Handelsregister:
+        """Get the client; the shared default client unless one was passed."""
+        return self._client if self._client is not None else get_default_client()
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the company data is available without an API call."""
+        return self._company_data is not None
+    
+    def load(self) -> "Company":
+        """
+        Fetch the company data now unless it is already loaded.
         
+        :return: The Company itself.
+        :raises HandelsregisterError: If there was an error fetching the company data.
+        """
+        if self._company_data is None:
+            self._company_data = self._fetch_company_data(self._query, **self._fetch_kwargs)
+            self._loaded_features.update(self._features)
+        return self
+    
+    @property
+    def _data(self) -> Dict[str, Any]:
+        # Every attribute reads through here, so lazy companies fetch on first access
+        if self._company_data is None:
+            self.load()
+        return self._company_data
+    
+    def _require_features(self, *features: str) -> Dict[str, Any]:
+        """
+        Return the company data, fetching the sections of ``features`` that
+        it does not contain yet.
+        
+        The sections are fetched in one request (with the same query) and
+        merged into the data; the client's cache is shared with every other
+        request. If the query now finds a different entity, nothing is
+        merged and the sections stay missing.
+        
+        :param features: Feature flags, see ``FEATURE_SECTIONS``.
+        :return: The company data dictionary.
+        :raises HandelsregisterError: If there was an error fetching the sections.
+        """
+        if not self._fetch_missing:
+            return self._data
+        if self._company_data is None:
+            # Not fetched yet: ask for the sections in the first request
+            self._features = self._features + [f for f in features if f not in self._features]
+            return self._data
+        
+        data = self._company_data
+        missing = [
+            feature for feature in features
+            if feature not in self._loaded_features and FEATURE_SECTIONS[feature] not in data
+        ]
+        if not missing:
+            return data
+        
+        logger.debug("Fetching missing features %s for '%s'", missing, self._query)
+        try:
+            result = self.client.fetch_organization(
+                q=self._query,
+                features=missing,
+                ai_search=self._ai_search,
+                **self._fetch_kwargs
+            )
+        except HandelsregisterError as e:
+            logger.error(f"Error fetching features {missing} for query '{self._query}': {e}")
+            raise
+        entity_id = data.get("entity_id") or self._entity_id
+        if entity_id and result.get("entity_id") != entity_id:
+            # The query now matches another company; its sections are not ours
+            logger.warning(
+                f"Not merging features {missing} for query '{self._query}': the response is for "
+                f"entity {result.get('entity_id')!r}, not {entity_id!r}."
+            )
+        else:
+            for feature in missing:
+                key = FEATURE_SECTIONS[feature]
+                if key in result:
+                    data[key] = result[key]
+        # Also when the API had no section, so it is not requested again
+        self._loaded_features.update(missing)
+        self._features = self._features + missing
+        return data
+    
+    def _year_index(self, key: str, entries: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+        """
+        Map the years of a yearly section to their first entry.
+        
+        The index is cached and rebuilt when ``entries`` is a different list
+        or has a different length than when it was built.
+        
+        :param key: The section key, e.g. "financial_kpi".
+        :param entries: The current entries of the section.
+        :return: A dictionary of year -> entry.
+        """
+        cached = self._year_indexes.get(key)
+        if cached is not None and cached[0] is entries and cached[1] == len(entries):
+            return cached[2]
+        index: Dict[Any, Dict[str, Any]] = {}
+        for entry in entries:
+            # The first entry of a year wins, like a linear scan
+            index.setdefault(entry.get("year"), entry)
+        self._year_indexes[key] = (entries, len(entries), index)
+        return index
+    
+    def invalidate_indexes(self) -> None:
+        """Drop the cached year indexes, e.g. after editing yearly entries in place."""
+        self._year_indexes.clear()
+        self._financial_years = None
+        self._account_trees.clear()
+    
     def _fetch_company_data(self, query: str, **kwargs) -> Dict[str, Any]:
         """
         Fetch company data from the Handelsregister.ai API.
@@ -78,7 +310,7 @@ class Company:
         :raises HandelsregisterError: If there was an error fetching the company data.
         """
         try:
-            return self._client.fetch_organization(
+            return self.client.fetch_organization(
                 q=query, 
                 features=self._features,
                 ai_search=self._ai_search,
@@ -105,6 +337,8 @@ class Company:
     @property
     def entity_id(self) -> str:
         """Get the entity ID."""
+        if self._company_data is None and self._entity_id:
+            return self._entity_id
         return self._data.get("entity_id", "")
     
     @property
@@ -282,7 +516,7 @@ class Company:
     @property
     def related_persons(self) -> Dict[str, List[Dict[str, Any]]]:
         """Get the related persons dictionary with 'current' and 'past' keys."""
-        return self._data.get("related_persons", {"current": [], "past": []})
+        return self._require_features("related_persons").get("related_persons", {"current": [], "past": []})
     
     @property
     def current_related_persons(self) -> List[Dict[str, Any]]:
@@ -328,24 +562,25 @@ class Company:
     @property
     def financial_kpi(self) -> List[Dict[str, Any]]:
         """Get the list of financial KPIs by year."""
-        return self._data.get("financial_kpi", [])
+        return self._require_features("financial_kpi").get("financial_kpi", [])
     
     @property
     def financial_years(self) -> List[int]:
         """Get a list of years for which financial data is available, sorted newest first."""
-        years = []
-        
-        # Add years from financial KPIs
-        years.extend([item.get("year") for item in self.financial_kpi if item.get("year")])
-        
-        # Add years from balance sheets
-        years.extend([item.get("year") for item in self.balance_sheet_accounts if item.get("year")])
-        
-        # Add years from profit and loss accounts
-        years.extend([item.get("year") for item in self.profit_and_loss_account if item.get("year")])
+        # One request for all sections that are still missing
+        self._require_features("financial_kpi", "balance_sheet_accounts", "profit_and_loss_account")
+        indexes = (
+            self._year_index("financial_kpi", self.financial_kpi),
+            self._year_index("balance_sheet_accounts", self.balance_sheet_accounts),
+            self._year_index("profit_and_loss_account", self.profit_and_loss_account),
+        )
         
-        # Remove duplicates and sort descending
-        return sorted(list(set(years)), reverse=True)
+        # Only sorted again when one of the indexes was rebuilt
+        cached = self._financial_years
+        if cached is None or any(a is not b for a, b in zip(cached[0], indexes)):
+            years = {year for index in indexes for year in index if year}
+            cached = self._financial_years = (indexes, sorted(years, reverse=True))
+        return list(cached[1])
     
     def get_financial_kpi_for_year(self, year: int, key: Optional[str] = None) -> Union[Dict[str, Any], Any]:
         """
@@ -355,17 +590,17 @@ class Company:
         :param key: Optional specific KPI to retrieve (e.g., 'revenue', 'employees').
         :return: The KPI data for the year, or a specific value if key is provided.
         """
-        for item in self.financial_kpi:
-            if item.get("year") == year:
-                if key:
-                    return item.get(key)
-                return item
-        return {} if key is None else None
+        item = self._year_index("financial_kpi", self.financial_kpi).get(year)
+        if item is None:
+            return {} if key is None else None
+        if key:
+            return item.get(key)
+        return item
     
     @property
     def balance_sheet_accounts(self) -> List[Dict[str, Any]]:
         """Get the list of balance sheet accounts by year."""
-        return self._data.get("balance_sheet_accounts", [])
+        return self._require_features("balance_sheet_accounts").get("balance_sheet_accounts", [])
     
     def get_balance_sheet_for_year(self, year: int) -> Dict[str, Any]:
         """
@@ -374,15 +609,12 @@ class Company:
         :param year: The year to get data for.
         :return: The balance sheet data for the year.
         """
-        for item in self.balance_sheet_accounts:
-            if item.get("year") == year:
-                return item
-        return {}
+        return self._year_index("balance_sheet_accounts", self.balance_sheet_accounts).get(year, {})
     
     @property
     def profit_and_loss_account(self) -> List[Dict[str, Any]]:
         """Get the list of profit and loss accounts by year."""
-        return self._data.get("profit_and_loss_account", [])
+        return self._require_features("profit_and_loss_account").get("profit_and_loss_account", [])
     
     def get_profit_and_loss_for_year(self, year: int) -> Dict[str, Any]:
         """
@@ -391,10 +623,50 @@ class Company:
         :param year: The year to get data for.
         :return: The profit and loss data for the year.
         """
-        for item in self.profit_and_loss_account:
-            if item.get("year") == year:
-                return item
-        return {}
+        return self._year_index("profit_and_loss_account", self.profit_and_loss_account).get(year, {})
+    
+    def _account_tree(self, key: str, accounts_key: str, entry: Dict[str, Any]) -> AccountTree:
+        """
+        Get the indexed accounts of a yearly entry, parsing them only once.
+        
+        :param key: The section key, e.g. "balance_sheet_accounts".
+        :param accounts_key: The key of the account structure within an entry.
+        :param entry: The entry of the year (``{}`` if there is none).
+        :return: The account tree; empty if the year has no entry.
+        """
+        year = entry.get("year")
+        cached = self._account_trees.get((key, year))
+        if cached is not None and cached[0] is entry:
+            return cached[1]
+        accounts = entry.get(accounts_key)
+        if accounts is None:
+            # Older responses list the accounts directly in the entry
+            accounts = {k: v for k, v in entry.items() if k != "year"}
+        tree = AccountTree(accounts)
+        self._account_trees[(key, year)] = (entry, tree)
+        return tree
+    
+    def balance_sheet_tree(self, year: int) -> AccountTree:
+        """
+        Get the balance sheet accounts of a year, indexed by path and name.
+        
+        :param year: The year to get the accounts for.
+        :return: An :class:`AccountTree` (empty if there is no balance sheet for the year).
+        """
+        return self._account_tree(
+            "balance_sheet_accounts", "balance_sheet_accounts", self.get_balance_sheet_for_year(year)
+        )
+    
+    def profit_and_loss_tree(self, year: int) -> AccountTree:
+        """
+        Get the profit and loss accounts of a year, indexed by path and name.
+        
+        :param year: The year to get the accounts for.
+        :return: An :class:`AccountTree` (empty if there is no P&L for the year).
+        """
+        return self._account_tree(
+            "profit_and_loss_account", "profit_and_loss_accounts", self.get_profit_and_loss_for_year(year)
+        )
     
     # --------------------------------
     # History and events
@@ -422,7 +694,7 @@ class Company:
     @property
     def publications(self) -> List[Dict[str, Any]]:
         """Get the company publications list."""
-        return self._data.get("publications", [])
+        return self._require_features("publications").get("publications", [])
     
     # --------------------------------
     # Document fetching
@@ -452,7 +724,7 @@ class Company:
                 "Make sure the company data was fetched successfully."
             )
         
-        return self._client.fetch_document(
+        return self.client.fetch_document(
             company_id=self.entity_id,
             document_type=document_type,
             output_file=output_file
@@ -478,6 +750,8 @@ class Company:
     
     def __repr__(self) -> str:
         """String representation of the Company instance."""
+        if not self.is_loaded:
+            return f"Company(query='{self._query}', loaded=False)"
         reg_num = f", registration_number='{self.registration_number}'" if self.registration_number else ""
         return f"Company(name='{self.name}'{reg_num})"
     
@@ -9,3 +9,7 @@ class InvalidResponseError(HandelsregisterError):
 class AuthenticationError(HandelsregisterError):
     """Raised when invalid or missing API key is supplied."""
     pass
+
+class EnrichmentInterrupted(HandelsregisterError):
+    """Raised when enrich() was stopped by SIGINT/SIGTERM after saving its progress."""
+    pass
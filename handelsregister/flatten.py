@@ -0,0 +1,269 @@
+"""
+Flattening of API results into the text columns of CSV/XLSX outputs.
+
+The layout of a flat row is fixed, so the work per result is driven by a
+dispatch table built once at import time: every top-level key is looked up
+once, the simple keys are copied directly and only the nested parts
+(accounts, KPIs, history) are walked. ``output_rows`` flattens a result that
+is shared by several items only once, and can spread the work over a
+process pool for very large exports.
+"""
+import logging
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .formats import ERROR_FIELD, FETCHED_AT_FIELD, error_text
+
+logger = logging.getLogger(__name__)
+
+# Copied as they are (also when the value is empty)
+SIMPLE_KEYS = ("name", "status", "legal_form", "registration_date", "purpose")
+
+# Item fields that never appear in a flat output row
+INTERNAL_FIELDS = frozenset({"_handelsregister_result", "_in_file", ERROR_FIELD, FETCHED_AT_FIELD})
+
+
+def account_lines(account: Any, prefix: str = "") -> List[str]:
+    """
+    Flatten an account structure into lines such as ``"Aktiva > Umlaufvermögen: 10"``.
+
+    Accounts with a ``name`` (and optional ``value`` and ``children``) form a
+    tree; plain dicts and lists are walked generically.
+    """
+    lines: List[str] = []
+    _walk_account(account, prefix, lines.append)
+    return lines
+
+
+def _walk_account(node: Any, prefix: str, append: Callable[[str], None]) -> None:
+    # Appends to one shared list instead of building and extending a list per node
+    if isinstance(node, dict):
+        if "name" in node:
+            name = node["name"]
+            if isinstance(name, dict):
+                name = name.get("de") or name.get("en") or name.get("in_report", "")
+            value = node.get("value")
+            append(f"{prefix}{name}: {value}" if value is not None else f"{prefix}{name}")
+            children = node.get("children")
+            if children:
+                prefix += "> "
+                for child in children:
+                    _walk_account(child, prefix, append)
+        else:
+            for key, value in node.items():
+                if isinstance(value, (dict, list)):
+                    _walk_account(value, f"{prefix}{key} > ", append)
+                else:
+                    append(f"{prefix}{key}: {value}")
+    elif isinstance(node, list):
+        for child in node:
+            _walk_account(child, prefix, append)
+    else:
+        append(f"{prefix}{node}")
+
+
+def _registration(registration: Dict[str, Any]) -> str:
+    parts = (registration.get("court"), registration.get("register_type"), registration.get("register_number"))
+    return " ".join(str(part) for part in parts if part)
+
+
+def _address(address: Dict[str, Any]) -> str:
+    parts = []
+    street = address.get("street")
+    house_number = address.get("house_number")
+    if street or house_number:
+        parts.append(" ".join(filter(None, [street, str(house_number)])).strip())
+    postal_code = address.get("postal_code")
+    city = address.get("city")
+    if postal_code or city:
+        parts.append(" ".join(filter(None, [str(postal_code), city])).strip())
+    country = address.get("country")
+    if country:
+        parts.append(country)
+    return ", ".join(parts)
+
+
+def _contact_data(contact: Dict[str, Any]) -> str:
+    return " | ".join(filter(None, (contact.get("website"), contact.get("phone_number"), contact.get("email"))))
+
+
+def _comma_joined(values: List[Any]) -> str:
+    return ", ".join(values)
+
+
+def _financial_kpi(entries: List[Dict[str, Any]]) -> str:
+    parts = []
+    for entry in entries:
+        metrics = ", ".join(f"{k}: {v}" for k, v in entry.items() if k != "year" and v is not None)
+        parts.append(f"{entry.get('year')}: {metrics}")
+    return " | ".join(parts)
+
+
+def _yearly_accounts(entries: List[Dict[str, Any]], accounts_key: str) -> str:
+    parts = []
+    for entry in entries:
+        accounts = entry.get(accounts_key)
+        if accounts is not None:
+            lines = account_lines(accounts)
+        else:
+            lines = [f"{k}: {v}" for k, v in entry.items() if k != "year"]
+        parts.append(f"{entry.get('year')}: " + "; ".join(lines))
+    return " | ".join(parts)
+
+
+def _localized(value: Any) -> str:
+    value = value or {}
+    return (value.get("en") or value.get("de") or "").strip()
+
+
+def _history(entries: List[Dict[str, Any]]) -> str:
+    parts = []
+    for entry in entries:
+        description = (entry.get("description") or {}).get("short")
+        fields = (_localized(entry.get("name")), _localized(description), entry.get("start_date", ""))
+        parts.append(" - ".join(field for field in fields if field))
+    return " || ".join(parts)
+
+
+# Nested keys and their formatters, in output column order. Only truthy
+# values are formatted.
+NESTED_FIELDS = (
+    ("registration", _registration),
+    ("address", _address),
+    ("contact_data", _contact_data),
+    ("keywords", _comma_joined),
+    ("products_and_services", _comma_joined),
+    ("financial_kpi", _financial_kpi),
+    ("profit_and_loss_account", partial(_yearly_accounts, accounts_key="profit_and_loss_accounts")),
+    ("balance_sheet_accounts", partial(_yearly_accounts, accounts_key="balance_sheet_accounts")),
+    ("history", _history),
+)
+
+
+def flatten_result(result: Any) -> Dict[str, Any]:
+    """Flatten a full API result into human readable strings (one per ``hr_*`` column)."""
+    if not isinstance(result, dict):
+        return {}
+    flat = {key: result[key] for key in SIMPLE_KEYS if key in result}
+    get = result.get
+    for key, formatter in NESTED_FIELDS:
+        value = get(key)
+        if value:
+            flat[key] = formatter(value)
+    return flat
+
+
+def format_summary(result: Any) -> str:
+    """Create a short one-line summary (name, status, register, address) of an API result."""
+    if not isinstance(result, dict):
+        return ""
+
+    parts = []
+    name = result.get("name")
+    if name:
+        parts.append(name)
+    status = result.get("status")
+    if status:
+        parts.append(f"Status: {status}")
+
+    registration = result.get("registration") or {}
+    registration_parts = [str(p) for p in (registration.get("court"), registration.get("register_number")) if p]
+    if registration_parts:
+        parts.append("Reg: " + " ".join(registration_parts))
+
+    address = result.get("address") or {}
+    address_parts = []
+    street = address.get("street")
+    house_number = address.get("house_number")
+    if street or house_number:
+        address_parts.append(" ".join(filter(None, [street, str(house_number) if house_number else None])).strip())
+    postal_code = address.get("postal_code")
+    city = address.get("city")
+    if postal_code or city:
+        address_parts.append(" ".join(filter(None, [str(postal_code) if postal_code else None, city])).strip())
+    country = address.get("country") or address.get("country_code")
+    if country:
+        address_parts.append(str(country))
+    if address_parts:
+        parts.append(", ".join(address_parts))
+
+    return " | ".join(parts)
+
+
+def output_row(item: Dict[str, Any], flattened: Optional[Dict[int, tuple]] = None) -> Dict[str, Any]:
+    """
+    Build the flat CSV/XLSX output row of an enriched item.
+
+    :param flattened: Memo of already flattened results, keyed by ``id()``.
+                      Only valid while all memoized results stay alive.
+    """
+    result = item.get("_handelsregister_result")
+    row = {k: v for k, v in item.items() if k not in INTERNAL_FIELDS}
+    if flattened is None:
+        flat, summary = flatten_result(result), format_summary(result)
+    else:
+        cached = flattened.get(id(result))
+        if cached is None:
+            cached = flattened[id(result)] = (flatten_result(result), format_summary(result))
+        flat, summary = cached
+    for key, value in flat.items():
+        row[f"hr_{key}"] = value
+    row["_handelsregister_summary"] = summary
+    row[ERROR_FIELD] = error_text(item.get(ERROR_FIELD))
+    row[FETCHED_AT_FIELD] = item.get(FETCHED_AT_FIELD)
+    return row
+
+
+def _output_chunk(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Runs in a pool worker; the chunk keeps its results alive for the memo
+    flattened: Dict[int, tuple] = {}
+    return [output_row(item, flattened) for item in items]
+
+
+def iter_output_rows(
+    items: Iterable[Dict[str, Any]], processes: int = 0, chunksize: int = 500
+) -> Iterator[Dict[str, Any]]:
+    """
+    Flatten many items with :func:`output_row`, yielding the rows in order.
+
+    In a list, items that share one result object (rows with the same
+    query, served from the client cache) are flattened once. Other
+    iterables are consumed lazily: one item at a time in this process, and
+    at most ``2 * processes`` chunks ahead of the rows yielded with a pool.
+
+    :param processes: Number of worker processes. With 0 or 1 the rows are
+                      built in this process. Items and rows are pickled to
+                      and from the workers, so a pool only pays off for
+                      large, rich results on several cores.
+    :param chunksize: Number of items sent to a worker at a time.
+    """
+    if processes <= 1:
+        # The memo is only safe while every memoized result stays alive
+        flattened: Optional[Dict[int, tuple]] = {} if isinstance(items, list) else None
+        for item in items:
+            yield output_row(item, flattened)
+        return
+
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import islice
+
+    logger.debug("Flattening results in %d processes.", processes)
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # Executor.map would submit the whole iterable (e.g. a spilled result file) up front
+        pending = deque()
+        while True:
+            while len(pending) < 2 * processes:
+                chunk = list(islice(items, max(1, chunksize)))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_output_chunk, chunk))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def output_rows(items: Iterable[Dict[str, Any]], processes: int = 0, chunksize: int = 500) -> List[Dict[str, Any]]:
+    """Flatten many items into a list of rows; see :func:`iter_output_rows`."""
+    return list(iter_output_rows(items, processes, chunksize))
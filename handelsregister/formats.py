@@ -0,0 +1,769 @@
+"""
+Record readers and incremental writers used by ``Handelsregister.enrich``.
+"""
+import csv
+import json
+import logging
+import os
+import sys
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INPUT_TYPES = {"json", "jsonl", "csv", "xlsx", "parquet"}
+OUTPUT_TYPES = {"json", "jsonl", "csv", "xlsx", "parquet"}
+
+# Input formats that can be read record by record without loading the file
+STREAMING_INPUT_TYPES = {"jsonl", "csv", "xlsx", "parquet"}
+STREAMING_OUTPUT_TYPES = {"jsonl", "csv", "xlsx", "parquet"}
+
+# Output formats that can be cut back to a checkpointed byte offset
+RESUMABLE_OUTPUT_TYPES = {"jsonl", "csv"}
+
+# File path standing for stdin (input) or stdout (output)
+STDIO = "-"
+
+# Formats that can be read from stdin / written to stdout
+STDIO_INPUT_TYPES = {"json", "jsonl", "csv"}
+STDIO_OUTPUT_TYPES = {"jsonl", "csv"}
+
+SUFFIXES = {
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "csv": ".csv",
+    "xlsx": ".xlsx",
+    "parquet": ".parquet",
+}
+
+# Rows per worksheet (including the header row) that Excel can open
+EXCEL_MAX_ROWS = 1_048_576
+
+# Item field holding the error of a failed enrichment (see Handelsregister._enrich_item)
+ERROR_FIELD = "_handelsregister_error"
+
+# Item field holding when the result was fetched (ISO 8601, UTC); see ``max_age``
+FETCHED_AT_FIELD = "_handelsregister_fetched_at"
+
+# Every key that ``flatten.flatten_result`` may produce, in output order
+FLAT_RESULT_KEYS = [
+    "name",
+    "status",
+    "legal_form",
+    "registration_date",
+    "purpose",
+    "registration",
+    "address",
+    "contact_data",
+    "keywords",
+    "products_and_services",
+    "financial_kpi",
+    "profit_and_loss_account",
+    "balance_sheet_accounts",
+    "history",
+]
+
+
+def iter_records(file_path: str, input_type: str, chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of an input file one by one.
+
+    JSONL, CSV, XLSX and Parquet files are read incrementally (CSV and
+    Parquet in chunks of ``chunk_size`` rows), so memory use does not depend
+    on the file size.
+    JSON files are a single list and have to be loaded completely.
+
+    :param file_path: Path to the input file, or ``STDIO`` (``"-"``) to read
+                      JSON, JSONL or CSV from stdin. CSV from stdin is parsed
+                      line by line (all values are strings), so every row is
+                      available as soon as it arrives.
+    :param input_type: One of 'json', 'jsonl', 'csv', 'xlsx' or 'parquet'.
+    :param chunk_size: Number of CSV/Parquet rows parsed per chunk.
+    """
+    if file_path == STDIO and input_type not in STDIO_INPUT_TYPES:
+        raise ValueError(
+            f"Cannot read '{input_type}' from stdin; use one of {', '.join(sorted(STDIO_INPUT_TYPES))}."
+        )
+
+    if input_type == "json":
+        with _open_text(file_path) as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError("JSON data must be a list of items for enrichment.")
+        yield from data
+    elif input_type == "jsonl":
+        with _open_text(file_path) as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"JSONL line {line_no} is not an object.")
+                yield record
+    elif input_type == "csv" and file_path == STDIO:
+        yield from csv.DictReader(sys.stdin)
+    elif input_type == "csv":
+        import pandas as pd
+        for chunk in pd.read_csv(file_path, chunksize=chunk_size):
+            yield from chunk.to_dict(orient="records")
+    elif input_type == "xlsx":
+        from openpyxl import load_workbook
+        wb = load_workbook(file_path, read_only=True)
+        try:
+            for sheet in xlsx_sheets(wb):
+                rows = sheet.iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    continue
+                for row in rows:
+                    # Read-only sheets drop trailing empty cells
+                    yield dict(zip(header, row + (None,) * (len(header) - len(row))))
+        finally:
+            wb.close()
+    elif input_type == "parquet":
+        pq = _require_pyarrow().parquet
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported input_type '{input_type}'.")
+
+
+def _open_text(file_path: str):
+    """Open a text file for reading; ``STDIO`` is stdin (which is left open)."""
+    if file_path == STDIO:
+        return nullcontext(sys.stdin)
+    return open(file_path, "r", encoding="utf-8")
+
+
+def _open_output(file_path: str, append: bool, **kwargs):
+    """Open a text file for writing; ``STDIO`` is stdout."""
+    if file_path == STDIO:
+        return sys.stdout
+    return open(file_path, "a" if append else "w", encoding="utf-8", **kwargs)
+
+
+class JSONLWriter:
+    """
+    Append records to a JSON Lines file, one object per line.
+
+    Written to stdout (``file_path="-"``), every record is flushed at once so
+    the next stage of a pipe can pick it up.
+    """
+
+    def __init__(self, file_path: str, append: bool = False) -> None:
+        self._file = _open_output(file_path, append)
+        self._stdout = file_path == STDIO
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str))
+        self._file.write("\n")
+        if self._stdout:
+            self._file.flush()
+
+    def tell(self) -> int:
+        """Flush buffered records and return the current byte offset."""
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self) -> None:
+        if self._stdout:
+            self._file.flush()
+        else:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _DroppedColumns:
+    """Warns once per column that a fixed-layout writer has no place for."""
+
+    def __init__(self, file_path: str, columns: List[str]) -> None:
+        self._file_path = file_path
+        self._known = set(columns)
+
+    def check(self, row: Dict[str, Any]) -> None:
+        dropped = row.keys() - self._known
+        if dropped:
+            self._known.update(dropped)
+            logger.warning(
+                "%s: dropping column(s) %s that the first record did not have.",
+                self._file_path, ", ".join(sorted(map(str, dropped))),
+            )
+
+
+class CSVWriter:
+    """
+    Append rows to a CSV file with a fixed column layout (flushed per row on stdout).
+
+    Keys that are not in ``columns`` are dropped, with one warning per column.
+    """
+
+    def __init__(self, file_path: str, columns: List[str], append: bool = False) -> None:
+        self._file = _open_output(file_path, append, newline="")
+        self._stdout = file_path == STDIO
+        self._writer = csv.DictWriter(self._file, fieldnames=columns, restval="", extrasaction="ignore")
+        self._dropped = _DroppedColumns(file_path, columns)
+        if not append:
+            self._writer.writeheader()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._dropped.check(row)
+        # Empty cells, as pandas writes them, instead of "nan"
+        self._writer.writerow({k: None if isinstance(v, float) and v != v else v for k, v in row.items()})
+        if self._stdout:
+            self._file.flush()
+
+    def tell(self) -> int:
+        """Flush buffered rows and return the current byte offset."""
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self) -> None:
+        if self._stdout:
+            self._file.flush()
+        else:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _continuation_title(title: str, number: int) -> str:
+    # Excel limits sheet titles to 31 characters
+    suffix = f" ({number})"
+    return title[:31 - len(suffix)] + suffix
+
+
+def xlsx_sheets(workbook) -> List[Any]:
+    """
+    The worksheets holding the records of a workbook.
+
+    That is the active sheet plus the continuation sheets that
+    :class:`XLSXWriter` adds once a sheet is full (``Sheet1 (2)``,
+    ``Sheet1 (3)``, ...). Other sheets are ignored.
+    """
+    first = workbook.active
+    sheets = [first]
+    while True:
+        title = _continuation_title(first.title, len(sheets) + 1)
+        if title not in workbook.sheetnames:
+            return sheets
+        sheets.append(workbook[title])
+
+
+def read_xlsx(file_path: str):
+    """Read the records of an XLSX file (see :func:`xlsx_sheets`) into one DataFrame."""
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        titles = [sheet.title for sheet in xlsx_sheets(wb)]
+    finally:
+        wb.close()
+    if len(titles) == 1:
+        return pd.read_excel(file_path)
+    frames = pd.read_excel(file_path, sheet_name=titles)
+    return pd.concat([frames[title] for title in titles], ignore_index=True)
+
+
+def _excel_value(value: Any) -> Any:
+    # openpyxl rejects containers and would store NaN as a number
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    if isinstance(value, float):
+        return None if value != value else value
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+class XLSXWriter:
+    """
+    Write rows to an XLSX file without keeping the workbook in memory.
+
+    openpyxl's write-only mode streams every row to a temporary file; the
+    workbook is assembled when the writer is closed. A sheet is full after
+    ``sheet_rows`` rows (header included); further rows go to continuation
+    sheets named ``Sheet1 (2)``, ``Sheet1 (3)``, ... which
+    :func:`iter_records` reads back in order.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        columns: List[str],
+        sheet_rows: int = EXCEL_MAX_ROWS,
+        split_sheets: bool = True,
+    ) -> None:
+        """
+        :param file_path: Path of the XLSX file, written on :meth:`close`.
+        :param columns: Column layout; missing values are left empty.
+        :param sheet_rows: Maximum number of rows per sheet, header included.
+        :param split_sheets: Start a continuation sheet when a sheet is full.
+                             Without it, writing more rows raises ValueError.
+        """
+        from openpyxl import Workbook
+
+        if sheet_rows < 2:
+            raise ValueError("sheet_rows must leave room for the header and one row.")
+        self._file_path = file_path
+        self._columns = list(columns)
+        self._dropped = _DroppedColumns(file_path, self._columns)
+        self._sheet_rows = sheet_rows
+        self._split_sheets = split_sheets
+        self._workbook = Workbook(write_only=True)
+        self._sheets = 0
+        self._sheet = None
+        self._rows = 0
+        self._add_sheet()
+
+    def _add_sheet(self) -> None:
+        self._sheets += 1
+        title = "Sheet1" if self._sheets == 1 else _continuation_title("Sheet1", self._sheets)
+        self._sheet = self._workbook.create_sheet(title)
+        self._sheet.append(self._columns)
+        self._rows = 1
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self._rows >= self._sheet_rows:
+            if not self._split_sheets:
+                raise ValueError(
+                    f"{self._file_path}: a worksheet holds at most {self._sheet_rows} rows."
+                )
+            self._add_sheet()
+        self._dropped.check(row)
+        self._sheet.append([_excel_value(row.get(column)) for column in self._columns])
+        self._rows += 1
+
+    def tell(self) -> int:
+        """XLSX files are only written on close and cannot be resumed."""
+        return 0
+
+    def close(self) -> None:
+        if self._workbook is not None:
+            self._workbook.save(self._file_path)
+            self._workbook = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_json_array(file_path: str, records: Iterable[Dict[str, Any]]) -> None:
+    """
+    Write ``records`` as a JSON array, one record at a time.
+
+    The file is laid out exactly like ``json.dump(list(records), f, indent=2)``.
+    """
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        separator = "\n  "
+        for record in records:
+            f.write(separator)
+            # Strings are escaped, so every newline belongs to the layout
+            f.write(json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            separator = ",\n  "
+        f.write("]" if separator == "\n  " else "\n]")
+
+
+def error_text(error: Any) -> Optional[str]:
+    """Render an item's ``ERROR_FIELD`` value as a single output cell."""
+    if not error:
+        return None
+    if not isinstance(error, dict):
+        return str(error)
+    return f"{error.get('type')}: {error.get('message')} (attempts: {error.get('attempts')})"
+
+
+def flat_columns(record: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Column layout of a flattened output row for the given input record.
+
+    :param projection: Field tree from :func:`field_tree`; only the ``hr_*``
+                       columns of projected top-level keys are included.
+    """
+    status_columns = ["_handelsregister_summary", ERROR_FIELD, FETCHED_AT_FIELD]
+    all_result_columns = [f"hr_{k}" for k in FLAT_RESULT_KEYS] + status_columns
+    skip = {"_handelsregister_result", "_in_file", *all_result_columns}
+    result_columns = [
+        f"hr_{k}" for k in FLAT_RESULT_KEYS if projection is None or k in projection
+    ] + status_columns
+    return [k for k in record if k not in skip] + result_columns
+
+
+def field_tree(fields: List[str]) -> Dict[str, Any]:
+    """
+    Turn dotted field paths into a nested dict used by :func:`project`.
+
+    A leaf (``None``) keeps the whole value; a shorter path wins over a longer
+    one, so ``["registration", "registration.court"]`` keeps all of
+    ``registration``.
+    """
+    tree: Dict[str, Any] = {}
+    for path in fields:
+        parts = path.split(".")
+        node = tree
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is None:
+                break  # an ancestor is already kept whole
+            node = child
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def project(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """
+    Reduce an API result to the fields of ``tree`` (see :func:`field_tree`).
+
+    Lists are projected element-wise, so ``financial_kpi.year`` keeps the
+    year of every KPI entry. Fields missing from the result are left out.
+    """
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(entry, tree) for entry in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: project(value[key], subtree) for key, subtree in tree.items() if key in value}
+
+
+def _require_pyarrow():
+    """Import pyarrow (with its parquet module) or explain how to install it."""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise ImportError(
+            "pyarrow is required for Parquet support. "
+            "Please install it, e.g. with 'pip install handelsregister[parquet]'."
+        ) from exc
+    return pyarrow
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_text(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, dict):
+        return value.get("name") or json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return str(value)
+
+
+def _account_label(account: Dict[str, Any]) -> str:
+    name = account.get("name")
+    if isinstance(name, dict):
+        return name.get("de") or name.get("en") or name.get("in_report") or ""
+    return str(name or "")
+
+
+def account_items(accounts: Any, prefix: str = "") -> Iterator[tuple]:
+    """
+    Walk a balance sheet or P&L account structure and yield ``(path, value)``
+    pairs, where ``path`` joins the account names with ``" > "``.
+
+    Handles both the ``name``/``value``/``children`` trees returned by the API
+    and plain ``{"account": value}`` mappings.
+    """
+    if isinstance(accounts, list):
+        for child in accounts:
+            yield from account_items(child, prefix)
+    elif isinstance(accounts, dict) and "name" in accounts:
+        path = f"{prefix} > {_account_label(accounts)}" if prefix else _account_label(accounts)
+        yield path, accounts.get("value")
+        yield from account_items(accounts.get("children") or [], path)
+    elif isinstance(accounts, dict):
+        for key, value in accounts.items():
+            path = f"{prefix} > {key}" if prefix else str(key)
+            if isinstance(value, (dict, list)):
+                yield from account_items(value, path)
+            else:
+                yield path, value
+    elif accounts is not None:
+        yield prefix, accounts
+
+
+def _year_entries(entries: Any, accounts_key: str) -> List[Dict[str, Any]]:
+    rows = []
+    for entry in entries or []:
+        if not isinstance(entry, dict):
+            continue
+        year = _to_int(entry.get("year"))
+        accounts = entry.get(accounts_key)
+        if accounts is None:
+            accounts = {k: v for k, v in entry.items() if k != "year"}
+        for path, value in account_items(accounts):
+            rows.append({"year": year, "path": path, "value": _to_float(value)})
+    return rows
+
+
+# Scalar string columns of the Parquet layout and where they come from
+RESULT_TEXT_COLUMNS = {
+    "name": ("name",),
+    "entity_id": ("entity_id",),
+    "status": ("status",),
+    "legal_form": ("legal_form",),
+    "purpose": ("purpose",),
+    "registration_court": ("registration", "court"),
+    "registration_type": ("registration", "register_type"),
+    "registration_number": ("registration", "register_number"),
+    "registration_date": ("registration_date",),
+    "street": ("address", "street"),
+    "house_number": ("address", "house_number"),
+    "postal_code": ("address", "postal_code"),
+    "city": ("address", "city"),
+    "country_code": ("address", "country_code"),
+    "website": ("contact_data", "website"),
+    "phone_number": ("contact_data", "phone_number"),
+    "email": ("contact_data", "email"),
+}
+
+
+def result_arrow_schema():
+    """Arrow schema of the ``hr_*`` columns written for every result."""
+    pa = _require_pyarrow()
+    account_type = pa.list_(pa.struct([
+        ("year", pa.int64()),
+        ("path", pa.string()),
+        ("value", pa.float64()),
+    ]))
+    fields = [(f"hr_{name}", pa.string()) for name in RESULT_TEXT_COLUMNS]
+    fields += [
+        ("hr_latitude", pa.float64()),
+        ("hr_longitude", pa.float64()),
+        ("hr_keywords", pa.list_(pa.string())),
+        ("hr_products_and_services", pa.list_(pa.string())),
+        ("hr_financial_kpi", pa.list_(pa.struct([
+            ("year", pa.int64()),
+            ("metric", pa.string()),
+            ("value", pa.float64()),
+        ]))),
+        ("hr_balance_sheet_accounts", account_type),
+        ("hr_profit_and_loss_account", account_type),
+        ("hr_request_credit_cost", pa.int64()),
+        ("_handelsregister_summary", pa.string()),
+        (ERROR_FIELD, pa.string()),
+        (FETCHED_AT_FIELD, pa.string()),
+    ]
+    return pa.schema(fields)
+
+
+def result_columns(result: Any) -> Dict[str, Any]:
+    """
+    Expand an API result into typed column values matching
+    :func:`result_arrow_schema` (without the summary, error and fetched-at
+    columns).
+    """
+    row: Dict[str, Any] = {}
+    if not isinstance(result, dict):
+        result = {}
+    for column, path in RESULT_TEXT_COLUMNS.items():
+        value: Any = result
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        row[f"hr_{column}"] = _to_text(value)
+
+    address = result.get("address") or {}
+    coords = address.get("coordinates") or {}
+    row["hr_latitude"] = _to_float(coords.get("latitude", coords.get("lat")))
+    row["hr_longitude"] = _to_float(coords.get("longitude", coords.get("lng")))
+    row["hr_keywords"] = [str(k) for k in result.get("keywords") or []] or None
+    row["hr_products_and_services"] = [str(p) for p in result.get("products_and_services") or []] or None
+
+    kpis = []
+    for entry in result.get("financial_kpi") or []:
+        year = _to_int(entry.get("year"))
+        for metric, value in entry.items():
+            if metric != "year" and value is not None:
+                kpis.append({"year": year, "metric": metric, "value": _to_float(value)})
+    row["hr_financial_kpi"] = kpis or None
+    row["hr_balance_sheet_accounts"] = _year_entries(
+        result.get("balance_sheet_accounts"), "balance_sheet_accounts"
+    ) or None
+    row["hr_profit_and_loss_account"] = _year_entries(
+        result.get("profit_and_loss_account"), "profit_and_loss_accounts"
+    ) or None
+    cost = (result.get("meta") or {}).get("request_credit_cost")
+    row["hr_request_credit_cost"] = _to_int(cost)
+    return row
+
+
+def _parquet_text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+class ParquetWriter:
+    """
+    Write enriched records to a Parquet file in row groups.
+
+    Input fields are written as strings unless ``schema`` gives their Arrow
+    type; the API result is expanded into the typed ``hr_*`` columns of
+    :func:`result_arrow_schema`. Rows are buffered and flushed as a row group
+    every ``row_group_size`` records.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        columns: List[str],
+        summary: Callable[[Any], str],
+        row_group_size: int = 1000,
+        schema=None,
+    ) -> None:
+        """
+        :param file_path: Path of the Parquet file.
+        :param columns: The fields of the input records.
+        :param summary: Builds the ``_handelsregister_summary`` of a result.
+        :param row_group_size: Number of rows per row group.
+        :param schema: Arrow schema with the types of (some of) the input
+                       fields. A type inferred from the first row group could
+                       not hold the values of later ones, so the other input
+                       fields are strings.
+        """
+        pa = self._pa = _require_pyarrow()
+        self._file_path = file_path
+        # Result columns of a previous enrichment are replaced, not duplicated
+        skip = {"_handelsregister_result", "_in_file", *result_arrow_schema().names}
+        self._columns = [c for c in columns if c not in skip]
+        self._dropped = _DroppedColumns(file_path, [*columns, *skip])
+        typed = set(schema.names) if schema is not None else set()
+        self._text_columns = [c for c in self._columns if c not in typed]
+        fields = [schema.field(c) if c in typed else pa.field(c, pa.string()) for c in self._columns]
+        fields.extend(result_arrow_schema())
+        self._schema = pa.schema(fields)
+        self._summary = summary
+        self._row_group_size = max(1, row_group_size)
+        self._buffer: List[Dict[str, Any]] = []
+        self._writer = None
+
+    def write(self, item: Dict[str, Any]) -> None:
+        self._dropped.check(item)
+        row = {}
+        for column in self._columns:
+            value = item.get(column)
+            if isinstance(value, float) and value != value:  # NaN from pandas
+                value = None
+            row[column] = value
+        for column in self._text_columns:
+            row[column] = _parquet_text(row[column])
+        result = item.get("_handelsregister_result")
+        row.update(result_columns(result))
+        row["_handelsregister_summary"] = self._summary(result)
+        row[ERROR_FIELD] = error_text(item.get(ERROR_FIELD))
+        row[FETCHED_AT_FIELD] = item.get(FETCHED_AT_FIELD)
+        self._buffer.append(row)
+        if len(self._buffer) >= self._row_group_size:
+            self._flush()
+
+    def _open(self) -> None:
+        if self._writer is None:
+            self._writer = self._pa.parquet.ParquetWriter(self._file_path, self._schema)
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        self._open()
+        table = self._pa.Table.from_pylist(self._buffer, schema=self._schema)
+        self._writer.write_table(table, row_group_size=self._row_group_size)
+        self._buffer = []
+
+    def tell(self) -> int:
+        """Parquet files cannot be resumed, so there is no meaningful offset."""
+        return 0
+
+    def close(self) -> None:
+        self._flush()
+        # No rows at all: still write a valid file with the result columns
+        self._open()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_writer(
+    file_path: str,
+    output_type: str,
+    first_record: Dict[str, Any],
+    append: bool = False,
+    summary: Optional[Callable[[Any], str]] = None,
+    chunk_size: int = 1000,
+    projection: Optional[Dict[str, Any]] = None,
+    schema=None,
+):
+    """
+    Create an incremental writer for ``output_type``.
+
+    ``schema`` holds the Arrow types of input fields in Parquet output (see
+    :class:`ParquetWriter`).
+    """
+    if output_type == "jsonl":
+        return JSONLWriter(file_path, append=append)
+    if output_type == "csv":
+        return CSVWriter(file_path, flat_columns(first_record, projection), append=append)
+    if output_type == "xlsx":
+        if append:
+            raise ValueError("XLSX output cannot be appended to.")
+        return XLSXWriter(file_path, flat_columns(first_record, projection))
+    if output_type == "parquet":
+        return ParquetWriter(file_path, list(first_record), summary or (lambda _: ""), chunk_size, schema)
+    raise ValueError(
+        f"output_type '{output_type}' cannot be written incrementally; "
+        f"use one of {', '.join(sorted(STREAMING_OUTPUT_TYPES))}."
+    )
+
+
+def truncate(file_path: str, offset: int) -> None:
+    """Cut a partially written output file back to ``offset`` bytes."""
+    with open(file_path, "r+b") as f:
+        f.truncate(offset)
+
+
+def read_checkpoint(path) -> Optional[Dict[str, Any]]:
+    """Load a streaming checkpoint, or return None if there is none."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, checkpoint: Dict[str, Any]) -> None:
+    """Atomically replace a streaming checkpoint file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
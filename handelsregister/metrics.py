@@ -0,0 +1,154 @@
+"""
+Live metrics collected while ``Handelsregister.enrich`` runs.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+class EnrichmentMetrics:
+    """
+    Thread-safe counters and rolling latency statistics of an enrichment run.
+
+    The client records every API request, cache hit, retry and failure while
+    an instance is attached to it. ``postfix()`` renders a compact summary for
+    the progress bar, ``report()`` a machine-readable dict.
+    """
+
+    def __init__(self, total_items: int = 0, window: int = 500, report_path=None) -> None:
+        """
+        :param total_items: Number of items the run has to process (for the ETA).
+        :param window: Number of most recent requests used for the rolling
+                       latency percentiles and request rate.
+        :param report_path: File that :meth:`save` writes the report to.
+        """
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._started_at = datetime.now().isoformat(timespec="seconds")
+        self._latencies = deque(maxlen=window)
+        self._finished = deque(maxlen=window)
+        self.report_path = report_path
+        self.total_items = total_items
+        self.items_done = 0
+        self.requests = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.failures = 0
+        self.credits = 0.0
+
+    # -------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------
+
+    def record_request(self, latency: float, credits: Optional[float] = None) -> None:
+        """Record a successful API request that took ``latency`` seconds."""
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(latency)
+            self._finished.append(time.monotonic())
+            if credits:
+                self.credits += credits
+
+    def record_cache_hit(self) -> None:
+        with self._lock:
+            self.cache_hits += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def record_item(self) -> None:
+        """Record that one more item of the run is finished."""
+        with self._lock:
+            self.items_done += 1
+
+    # -------------------------------------------------------------------
+    # Statistics
+    # -------------------------------------------------------------------
+
+    def _percentile(self, fraction: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return ordered[index]
+
+    def _requests_per_second(self) -> float:
+        if len(self._finished) >= 2:
+            span = self._finished[-1] - self._finished[0]
+            if span > 0:
+                return (len(self._finished) - 1) / span
+        elapsed = time.monotonic() - self._started
+        return self.requests / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-serializable dict."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            lookups = self.requests + self.cache_hits
+            items_per_second = self.items_done / elapsed if elapsed > 0 else 0.0
+            remaining = max(self.total_items - self.items_done, 0)
+            return {
+                "started_at": self._started_at,
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+                "elapsed_seconds": round(elapsed, 3),
+                "items_total": self.total_items,
+                "items_done": self.items_done,
+                "requests": self.requests,
+                "requests_per_second": round(self._requests_per_second(), 3),
+                "latency_p50": self._percentile(0.5),
+                "latency_p95": self._percentile(0.95),
+                "cache_hits": self.cache_hits,
+                "cache_hit_ratio": round(self.cache_hits / lookups, 4) if lookups else None,
+                "retries": self.retries,
+                "failures": self.failures,
+                "credits_used": self.credits,
+                "eta_seconds": round(remaining / items_per_second, 1) if items_per_second > 0 else None,
+            }
+
+    def postfix(self) -> str:
+        """Short one-line summary for the progress bar."""
+        report = self.report()
+
+        def seconds(value: Optional[float]) -> str:
+            return f"{value:.2f}s" if value is not None else "-"
+
+        ratio = report["cache_hit_ratio"]
+        return " ".join([
+            f"p50={seconds(report['latency_p50'])}",
+            f"p95={seconds(report['latency_p95'])}",
+            f"{report['requests_per_second']:.2f} req/s",
+            f"cache={ratio:.0%}" if ratio is not None else "cache=-",
+            f"retries={report['retries']}",
+            f"fail={report['failures']}",
+            f"credits={report['credits_used']:g}",
+        ])
+
+    def save(self) -> None:
+        """Write the report to ``report_path``, if one was configured."""
+        if self.report_path:
+            self.write_report(self.report_path)
+
+    def write_report(self, path) -> None:
+        """Atomically write :meth:`report` as JSON to ``path``."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def read_report(path) -> Optional[Dict[str, Any]]:
+    """Load a run report written by :meth:`EnrichmentMetrics.write_report`."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
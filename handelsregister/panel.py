@@ -0,0 +1,250 @@
+"""
+Bulk extraction of ``financial_kpi`` sections into a dense KPI panel.
+
+:class:`KPIPanel` holds a ``companies x years x metrics`` float64 array (NaN
+where a value is missing) built from many fetch_organization results in one
+pass. The years are a contiguous range, so shifting along the year axis is a
+year-over-year comparison and growth rates and ratios are plain array
+arithmetic.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _year(value: Any) -> Optional[int]:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Collector:
+    """Collects ``(row, year, metric, value)`` entries for :meth:`KPIPanel.from_data`."""
+
+    def __init__(self, metrics: Optional[Sequence[str]] = None) -> None:
+        # With a metric selection only those ids exist; otherwise ids are added as found
+        self.fixed = metrics is not None
+        self.metric_ids: Dict[str, int] = {name: index for index, name in enumerate(metrics or ())}
+        # Flat row, year, metric, value sequence; much cheaper to convert than tuples
+        self.entries: List[float] = []
+
+    def add(self, row: int, financial_kpi: Any) -> None:
+        """Add the entries of one company's ``financial_kpi`` list."""
+        # The hot loop of the extraction: plain numbers skip _number()
+        metric_ids = self.metric_ids
+        extend = self.entries.extend
+        for entry in financial_kpi or ():
+            year = entry.get("year")
+            if type(year) is not int:
+                year = _year(year)
+                if year is None:
+                    logger.debug("Skipping KPIs without an integer year: %r", entry.get("year"))
+                    continue
+            for key, value in entry.items():
+                if key == "year":
+                    continue
+                kind = type(value)
+                if kind is not float and kind is not int:
+                    value = _number(value)
+                    if value is None:
+                        continue
+                metric = metric_ids.get(key)
+                if metric is None:
+                    if self.fixed:
+                        continue
+                    metric = metric_ids[key] = len(metric_ids)
+                extend((row, year, metric, value))
+
+    def build(self, count: int, years: Optional[Iterable[int]] = None) -> "KPIPanel":
+        """Scatter the collected entries into a dense panel for ``count`` companies."""
+        entries = np.array(self.entries, dtype=float).reshape(-1, 4)
+        rows = entries[:, 0].astype(np.intp)
+        entry_years = entries[:, 1].astype(np.int64)
+        layers = entries[:, 2].astype(np.intp)
+        numbers = entries[:, 3]
+
+        if years is not None:
+            panel_years = np.unique(np.asarray(list(years), dtype=np.int64))
+        elif len(entry_years):
+            panel_years = np.arange(entry_years.min(), entry_years.max() + 1)
+        else:
+            panel_years = np.empty(0, dtype=np.int64)
+        metric_names = list(self.metric_ids)
+        if not self.fixed:
+            # Found in input order; the panel lists them by name
+            metric_names.sort()
+            remap = np.empty(len(metric_names), dtype=np.intp)
+            remap[[self.metric_ids[name] for name in metric_names]] = np.arange(len(metric_names))
+            layers = remap[layers]
+
+        values = np.full((count, len(panel_years), len(metric_names)), np.nan)
+        if len(entry_years) and len(panel_years):
+            columns = np.searchsorted(panel_years, entry_years)
+            keep = (columns < len(panel_years)) & (panel_years[np.minimum(columns, len(panel_years) - 1)] == entry_years)
+            cells = np.ravel_multi_index((rows[keep], columns[keep], layers[keep]), values.shape)
+            # The first entry of a year wins, like Company.get_financial_kpi_for_year
+            _, first = np.unique(cells, return_index=True)
+            values.reshape(-1)[cells[first]] = numbers[keep][first]
+        return KPIPanel(values, panel_years, metric_names)
+
+
+class KPIPanel:
+    """
+    Financial KPIs of many companies as a ``companies x years x metrics`` array.
+
+    Usage:
+        from handelsregister import KPIPanel
+
+        panel = KPIPanel.from_data(item["_handelsregister_result"] for item in items)
+        revenue = panel.metric("revenue")                 # companies x years
+        growth = panel.growth("revenue")                  # year-over-year, NaN where unknown
+        revenue_per_employee = panel.ratio("revenue", "employees")
+        df = panel.to_frame(labels=entity_ids)            # MultiIndex (company, year)
+    """
+
+    __slots__ = ("values", "years", "metrics", "_metric_index")
+
+    def __init__(self, values: np.ndarray, years: np.ndarray, metrics: Sequence[str]) -> None:
+        """
+        :param values: Float array of shape ``(companies, years, metrics)``.
+        :param years: The years of the second axis, ascending.
+        :param metrics: The metric names of the third axis.
+        """
+        self.values = values
+        self.years = years
+        self.metrics = list(metrics)
+        self._metric_index = {name: index for index, name in enumerate(self.metrics)}
+
+    @classmethod
+    def from_data(
+        cls,
+        payloads: Iterable[Optional[Dict[str, Any]]],
+        metrics: Optional[Sequence[str]] = None,
+        years: Optional[Iterable[int]] = None,
+    ) -> "KPIPanel":
+        """
+        Build a panel from fetch_organization results in one pass.
+
+        Every payload is one company, in order; anything that is not a dict
+        (e.g. a failed result) is a company without values. Non-numeric
+        values and entries without an integer year (e.g. "2022/23") are
+        skipped.
+
+        :param payloads: API results, e.g. ``Company.data`` or the
+                         ``_handelsregister_result`` of enriched items.
+        :param metrics: The metrics to extract, in this order. Defaults to
+                        every metric found, sorted by name.
+        :param years: The years to extract. Defaults to the contiguous range
+                      from the first to the last year found.
+        :return: A new panel.
+        """
+        collector = _Collector(metrics)
+        count = 0
+        for count, data in enumerate(payloads, start=1):
+            if isinstance(data, dict):
+                collector.add(count - 1, data.get("financial_kpi"))
+        panel = collector.build(count, years)
+        logger.debug("Built a KPI panel of shape %s.", panel.values.shape)
+        return panel
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def _year_position(self, year: int) -> Optional[int]:
+        position = int(np.searchsorted(self.years, year))
+        if position == len(self.years) or self.years[position] != year:
+            return None
+        return position
+
+    def metric(self, name: str, year: Optional[int] = None) -> np.ndarray:
+        """
+        Get one metric.
+
+        :param name: The metric, e.g. "revenue".
+        :param year: A single year; without it the ``(companies, years)``
+                     matrix is returned.
+        :return: A float array (a view where possible); NaN if missing.
+        """
+        index = self._metric_index.get(name)
+        matrix = self.values[:, :, index] if index is not None else np.full(self.values.shape[:2], np.nan)
+        if year is None:
+            return matrix
+        position = self._year_position(year)
+        return matrix[:, position] if position is not None else np.full(len(self), np.nan)
+
+    def latest(self, name: str) -> np.ndarray:
+        """Get each company's most recent non-missing value of a metric (NaN if none)."""
+        matrix = self.metric(name)
+        if not matrix.shape[1]:
+            return np.full(len(self), np.nan)
+        present = ~np.isnan(matrix)
+        # Index of the last present year per company
+        last = matrix.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        values = matrix[np.arange(len(self)), last]
+        values[~present.any(axis=1)] = np.nan
+        return values
+
+    def growth(self, name: str, periods: int = 1) -> np.ndarray:
+        """
+        Relative change of a metric against ``periods`` years earlier.
+
+        :return: A ``(companies, years)`` array; NaN for the first
+                 ``periods`` years and where either value is missing or zero.
+        """
+        matrix = self.metric(name)
+        result = np.full(matrix.shape, np.nan)
+        if 0 < periods < matrix.shape[1]:
+            previous = matrix[:, :-periods]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result[:, periods:] = np.where(previous != 0, matrix[:, periods:] / previous - 1, np.nan)
+        return result
+
+    def ratio(self, numerator: str, denominator: str) -> np.ndarray:
+        """Divide one metric by another per company and year (NaN where undefined)."""
+        top = self.metric(numerator)
+        bottom = self.metric(denominator)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(bottom != 0, top / bottom, np.nan)
+
+    def take(self, rows: Union[slice, Sequence[int], np.ndarray]) -> "KPIPanel":
+        """Select companies by a boolean mask, integer positions or a slice."""
+        if not isinstance(rows, slice):
+            rows = np.asarray(rows)
+        return KPIPanel(self.values[rows], self.years, self.metrics)
+
+    def to_frame(self, labels: Optional[Sequence[Any]] = None, dropna: bool = False):
+        """
+        Convert the panel into a pandas DataFrame with a ``(company, year)``
+        MultiIndex and one column per metric.
+
+        :param labels: One label per company (e.g. entity IDs); defaults to
+                       the company's position.
+        :param dropna: Drop the (company, year) rows without any value.
+        """
+        import pandas as pd
+
+        companies, years, metrics = self.values.shape
+        if labels is None:
+            labels = np.arange(companies)
+        index = pd.MultiIndex.from_product([np.asarray(labels), self.years], names=["company", "year"])
+        frame = pd.DataFrame(self.values.reshape(companies * years, metrics), index=index, columns=self.metrics)
+        return frame.dropna(how="all") if dropna else frame
+
+    def __repr__(self) -> str:
+        companies, years, metrics = self.values.shape
+        return f"KPIPanel({companies} companies, {years} years, {metrics} metrics)"
@@ -0,0 +1,155 @@
+"""
+A small threaded read → process → write pipeline used by
+``Handelsregister.enrich``.
+
+One thread reads the input records, ``workers`` threads process them (enrich
+and flatten) and the caller consumes the results in input order, typically
+writing them to the output. A slot semaphore bounds the number of records
+that have been read but not yet consumed, so a slow writer holds back the
+reader and the workers instead of piling up results in memory.
+"""
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Pipeline:
+    """
+    Process records concurrently and hand the outcomes back in input order.
+
+    Usage:
+        pipeline = Pipeline(enrich_record, workers=4, stop=stop_event)
+        for record, outcome in pipeline.run(records):
+            writer.write(outcome)
+        if pipeline.stopped:
+            ...
+
+    With ``workers=0`` everything runs in the calling thread, one record at
+    a time, which behaves exactly like a plain loop.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Any], Any],
+        workers: int = 4,
+        capacity: Optional[int] = None,
+        stop: Optional[threading.Event] = None,
+        ordered: bool = True,
+    ) -> None:
+        """
+        :param process: Called with every record in a worker thread; its
+                        return value is the outcome. An exception is
+                        re-raised to the caller at the record's position.
+        :param workers: Number of worker threads (0 processes inline).
+        :param capacity: Maximum number of records read but not yet
+                         consumed; defaults to four per worker.
+        :param stop: Once set, no further records are read. Records already
+                     read are still processed and handed back.
+        :param ordered: Hand the outcomes back in input order. Without it
+                        every outcome is handed back as soon as it is ready.
+        """
+        self.process = process
+        self.workers = max(workers, 0)
+        self.capacity = capacity or max(4 * self.workers, 1)
+        self.stop = stop or threading.Event()
+        self.ordered = ordered
+        self.stopped = False
+
+    def run(self, records: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
+        """
+        Yield ``(record, outcome)`` pairs in the order of ``records`` (or in
+        completion order, see ``ordered``).
+
+        ``stopped`` tells afterwards whether reading ended because of ``stop``.
+        Closing the generator early stops the threads; records in flight are
+        finished but discarded.
+        """
+        self.stopped = False
+        if not self.workers:
+            for record in records:
+                if self.stop.is_set():
+                    self.stopped = True
+                    return
+                yield record, self.process(record)
+            return
+
+        logger.debug("Running the pipeline with %d workers.", self.workers)
+        inbox: "queue.Queue" = queue.Queue()
+        outbox: "queue.Queue" = queue.Queue()
+        slots = threading.Semaphore(self.capacity)
+        abort = threading.Event()
+
+        def read() -> None:
+            count = 0
+            try:
+                for record in records:
+                    if self.stop.is_set():
+                        self.stopped = True
+                        break
+                    while not slots.acquire(timeout=0.1):
+                        if abort.is_set():
+                            return
+                    inbox.put((count, record))
+                    count += 1
+            except BaseException as exc:  # surfaced to the caller after the records read so far
+                outbox.put((count, None, None, exc))
+                count += 1
+            finally:
+                for _ in range(self.workers):
+                    inbox.put(_DONE)
+                outbox.put((_DONE, count))
+
+        def work() -> None:
+            while True:
+                entry = inbox.get()
+                if entry is _DONE:
+                    return
+                position, record = entry
+                if abort.is_set():
+                    continue
+                try:
+                    outbox.put((position, record, self.process(record), None))
+                except BaseException as exc:
+                    outbox.put((position, record, None, exc))
+
+        threads = [threading.Thread(target=read, name="handelsregister-reader", daemon=True)]
+        threads.extend(
+            threading.Thread(target=work, name=f"handelsregister-worker-{n}", daemon=True)
+            for n in range(self.workers)
+        )
+        for thread in threads:
+            thread.start()
+
+        # Outcomes arrive in completion order and are reordered here
+        pending: Dict[int, tuple] = {}
+        position = consumed = 0
+        total = None
+        try:
+            while total is None or consumed < total:
+                entry = outbox.get()
+                if entry[0] is _DONE:
+                    total = entry[1]
+                    continue
+                if self.ordered:
+                    pending[entry[0]] = entry
+                    ready = []
+                    while position in pending:
+                        ready.append(pending.pop(position))
+                        position += 1
+                else:
+                    ready = [entry]
+                for _, record, outcome, exc in ready:
+                    if exc is not None:
+                        raise exc
+                    consumed += 1
+                    yield record, outcome
+                    slots.release()
+        finally:
+            abort.set()
+            for thread in threads:
+                thread.join()
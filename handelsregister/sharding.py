@@ -0,0 +1,160 @@
+"""
+Helpers for splitting an enrichment job into static shards and merging the
+shard outputs back into a single file.
+"""
+import csv
+import hashlib
+import heapq
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import formats
+
+logger = logging.getLogger(__name__)
+
+INDEX_FIELD = "_input_index"
+
+
+def shard_of(key: Any, shard_count: int) -> int:
+    """
+    Map a record key to a shard number in ``range(shard_count)``.
+
+    The key is serialized to JSON and hashed with SHA-1, so the assignment is
+    identical across processes, machines and Python versions (unlike the
+    salted built-in ``hash``).
+    """
+    raw = json.dumps(key, sort_keys=True, ensure_ascii=False, default=str).encode()
+    return int(hashlib.sha1(raw).hexdigest()[:8], 16) % shard_count
+
+
+def validate_shard(shard_index: int, shard_count: int) -> None:
+    """Raise ValueError for an impossible shard configuration."""
+    if shard_count < 1:
+        raise ValueError("shard_count must be at least 1.")
+    if not 0 <= shard_index < shard_count:
+        raise ValueError("shard_index must be between 0 and shard_count - 1.")
+
+
+def shard_suffix(shard_index: int, shard_count: int) -> str:
+    """File name suffix identifying one shard, e.g. ``shard2of8``."""
+    return f"shard{shard_index}of{shard_count}"
+
+
+def _sort_key(record: Dict[str, Any]) -> tuple:
+    index = record.get(INDEX_FIELD)
+    if index is None or (isinstance(index, float) and math.isnan(index)):
+        # Items kept from old snapshots have no position in the current file
+        return (1, 0)
+    return (0, int(index))
+
+
+def _file_type(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    for file_type, file_suffix in formats.SUFFIXES.items():
+        if file_suffix == suffix:
+            return file_type
+    raise ValueError(f"Cannot determine the file type of '{path}'.")
+
+
+def _strip_index(records: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    for record in records:
+        record.pop(INDEX_FIELD, None)
+        yield record
+
+
+def _iter_csv(path: str) -> Iterator[Dict[str, Any]]:
+    # csv instead of pandas keeps every cell exactly as the shard wrote it
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if row.get(INDEX_FIELD) not in (None, ""):
+                row[INDEX_FIELD] = int(row[INDEX_FIELD])
+            else:
+                row[INDEX_FIELD] = None
+            yield row
+
+
+def _conform(pa, table, schema):
+    """Reorder and cast the columns of ``table`` to ``schema``, adding missing ones as nulls."""
+    columns = [
+        table.column(field.name).cast(field.type) if field.name in table.column_names
+        else pa.nulls(table.num_rows, field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def merge_shards(shard_files: List[str], output_file: str, file_type: Optional[str] = None) -> int:
+    """
+    Combine the outputs of a sharded enrichment into one file.
+
+    Every shard output is already ordered by ``_input_index`` (the position of
+    the record in the original input), so JSONL and CSV shards are k-way
+    merged without loading them completely. JSON, XLSX and Parquet shards are
+    read as a whole. The index column is removed from the merged output, and
+    XLSX output that exceeds Excel's row limit continues on further sheets.
+
+    :param shard_files: Output files of all shards, all of the same type.
+    :param output_file: Path of the merged output file.
+    :param file_type: Type of the shard files; derived from the file suffix if omitted.
+    :return: Number of records written.
+    """
+    if not shard_files:
+        raise ValueError("merge_shards() needs at least one shard file.")
+
+    file_type = (file_type or _file_type(shard_files[0])).lower()
+    if file_type not in formats.OUTPUT_TYPES:
+        raise ValueError(f"Unsupported file type '{file_type}'.")
+
+    if file_type == "parquet":
+        pa = formats._require_pyarrow()
+        tables = [pa.parquet.read_table(path) for path in shard_files]
+        # Shards may lack a column or only hold nulls in it; align them first
+        schema = pa.unify_schemas([table.schema for table in tables])
+        table = pa.concat_tables([_conform(pa, table, schema) for table in tables])
+        if INDEX_FIELD in table.column_names:
+            table = table.sort_by([(INDEX_FIELD, "ascending")])
+            table = table.remove_column(table.schema.get_field_index(INDEX_FIELD))
+        pa.parquet.write_table(table, output_file)
+        count = table.num_rows
+    elif file_type == "csv":
+        streams = [_iter_csv(path) for path in shard_files]
+        count = 0
+        writer = None
+        try:
+            for record in _strip_index(heapq.merge(*streams, key=_sort_key)):
+                if writer is None:
+                    writer = formats.CSVWriter(output_file, list(record))
+                writer.write(record)
+                count += 1
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            open(output_file, "w", encoding="utf-8").close()
+    elif file_type == "jsonl":
+        streams = [formats.iter_records(path, file_type) for path in shard_files]
+        count = 0
+        with formats.JSONLWriter(output_file) as writer:
+            for record in _strip_index(heapq.merge(*streams, key=_sort_key)):
+                writer.write(record)
+                count += 1
+    else:
+        records = []
+        for path in shard_files:
+            records.extend(formats.iter_records(path, file_type))
+        records = list(_strip_index(iter(sorted(records, key=_sort_key))))
+        count = len(records)
+        if file_type == "json":
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False, indent=2)
+        else:
+            columns = list(dict.fromkeys(k for record in records for k in record))
+            with formats.XLSXWriter(output_file, columns) as writer:
+                for record in records:
+                    writer.write(record)
+
+    logger.info("Merged %d shard files into %s", len(shard_files), output_file)
+    return count
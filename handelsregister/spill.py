@@ -0,0 +1,123 @@
+"""
+An on-disk store for the API results of a running enrichment.
+
+With ``spill_results=True``, ``Handelsregister.enrich`` moves every result
+out of its item into a :class:`ResultStore` as soon as it arrives. Only a
+short reference (``SPILL_FIELD``) stays in memory and in the snapshots.
+While the output is written, :meth:`ResultStore.join` puts the results back
+one item at a time.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# Item field holding the reference of a spilled result
+SPILL_FIELD = "_handelsregister_result_ref"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    ref TEXT PRIMARY KEY,
+    result TEXT NOT NULL
+);
+"""
+
+
+class ResultStore:
+    """
+    SQLite key-value store mapping result references to JSON-encoded results.
+
+    Writes are collected in one transaction until :meth:`commit`; snapshots
+    that refer to spilled results must only be written after a commit.
+
+    Usage:
+        with ResultStore("snapshots/results_noparams.sqlite") as store:
+            store.spill(item, ref)
+            ...
+            store.commit()
+            for item in store.join(items):
+                ...
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Open (and if necessary create) a result store.
+
+        :param path: Path of the SQLite database file. Without a path a
+                     temporary file is used and removed on :meth:`close`.
+        """
+        self.temporary = path is None
+        if self.temporary:
+            fd, path = tempfile.mkstemp(prefix="handelsregister_results_", suffix=".sqlite")
+            os.close(fd)
+        self.path = str(path)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(_SCHEMA)
+        if self.temporary:
+            # Nothing to recover after a crash, so skip the journal and fsyncs
+            self._conn.execute("PRAGMA journal_mode = OFF")
+            self._conn.execute("PRAGMA synchronous = OFF")
+
+    def put(self, ref: str, result: Any) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (ref, result) VALUES (?, ?)",
+            (ref, json.dumps(result, ensure_ascii=False, default=str)),
+        )
+
+    def get(self, ref: str) -> Any:
+        """Return the stored result, or None if there is none for ``ref``."""
+        row = self._conn.execute("SELECT result FROM results WHERE ref = ?", (ref,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, ref: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM results WHERE ref = ?", (ref,)).fetchone() is not None
+
+    def spill(self, item: Dict[str, Any], ref: str) -> None:
+        """Move the result of ``item`` into the store, leaving ``ref`` behind."""
+        result = item.get("_handelsregister_result")
+        if result is None:
+            return
+        self.put(ref, result)
+        item["_handelsregister_result"] = None
+        item[SPILL_FIELD] = ref
+
+    def restore(self, item: Dict[str, Any]) -> bool:
+        """
+        Put the spilled result of ``item`` back into it.
+
+        :return: False if the store has no result for the item's reference;
+                 the reference is dropped, so the item counts as not enriched.
+        """
+        ref = item.pop(SPILL_FIELD, None)
+        if ref is None:
+            return True
+        result = self.get(ref)
+        item["_handelsregister_result"] = result
+        return result is not None
+
+    def join(self, items: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield copies of ``items`` with their spilled results put back."""
+        for item in items:
+            if SPILL_FIELD in item:
+                item = dict(item)
+                self.restore(item)
+            yield item
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+        if self.temporary:
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
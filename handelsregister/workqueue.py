@@ -0,0 +1,265 @@
+"""
+A small SQLite-backed work queue that lets several ``enrich`` processes share
+one input file.
+
+Every input record is a row in the ``items`` table. Workers lease a batch of
+pending rows for ``lease_timeout`` seconds, enrich them and store the result.
+Leases of workers that crash (or are killed) simply expire and the rows are
+handed out again, so no item is lost and the work is balanced dynamically.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    position INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (state, position);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def default_worker_id() -> str:
+    """Identify this process as ``<hostname>-<pid>``."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Shared queue of enrichment items stored in a SQLite database.
+
+    The database uses SQLite's default rollback journal (not WAL), so it also
+    works on network file systems that support POSIX locks.
+
+    Usage:
+        queue = WorkQueue("jobs/companies.sqlite", lease_timeout=600)
+        queue.populate(records, source="companies.jsonl|noparams")
+        for position, item in queue.lease(10):
+            ...
+            queue.complete(position, item)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_timeout: float = 600.0,
+        worker_id: Optional[str] = None,
+        poll_interval: float = 2.0,
+    ) -> None:
+        """
+        Open (and if necessary create) a work queue.
+
+        :param path: Path of the SQLite database file.
+        :param lease_timeout: Seconds after which a leased item is handed out again.
+        :param worker_id: Name of this worker; defaults to ``<hostname>-<pid>``.
+        :param poll_interval: Seconds to wait between polls while other workers
+                              still hold leases.
+        """
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval
+        self._conn = sqlite3.connect(path, timeout=60.0, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    # -------------------------------------------------------------------
+    # Transactions
+    # -------------------------------------------------------------------
+
+    def _begin(self) -> None:
+        # IMMEDIATE takes the write lock up front, so two workers can never
+        # select the same pending rows.
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # -------------------------------------------------------------------
+    # Queue operations
+    # -------------------------------------------------------------------
+
+    def populate(self, records: Iterable[Dict[str, Any]], source: str) -> bool:
+        """
+        Fill the queue with ``records`` unless another worker already did.
+
+        :param records: Input records, in input order.
+        :param source: Identifies the job (input file and parameters). Joining
+                       a queue that was populated for a different job fails.
+        :return: True if this call populated the queue.
+        :raises ValueError: If the queue belongs to a different job.
+        """
+        self._begin()
+        try:
+            existing = self._get_meta("source")
+            if existing is not None:
+                self._conn.execute("COMMIT")
+                if existing != source:
+                    raise ValueError(
+                        f"Work queue {self.path} was created for a different job ({existing})."
+                    )
+                return False
+            self._conn.executemany(
+                "INSERT INTO items (position, payload) VALUES (?, ?)",
+                (
+                    (position, json.dumps(record, ensure_ascii=False, default=str))
+                    for position, record in enumerate(records)
+                ),
+            )
+            self._set_meta("source", source)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            raise
+        logger.info("Populated work queue %s", self.path)
+        return True
+
+    def lease(self, batch_size: int = 1) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Lease up to ``batch_size`` items, preferring the lowest positions.
+
+        Pending items and items whose lease has expired are eligible.
+
+        :return: A list of ``(position, record)`` pairs; empty if nothing is available.
+        """
+        now = time.time()
+        self._begin()
+        try:
+            rows = self._conn.execute(
+                "SELECT position, payload FROM items "
+                "WHERE state = ? OR (state = ? AND lease_expires < ?) "
+                "ORDER BY position LIMIT ?",
+                (PENDING, LEASED, now, batch_size),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE items SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE position = ?",
+                [(LEASED, self.worker_id, now + self.lease_timeout, position) for position, _ in rows],
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            raise
+        return [(position, json.loads(payload)) for position, payload in rows]
+
+    def complete(self, position: int, item: Dict[str, Any]) -> None:
+        """Store the enriched ``item`` and mark its position as done."""
+        self._conn.execute(
+            "UPDATE items SET state = ?, owner = NULL, lease_expires = NULL, result = ? WHERE position = ?",
+            (DONE, json.dumps(item, ensure_ascii=False, default=str), position),
+        )
+
+    def release(self, position: int) -> None:
+        """Give a leased item back to the queue without a result."""
+        self._conn.execute(
+            "UPDATE items SET state = ?, owner = NULL, lease_expires = NULL "
+            "WHERE position = ? AND state = ? AND owner = ?",
+            (PENDING, position, LEASED, self.worker_id),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        """Number of items per state."""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0}
+        for state, count in self._conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state"):
+            counts[state] = count
+        return counts
+
+    def is_drained(self) -> bool:
+        """True once every item is done."""
+        counts = self.counts()
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def wait(self) -> None:
+        """Sleep while other workers hold the remaining leases."""
+        time.sleep(self.poll_interval)
+
+    def claim_finalize(self) -> bool:
+        """
+        Atomically claim the right to write the final output.
+
+        The claim is a lease like that of an item: only one worker of a
+        drained queue gets True until the output is marked written with
+        :meth:`finish_finalize`. If the claiming worker gives the claim back
+        (:meth:`release_finalize`) or dies and its claim expires after
+        ``lease_timeout``, the next call claims it again.
+        """
+        now = time.time()
+        self._begin()
+        try:
+            owner = self._get_meta("finalized_by")
+            expires = self._get_meta("finalize_expires")
+            claimed = (
+                self._get_meta("finalized") is None
+                and (owner is None or owner == self.worker_id or float(expires or 0) < now)
+                and self.is_drained()
+            )
+            if claimed:
+                if owner is not None and owner != self.worker_id:
+                    logger.warning("Taking over the expired output claim of worker %s.", owner)
+                self._set_meta("finalized_by", self.worker_id)
+                self._set_meta("finalize_expires", str(now + self.lease_timeout))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def finish_finalize(self) -> None:
+        """Record that this worker has written the output; nobody can claim it again."""
+        self._set_meta("finalized", self.worker_id)
+
+    def release_finalize(self) -> None:
+        """Give back an output claim without writing the output."""
+        self._conn.execute(
+            "DELETE FROM meta WHERE key IN ('finalized_by', 'finalize_expires') "
+            "AND (SELECT value FROM meta WHERE key = 'finalized_by') = ?",
+            (self.worker_id,),
+        )
+
+    def iter_results(self, with_positions: bool = False) -> Iterator[Any]:
+        """
+        Yield the enriched items in input order.
+
+        :param with_positions: Yield ``(position, item)`` pairs instead of items.
+        """
+        cursor = self._conn.execute(
+            "SELECT position, result FROM items WHERE state = ? ORDER BY position", (DONE,)
+        )
+        for position, result in cursor:
+            item = json.loads(result)
+            yield (position, item) if with_positions else item
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -51,9 +51,13 @@ setuptools.setup(
         "httpx>=0.23.0",
         "tqdm>=4.0.0",
         "pandas>=1.0.0",
+        "numpy>=1.17.0",
         "openpyxl>=3.0.0",
         "rich>=13.0.0",
     ],
+    extras_require={
+        "parquet": ["pyarrow>=7.0.0"],
+    },
 
     entry_points={
         "console_scripts": [
@@ -80,6 +80,23 @@ def sample_json_file(tmp_path):
     return str(file_path)
 
 
+@pytest.fixture
+def sample_jsonl_file(tmp_path):
+    """Create a sample JSON Lines file for testing."""
+    data = [
+        {"company_name": "OroraTech GmbH", "city": "München", "id": "1"},
+        {"company_name": "Example AG", "city": "Berlin", "id": "2"},
+        {"company_name": "Test GmbH", "city": "Hamburg", "id": "3"}
+    ]
+
+    file_path = tmp_path / "sample.jsonl"
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for item in data:
+            f.write(json.dumps(item) + "\n")
+
+    return str(file_path)
+
+
 @pytest.fixture
 def sample_csv_file(tmp_path):
     data = [
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from handelsregister import AccountTree, Company, account_matrix, balance_sheet_matrix, formats
+from handelsregister.accounts import union_paths
+
+
+ACCOUNTS = [
+    {
+        "name": {"de": "Aktiva", "en": "Assets"},
+        "value": 100,
+        "children": [
+            {"name": {"de": "Anlagevermögen", "en": "Fixed assets"}, "value": 60},
+            {
+                "name": {"de": "Umlaufvermögen", "en": "Current assets"},
+                "value": 40,
+                "children": [{"name": {"de": "Sonstige", "in_report": "Kasse"}, "value": 40}],
+            },
+        ],
+    },
+    {
+        "name": {"de": "Passiva", "en": "Liabilities"},
+        "value": 100,
+        "children": [{"name": {"de": "Sonstige"}, "value": 100}],
+    },
+]
+
+
+def test_paths_match_account_items():
+    tree = AccountTree(ACCOUNTS)
+    assert list(tree.items()) == list(formats.account_items(ACCOUNTS))
+    assert len(tree) == 6
+    assert tree["Aktiva > Umlaufvermögen > Sonstige"] == 40
+    assert tree.get("Aktiva > Missing") is None
+    assert "Passiva > Sonstige" in tree
+
+
+def test_name_lookup_in_any_language():
+    tree = AccountTree(ACCOUNTS)
+    assert tree.find("current assets") == 40
+    assert tree.find("UMLAUFVERMÖGEN") == 40
+    assert tree.find("Kasse") == 40
+    assert tree.find_path("fixed assets") == "Aktiva > Anlagevermögen"
+    # Ambiguous names: first in document order, or all of them
+    assert tree.find("Sonstige") == 40
+    assert tree.find_all("sonstige") == [("Aktiva > Umlaufvermögen > Sonstige", 40), ("Passiva > Sonstige", 100)]
+    assert tree.find("missing", 0) == 0
+    assert tree.lookup("Passiva > Sonstige") == 100
+    assert tree.lookup("liabilities") == 100
+
+
+def test_plain_mapping():
+    tree = AccountTree({"assets": 1000, "equity": {"subscribed": 25, "reserves": None}})
+    assert tree.paths == ["assets", "equity > subscribed", "equity > reserves"]
+    assert tree.find("subscribed") == 25
+    assert tree.lookup("equity > reserves", "x") is None
+    assert len(AccountTree(None)) == 0
+
+
+def _company(accounts):
+    return {"balance_sheet_accounts": [{"year": 2022, "balance_sheet_accounts": accounts}]}
+
+
+def test_union_paths_keep_the_hierarchy():
+    trees = [
+        AccountTree([{"name": {"de": "Aktiva"}, "value": 1, "children": [{"name": {"de": "B"}, "value": 1}]},
+                     {"name": {"de": "Passiva"}, "value": 1}]),
+        AccountTree([{"name": {"de": "Aktiva"}, "value": 2, "children": [{"name": {"de": "C"}, "value": 2}]}]),
+        AccountTree({"extra": {"x": 1}}),
+    ]
+    assert union_paths(trees) == ["Aktiva", "Aktiva > B", "Aktiva > C", "Passiva", "extra > x"]
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_balance_sheet_matrix(sample_organization_response, sparse):
+    companies = [
+        _company(ACCOUNTS),
+        Company.from_data(_company([{"name": {"de": "Aktiva"}, "value": "50", "children": [
+            {"name": {"de": "Umlaufvermögen"}, "value": 50, "children": [{"name": {"de": "Bank"}, "value": 50}]},
+        ]}])),
+        None,
+        Company.from_data(sample_organization_response),
+    ]
+    matrix = balance_sheet_matrix(companies, 2022, sparse=sparse, labels=["a", "b", "c", "d"])
+    assert list(matrix.index) == ["a", "b", "c", "d"]
+    assert list(matrix.columns) == [
+        "Aktiva",
+        "Aktiva > Anlagevermögen",
+        "Aktiva > Umlaufvermögen",
+        "Aktiva > Umlaufvermögen > Sonstige",
+        "Aktiva > Umlaufvermögen > Bank",
+        "Passiva",
+        "Passiva > Sonstige",
+        "assets",
+    ]
+    assert all(isinstance(dtype, pd.SparseDtype) for dtype in matrix.dtypes) == sparse
+    dense = matrix.sparse.to_dense() if sparse else matrix
+    np.testing.assert_array_equal(dense["Aktiva"].to_numpy(), [100.0, 50.0, np.nan, np.nan])
+    assert dense.loc["b", "Aktiva > Umlaufvermögen > Bank"] == 50.0
+    assert dense.loc["d", "assets"] == 1000.0
+    assert dense.loc["c"].isna().all()
+
+
+def test_account_matrix_selected_accounts():
+    trees = [AccountTree(ACCOUNTS), AccountTree([])]
+    matrix = account_matrix(trees, accounts=["Passiva", "missing"])
+    assert list(matrix.columns) == ["Passiva", "missing"]
+    assert matrix.loc[0, "Passiva"] == 100.0
+    assert matrix["missing"].isna().all()
@@ -1,9 +1,13 @@
+import argparse
 import sys
 import json
 from unittest.mock import patch
 
+import pytest
+
 from handelsregister.cli import main as cli_main, DEFAULT_FEATURES
 from handelsregister.client import Handelsregister
+from handelsregister.exceptions import EnrichmentInterrupted
 
 
 def test_fetch_json(capsys, sample_organization_response, monkeypatch):
@@ -46,3 +50,53 @@ def test_fetch_defaults(monkeypatch, sample_organization_response):
 
     assert called['features'] == DEFAULT_FEATURES
     assert called['ai_search'] == "on-default"
+
+
+def test_merge_without_api_key(tmp_path, capsys, monkeypatch):
+    shard = tmp_path / "out_shard0of1.jsonl"
+    shard.write_text(json.dumps({"_input_index": 0, "id": "a"}) + "\n")
+    output = tmp_path / "merged.jsonl"
+
+    monkeypatch.delenv("HANDELSREGISTER_API_KEY", raising=False)
+    monkeypatch.setattr(sys, "argv", ["prog", "merge", str(shard), "--output", str(output)])
+    cli_main()
+
+    assert json.loads(output.read_text()) == {"id": "a"}
+    assert "Merged 1 records" in capsys.readouterr().out
+
+
+def test_enrich_dry_run(capsys, monkeypatch, sample_json_file):
+    monkeypatch.setenv("HANDELSREGISTER_API_KEY", "x")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["prog", "enrich", sample_json_file, "--query-properties", "name=company_name", "--dry-run"],
+    )
+    with patch.object(Handelsregister, "fetch_organization") as fetch:
+        cli_main()
+    fetch.assert_not_called()
+    out = capsys.readouterr().out
+    assert "New API calls" in out
+
+
+def test_enrich_interrupted_exit_code(capsys, monkeypatch, sample_json_file):
+    def fake_enrich(self, file_path, **kwargs):
+        raise EnrichmentInterrupted("Enrichment interrupted; progress saved")
+
+    monkeypatch.setenv("HANDELSREGISTER_API_KEY", "x")
+    monkeypatch.setattr(Handelsregister, "enrich", fake_enrich)
+    monkeypatch.setattr(sys, "argv", ["prog", "enrich", sample_json_file])
+    with pytest.raises(SystemExit) as exc_info:
+        cli_main()
+    assert exc_info.value.code == 130
+    assert "progress saved" in capsys.readouterr().err
+
+
+def test_parse_duration():
+    from handelsregister.cli import _parse_duration
+
+    assert _parse_duration("30d") == 30 * 86400
+    assert _parse_duration("12h") == 12 * 3600
+    assert _parse_duration("90") == 90
+    with pytest.raises(argparse.ArgumentTypeError):
+        _parse_duration("soon")
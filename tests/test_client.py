@@ -138,6 +138,25 @@ class TestFetchOrganization:
             client.fetch_organization(q="Test Company")
 
 
+    def test_non_numeric_credit_cost(self, mock_client):
+        """A response with an unparsable credit cost is still returned and counts 0 credits."""
+        from handelsregister.metrics import EnrichmentMetrics
+        client, mock_httpx = mock_client
+        data = {"name": "Test Company", "meta": {"request_credit_cost": "n/a"}}
+        
+        mock_response = MagicMock()
+        mock_response.json.return_value = data
+        mock_response.raise_for_status.return_value = None
+        mock_session = MagicMock()
+        mock_session.get.return_value = mock_response
+        mock_httpx.return_value.__enter__.return_value = mock_session
+        
+        client._metrics = EnrichmentMetrics()
+        assert client.fetch_organization(q="Test Company") == data
+        assert client._metrics.report()["requests"] == 1
+        assert client._metrics.report()["credits_used"] == 0
+
+
 class TestHelperMethods:
     def test_build_q_string(self):
         """Test building query strings from item properties."""
@@ -174,9 +193,49 @@ class TestHelperMethods:
         key = client._build_key(item, query_props)
         assert key == ("Test GmbH", "Berlin")
         
-        # Test with empty query properties
+        # Without query properties the key is a stable content hash
         key = client._build_key(item, {})
-        assert isinstance(key, int)  # Should be an id(item)
+        assert key == client._build_key(dict(item), {})
+        assert key == client._build_key(dict(item, _in_file=True), {})
+        assert key != client._build_key(dict(item, id="456"), {})
+
+        # An id column takes precedence; missing ids fall back
+        assert client._build_key(item, query_props, id_column="id") == ("123",)
+        assert client._build_key({"company_name": "Test GmbH", "city": "Berlin", "id": float("nan")},
+                                 query_props, id_column="id") == ("Test GmbH", "Berlin")
+
+        # A missing query field (NaN from a CSV) still matches after a JSON round trip
+        nan_item = {"company_name": "Test GmbH", "city": float("nan")}
+        assert client._build_key(nan_item, query_props) == ("Test GmbH", "")
+        assert client._build_key(json.loads(json.dumps(nan_item)), query_props) == ("Test GmbH", "")
+
+    def test_merge_data_resumes_without_query_properties(self):
+        """Content keys match snapshot items to file items across runs."""
+        client = Handelsregister(api_key="dummy_key")
+        snapshot_data = [
+            {"id": 1, "name": "A", "_in_file": True, "_handelsregister_result": {"name": "A"}},
+            {"id": 2, "name": "Removed", "_in_file": True, "_handelsregister_result": {"name": "R"}},
+        ]
+        file_data = [{"id": 3, "name": "C"}, {"id": 1, "name": "A"}]
+
+        merged = client._merge_data(snapshot_data, file_data, {})
+
+        assert [item["id"] for item in merged] == [1, 2, 3]
+        assert merged[0]["_handelsregister_result"] == {"name": "A"}
+        assert merged[0]["_in_file"] is True
+        assert merged[1]["_in_file"] is False
+        assert "_handelsregister_result" not in merged[2]
+
+    def test_merge_data_by_id_column(self):
+        client = Handelsregister(api_key="dummy_key")
+        snapshot_data = [{"id": 7, "name": "Old Name", "_handelsregister_result": {"name": "X"}}]
+        file_data = [{"id": 7, "name": "New Name"}]
+
+        merged = client._merge_data(snapshot_data, file_data, {"name": "name"}, id_column="id")
+
+        assert len(merged) == 1
+        assert merged[0]["name"] == "New Name"
+        assert merged[0]["_handelsregister_result"] == {"name": "X"}
 
     def test_merge_data(self):
         """Test merging snapshot data with file data."""
@@ -239,6 +298,98 @@ class TestAdditionalFeatures:
         assert "_handelsregister_result" in result.columns
         assert len(result) == 2
 
+    def test_enrich_dataframe_deduplicates_queries(self, monkeypatch):
+        import pandas as pd
+        calls = []
+
+        def fake_fetch(self, q, **kwargs):
+            calls.append(q)
+            return {"name": q, "meta": {"request_credit_cost": 1}}
+
+        monkeypatch.setattr(Handelsregister, "fetch_organization", fake_fetch)
+        client = Handelsregister(api_key="dummy")
+        df = pd.DataFrame({
+            "company_name": [" A GmbH ", "A GmbH", "B AG", None, "C SE"],
+            "city": ["Berlin", "Berlin", float("nan"), float("nan"), "Köln"],
+        }, index=[10, 11, 12, 13, 14])
+
+        result = client.enrich_dataframe(
+            df, query_properties={"name": "company_name", "location": "city"}, max_workers=4
+        )
+
+        assert sorted(calls) == ["A GmbH Berlin", "B AG", "C SE Köln"]
+        assert list(result.index) == [10, 11, 12, 13, 14]
+        assert result.loc[11, "_handelsregister_result"] == {"name": "A GmbH Berlin", "meta": {"request_credit_cost": 1}}
+        assert result.loc[12, "_handelsregister_result"]["name"] == "B AG"
+        assert result.loc[13, "_handelsregister_result"] is None
+        assert "_handelsregister_result" not in df.columns
+
+    def test_enrich_dataframe_stops_after_failure(self, monkeypatch):
+        import time
+        import pandas as pd
+        calls = []
+
+        def fake_fetch(self, q, **kwargs):
+            calls.append(q)
+            if q == "Company 0":
+                raise HandelsregisterError("boom")
+            time.sleep(0.01)
+            return {"name": q}
+
+        monkeypatch.setattr(Handelsregister, "fetch_organization", fake_fetch)
+        client = Handelsregister(api_key="dummy")
+        df = pd.DataFrame({"company_name": [f"Company {i}" for i in range(50)]})
+
+        with pytest.raises(HandelsregisterError):
+            client.enrich_dataframe(df, query_properties={"name": "company_name"}, max_workers=2)
+        # The queries still waiting for a worker were cancelled
+        assert len(calls) < 50
+
+    def test_enrich_dataframe_normalize(self, monkeypatch):
+        import pandas as pd
+
+        def fake_fetch(self, q, **kwargs):
+            return {"name": q, "address": {"coordinates": {"latitude": 52.5, "longitude": 13.4}}}
+
+        monkeypatch.setattr(Handelsregister, "fetch_organization", fake_fetch)
+        client = Handelsregister(api_key="dummy")
+        df = pd.DataFrame({"company_name": ["A GmbH", ""]})
+
+        result = client.enrich_dataframe(df, query_properties={"name": "company_name"}, normalize=True)
+
+        assert "_handelsregister_result" not in result.columns
+        assert result.loc[0, "hr_name"] == "A GmbH"
+        assert result["hr_latitude"].dtype == float
+        assert result.loc[0, "hr_latitude"] == 52.5
+        assert pd.isna(result.loc[1, "hr_name"])
+
+    def test_build_q_series_matches_build_q_string(self):
+        import pandas as pd
+        client = Handelsregister(api_key="dummy")
+        rows = [
+            {"company_name": "Test GmbH", "city": "Berlin"},
+            {"company_name": "  Test GmbH  ", "city": ""},
+            {"company_name": "", "city": "Berlin"},
+            {"company_name": 42, "city": "Berlin"},
+            {"company_name": "Test GmbH", "city": float("nan")},
+        ]
+        query_props = {"name": "company_name", "location": "city", "missing": "not_a_column"}
+
+        q = client._build_q_series(pd.DataFrame(rows), query_props)
+
+        assert list(q) == [client._build_q_string(row, query_props) for row in rows]
+        assert q.iloc[-1] == "Test GmbH"
+
+    def test_enrich_empty_dataframe(self):
+        import pandas as pd
+        client = Handelsregister(api_key="dummy")
+        df = pd.DataFrame({"company_name": pd.Series([], dtype=str)})
+
+        result = client.enrich_dataframe(df, query_properties={"name": "company_name"})
+
+        assert len(result) == 0
+        assert "_handelsregister_result" in result.columns
+
     def test_cli_fetch(self, monkeypatch):
         from handelsregister.cli import main as cli_main
 
@@ -306,6 +457,18 @@ class TestAdditionalFeatures:
         # Only one actual HTTP call due to caching
         assert _.return_value.__enter__.return_value.get.call_count == 1
 
+    def test_cache_size_evicts_oldest(self, mock_client):
+        client, mock_httpx = mock_client
+        client.cache_size = 2
+        client.fetch_organization(q="A")
+        client.fetch_organization(q="B")
+        client.fetch_organization(q="A")  # A becomes most recently used
+        client.fetch_organization(q="C")  # evicts B
+        assert len(client._cache) == 2
+        assert [key[0] for key in client._cache] == ["A", "C"]
+        client.fetch_organization(q="B")
+        assert mock_httpx.return_value.__enter__.return_value.get.call_count == 4
+
     def test_rate_limit(self, sample_organization_response):
         with patch("handelsregister.client.httpx.Client") as mock_httpx, \
              patch("handelsregister.client.time") as mock_time:
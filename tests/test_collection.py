@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from handelsregister import Company, CompanyCollection
+
+
+@pytest.fixture
+def portfolio():
+    return CompanyCollection.from_data([
+        {
+            "name": "A GmbH",
+            "status": "ACTIVE",
+            "legal_form": {"name": "GmbH"},
+            "address": {"city": "München", "coordinates": {"lat": 48.1, "lng": 11.5}},
+            "financial_kpi": [{"year": 2022, "revenue": 300.0, "employees": 3}, {"year": 2021, "revenue": 200.0}],
+        },
+        {
+            "name": "B AG",
+            "status": "INACTIVE",
+            "legal_form": {"name": "AG"},
+            "financial_kpi": [{"year": 2020, "revenue": "50"}],
+        },
+        None,
+        {
+            "name": "C GmbH",
+            "status": "active",
+            "legal_form": "GmbH",
+            "financial_kpi": [{"year": 2022, "revenue": 100.0, "rating": None}],
+        },
+    ])
+
+
+def test_columns(portfolio):
+    assert len(portfolio) == 4
+    assert list(portfolio["name"]) == ["A GmbH", "B AG", "", "C GmbH"]
+    assert list(portfolio["legal_form"]) == ["GmbH", "AG", "", "GmbH"]
+    assert portfolio["latitude"][0] == 48.1
+    assert np.isnan(portfolio["longitude"][1])
+    assert list(portfolio.is_active) == [True, False, False, True]
+
+
+def test_kpis(portfolio):
+    assert list(portfolio.years) == [2020, 2021, 2022]
+    assert portfolio.kpi_names == ["employees", "revenue"]
+    assert portfolio.kpi("revenue").shape == (4, 3)
+    np.testing.assert_array_equal(portfolio.kpi("revenue", 2022), [300.0, np.nan, np.nan, 100.0])
+    assert np.isnan(portfolio.kpi("revenue", 1999)).all()
+    assert np.isnan(portfolio.kpi("unknown", 2022)).all()
+    np.testing.assert_array_equal(portfolio.latest_kpi("revenue"), [300.0, 50.0, np.nan, 100.0])
+
+
+def test_filter_and_sort(portfolio):
+    active = portfolio[portfolio.is_active]
+    assert list(active["name"]) == ["A GmbH", "C GmbH"]
+    assert active.kpi("revenue").shape == (2, 3)
+
+    by_revenue = portfolio.sort_by(portfolio.latest_kpi("revenue"), descending=True)
+    assert list(by_revenue["name"]) == ["A GmbH", "C GmbH", "B AG", ""]
+    assert list(portfolio.sort_by("name", descending=True)["name"]) == ["C GmbH", "B AG", "A GmbH", ""]
+    assert list(portfolio[1:3]["name"]) == ["B AG", ""]
+
+
+def test_aggregate(portfolio):
+    revenue = portfolio.latest_kpi("revenue")
+    assert portfolio.aggregate("legal_form", revenue, "mean") == {"": pytest.approx(np.nan, nan_ok=True), "AG": 50.0, "GmbH": 200.0}
+    assert portfolio.aggregate("legal_form", revenue, "max")["GmbH"] == 300.0
+    assert portfolio.aggregate("legal_form", revenue, "count") == {"": 0.0, "AG": 1.0, "GmbH": 2.0}
+    assert portfolio.value_counts("legal_form") == {"GmbH": 2, "": 1, "AG": 1}
+    with pytest.raises(ValueError, match="Unknown aggregation"):
+        portfolio.aggregate("legal_form", revenue, "mode")
+
+
+def test_to_pandas(portfolio):
+    df = portfolio.to_pandas(kpis=["revenue"])
+    assert len(df) == 4
+    assert list(df.columns[-3:]) == ["revenue_2020", "revenue_2021", "revenue_2022"]
+    assert df.loc[0, "revenue_2021"] == 200.0
+
+
+def test_from_companies(sample_organization_response):
+    companies = [Company.from_data(sample_organization_response), Company.from_data({})]
+    collection = CompanyCollection.from_companies(companies)
+    assert list(collection["name"]) == [sample_organization_response["name"], ""]
+    assert collection.kpi("revenue", 2022)[0] == companies[0].get_financial_kpi_for_year(2022, "revenue")
+    assert collection["register_number"][0] == companies[0].registration_number
+
+
+def test_malformed_coordinates_are_missing():
+    collection = CompanyCollection.from_data([
+        {"address": {"coordinates": {"lat": "48.1", "lng": "n/a"}}},
+        {"address": {"coordinates": {"latitude": 52.5, "longitude": 13.4}}},
+        {"address": {"coordinates": "52.5,13.4"}},
+    ])
+    np.testing.assert_array_equal(collection["latitude"], [48.1, 52.5, np.nan])
+    np.testing.assert_array_equal(collection["longitude"], [np.nan, 13.4, np.nan])
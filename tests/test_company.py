@@ -3,7 +3,7 @@ import os
 import pytest
 from unittest.mock import MagicMock, patch
 
-from handelsregister import Company, Handelsregister
+from handelsregister import Company, Handelsregister, get_default_client, set_default_client
 from handelsregister.exceptions import HandelsregisterError
 
 
@@ -26,6 +26,14 @@ def mock_client(sample_api_response):
     return client
 
 
+@pytest.fixture(autouse=True)
+def reset_default_client():
+    """Keep the shared default client from leaking between tests."""
+    set_default_client(None)
+    yield
+    set_default_client(None)
+
+
 @pytest.fixture
 def company(mock_client):
     """Create a Company instance with mocked client."""
@@ -78,17 +86,142 @@ class TestCompanyInitialization:
         with pytest.raises(HandelsregisterError, match="API Error"):
             Company("KONUX GmbH", client=mock_client)
     
-    def test_init_creates_client_if_none_provided(self):
-        """Test that a client is created if none is provided."""
-        with patch('handelsregister.company.Handelsregister') as MockHandelsregister:
+    def test_init_uses_shared_default_client(self):
+        """Test that companies without a client share one default client."""
+        with patch('handelsregister.client.Handelsregister') as MockHandelsregister:
             mock_instance = MagicMock()
             MockHandelsregister.return_value = mock_instance
             mock_instance.fetch_organization.return_value = {"name": "KONUX GmbH"}
             
             company = Company("KONUX GmbH")
+            other = Company("Example AG")
             
             MockHandelsregister.assert_called_once()
-            assert company._client == mock_instance
+            assert company.client is mock_instance
+            assert other.client is mock_instance
+            assert mock_instance.fetch_organization.call_count == 2
+    
+    def test_set_default_client(self, mock_client):
+        set_default_client(mock_client)
+        company = Company("KONUX GmbH")
+        assert company.client is mock_client
+        assert get_default_client() is mock_client
+        mock_client.fetch_organization.assert_called_once()
+    
+    def test_set_default_client_from_kwargs(self):
+        client = set_default_client(api_key="KEY", rate_limit=0.5)
+        assert get_default_client() is client
+        assert client.api_key == "KEY"
+        assert client.rate_limit == 0.5
+    
+    def test_default_client_created_once_across_threads(self):
+        import threading
+        with patch('handelsregister.client.Handelsregister') as MockHandelsregister:
+            MockHandelsregister.side_effect = lambda: MagicMock()
+            clients = []
+            threads = [threading.Thread(target=lambda: clients.append(get_default_client())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert MockHandelsregister.call_count == 1
+            assert all(client is clients[0] for client in clients)
+
+
+class TestLazyCompany:
+    """Tests for building companies without an immediate API call."""
+    
+    def test_lazy_fetches_on_first_access(self, mock_client):
+        company = Company("KONUX GmbH", client=mock_client, lazy=True)
+        assert not company.is_loaded
+        mock_client.fetch_organization.assert_not_called()
+        assert repr(company) == "Company(query='KONUX GmbH', loaded=False)"
+        
+        assert company.name == "KONUX GmbH"
+        assert company.status == "ACTIVE"
+        assert company.is_loaded
+        mock_client.fetch_organization.assert_called_once_with(q="KONUX GmbH", features=[], ai_search="off")
+    
+    def test_from_data(self, sample_api_response):
+        with patch('handelsregister.client.Handelsregister') as MockHandelsregister:
+            company = Company.from_data(sample_api_response)
+            assert company.is_loaded
+            assert company.name == "KONUX GmbH"
+            assert company.registration_number == "210918"
+            MockHandelsregister.assert_not_called()
+    
+    def test_from_entity_id(self, mock_client, sample_api_response):
+        company = Company.from_entity_id("abc123", client=mock_client, features=["financial_kpi"])
+        assert company.entity_id == "abc123"
+        company.fetch_document("AD")
+        mock_client.fetch_document.assert_called_once_with(
+            company_id="abc123", document_type="AD", output_file=None
+        )
+        mock_client.fetch_organization.assert_not_called()
+        
+        assert company.name == sample_api_response["name"]
+        mock_client.fetch_organization.assert_called_once_with(
+            q="abc123", features=["financial_kpi"], ai_search="off"
+        )
+        assert company.entity_id == sample_api_response["entity_id"]
+
+
+class TestMissingFeatures:
+    """Tests for fetching feature sections on demand."""
+    
+    def test_missing_feature_is_fetched_and_merged(self, sample_api_response):
+        base = {k: v for k, v in sample_api_response.items() if k != "financial_kpi"}
+        client = MagicMock(spec=Handelsregister)
+        client.fetch_organization.side_effect = [base, sample_api_response]
+        
+        company = Company("KONUX GmbH", client=client)
+        assert company.financial_kpi == sample_api_response["financial_kpi"]
+        assert company.data["financial_kpi"] == sample_api_response["financial_kpi"]
+        client.fetch_organization.assert_called_with(
+            q="KONUX GmbH", features=["financial_kpi"], ai_search="off"
+        )
+        
+        # Merged into the data, so it is not fetched again
+        company.get_financial_kpi_for_year(2022)
+        assert client.fetch_organization.call_count == 2
+    
+    def test_missing_section_in_response_is_not_refetched(self, mock_client):
+        mock_client.fetch_organization.return_value = {"name": "KONUX GmbH"}
+        company = Company("KONUX GmbH", client=mock_client)
+        assert company.financial_years == []
+        assert company.financial_kpi == []
+        assert mock_client.fetch_organization.call_count == 2
+        mock_client.fetch_organization.assert_called_with(
+            q="KONUX GmbH",
+            features=["financial_kpi", "balance_sheet_accounts", "profit_and_loss_account"],
+            ai_search="off",
+        )
+    
+    def test_sections_of_another_entity_are_not_merged(self, sample_api_response):
+        base = {k: v for k, v in sample_api_response.items() if k != "financial_kpi"}
+        other = dict(sample_api_response, entity_id="another-entity")
+        client = MagicMock(spec=Handelsregister)
+        client.fetch_organization.side_effect = [base, other]
+        
+        company = Company("KONUX GmbH", client=client)
+        assert company.financial_kpi == []
+        assert "financial_kpi" not in company.data
+        assert company.entity_id == sample_api_response["entity_id"]
+        # Not requested again
+        company.get_financial_kpi_for_year(2022)
+        assert client.fetch_organization.call_count == 2
+    
+    def test_lazy_company_requests_features_in_first_call(self, mock_client):
+        company = Company("KONUX GmbH", client=mock_client, features=["related_persons"], lazy=True)
+        company.financial_kpi
+        mock_client.fetch_organization.assert_called_once_with(
+            q="KONUX GmbH", features=["related_persons", "financial_kpi"], ai_search="off"
+        )
+    
+    def test_fetch_missing_disabled(self, mock_client):
+        company = Company.from_data({"name": "KONUX GmbH"}, client=mock_client)
+        assert company.related_persons == {"current": [], "past": []}
+        mock_client.fetch_organization.assert_not_called()
 
 
 class TestCompanyBasicProperties:
@@ -323,6 +456,62 @@ class TestCompanyFinancialProperties:
         assert company.get_profit_and_loss_for_year(9999) == {}
 
 
+class TestYearIndexes:
+    """Tests for the cached year lookups."""
+    
+    def test_index_follows_data_changes(self, company):
+        assert company.get_financial_kpi_for_year(1999) == {}
+        years = company.financial_years
+        
+        company.data["financial_kpi"].append({"year": 1999, "revenue": 1})
+        assert company.get_financial_kpi_for_year(1999, "revenue") == 1
+        assert company.financial_years == sorted(set(years) | {1999}, reverse=True)
+        
+        company.data["balance_sheet_accounts"] = [{"year": 1998}]
+        assert company.get_balance_sheet_for_year(1998) == {"year": 1998}
+        assert 1998 in company.financial_years
+    
+    def test_in_place_edits_need_invalidation(self, company):
+        entry = company.financial_kpi[0]
+        old_year = entry["year"]
+        assert company.get_financial_kpi_for_year(old_year) is entry
+        entry["year"] = 1900
+        assert company.get_financial_kpi_for_year(1900) == {}
+        company.invalidate_indexes()
+        assert company.get_financial_kpi_for_year(1900) is entry
+        assert company.get_financial_kpi_for_year(old_year) != entry
+    
+    def test_financial_years_returns_a_copy(self, company):
+        company.financial_years.clear()
+        assert company.financial_years
+    
+    def test_no_instance_dict(self, company):
+        assert not hasattr(company, "__dict__")
+
+
+class TestAccountTrees:
+    """Tests for the indexed balance sheet and P&L accounts."""
+    
+    def test_balance_sheet_tree(self, company):
+        tree = company.balance_sheet_tree(2022)
+        assert tree.get("assets") == 1000
+        assert company.balance_sheet_tree(2022) is tree
+        assert len(company.balance_sheet_tree(1999)) == 0
+    
+    def test_profit_and_loss_tree_from_entry(self, company):
+        assert company.profit_and_loss_tree(2022).find("profit") == 1234.56
+    
+    def test_tree_is_rebuilt_when_data_changes(self, company):
+        tree = company.balance_sheet_tree(2022)
+        company.data["balance_sheet_accounts"] = [{
+            "year": 2022,
+            "balance_sheet_accounts": [{"name": {"de": "Aktiva", "en": "Assets"}, "value": 5}],
+        }]
+        new_tree = company.balance_sheet_tree(2022)
+        assert new_tree is not tree
+        assert new_tree.find("assets") == 5
+
+
 class TestCompanyHistoryProperties:
     """Tests for history property access and methods."""
     
@@ -0,0 +1,117 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from handelsregister import flatten
+from handelsregister.formats import ERROR_FIELD, FETCHED_AT_FIELD
+
+
+ACCOUNTS = [
+    {
+        "name": {"de": "Aktiva", "en": "Assets"},
+        "value": 100,
+        "children": [
+            {"name": {"en": "Fixed assets"}, "value": 60},
+            {"name": {"in_report": "Umlaufvermögen"}, "children": [{"name": {"de": "Kasse"}, "value": 40}]},
+        ],
+    },
+    {"other": {"nested": 1, "list": [2, "x"]}, "plain": None},
+]
+
+
+def test_account_lines_tree_and_generic():
+    assert flatten.account_lines(ACCOUNTS) == [
+        "Aktiva: 100",
+        "> Fixed assets: 60",
+        "> Umlaufvermögen",
+        "> > Kasse: 40",
+        "other > nested: 1",
+        "other > list > 2",
+        "other > list > x",
+        "plain: None",
+    ]
+    assert flatten.account_lines(5, "x: ") == ["x: 5"]
+
+
+def test_flatten_result(sample_organization_response):
+    flat = flatten.flatten_result(sample_organization_response)
+    assert list(flat) == [k for k in flatten.SIMPLE_KEYS if k in sample_organization_response] + [
+        key for key, _ in flatten.NESTED_FIELDS if sample_organization_response.get(key)
+    ]
+    assert flat["balance_sheet_accounts"] == "2022: assets: 1000"
+    assert flat["profit_and_loss_account"] == "2022: profit: 1234.56"
+    assert flat["financial_kpi"].startswith("2022: revenue: 1213678.77, employees: 123 | 2021:")
+    assert flatten.flatten_result(None) == {}
+
+
+def test_output_rows_share_flattened_results(monkeypatch, sample_organization_response):
+    calls = []
+    original = flatten.flatten_result
+
+    def counting(result):
+        calls.append(result)
+        return original(result)
+
+    monkeypatch.setattr(flatten, "flatten_result", counting)
+    items = [
+        {"id": i, "_in_file": True, "_handelsregister_result": sample_organization_response}
+        for i in range(3)
+    ]
+
+    rows = flatten.output_rows(items)
+
+    assert len(calls) == 1
+    assert [row["id"] for row in rows] == [0, 1, 2]
+    assert rows[0]["hr_name"] == sample_organization_response["name"]
+    assert "_in_file" not in rows[0]
+
+
+def test_output_rows_process_pool(sample_organization_response):
+    items = [{"id": i, "_handelsregister_result": dict(sample_organization_response, name=f"C{i}")} for i in range(5)]
+    assert flatten.output_rows(items, processes=2, chunksize=2) == flatten.output_rows(items)
+
+
+def test_process_pool_reads_ahead_a_bounded_window(sample_organization_response):
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield {"id": i, "_handelsregister_result": sample_organization_response}
+
+    rows = flatten.iter_output_rows(items(), processes=2, chunksize=3)
+    assert next(rows)["id"] == 0
+    # At most 2 * processes chunks are in flight
+    assert len(consumed) <= 2 * 2 * 3
+    assert [row["id"] for row in rows] == list(range(1, 100))
+
+
+@pytest.fixture(scope="module")
+def flatten_benchmark():
+    """The benchmark script, which keeps the flattening the client used before as LegacyFlattener."""
+    path = Path(__file__).resolve().parents[1] / "benchmarks" / "flatten_benchmark.py"
+    if not path.exists():
+        pytest.skip("benchmarks are not part of this checkout")
+    spec = importlib.util.spec_from_file_location("flatten_benchmark", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_output_rows_match_legacy_layout(flatten_benchmark, sample_organization_response):
+    items = flatten_benchmark.make_items(rows=12, unique_results=4)
+    items.append({"id": "sample", "_handelsregister_result": sample_organization_response})
+    items.append({"id": "failed", "_handelsregister_result": None})
+    legacy = flatten_benchmark.LegacyFlattener()
+
+    for item in items:
+        result = item["_handelsregister_result"]
+        assert flatten.flatten_result(result) == legacy._flatten_result(result)
+        assert flatten.format_summary(result) == legacy._format_flat_result(result)
+    rows = flatten.output_rows(items)
+    for item, row in zip(items, rows):
+        # Status columns added after the legacy flattener
+        assert row.pop(ERROR_FIELD) is None
+        assert row.pop(FETCHED_AT_FIELD) is None
+        assert row == legacy.output_row(item)
@@ -0,0 +1,166 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from handelsregister import formats
+
+
+def test_iter_records_jsonl(sample_jsonl_file):
+    records = list(formats.iter_records(sample_jsonl_file, "jsonl"))
+    assert [r["id"] for r in records] == ["1", "2", "3"]
+
+
+def test_iter_records_csv_chunks(sample_csv_file):
+    records = list(formats.iter_records(sample_csv_file, "csv", chunk_size=1))
+    assert [r["company_name"] for r in records] == ["OroraTech GmbH", "Example AG", "Test GmbH"]
+
+
+def test_iter_records_json_requires_list(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps({"not": "a list"}))
+    with pytest.raises(ValueError, match="must be a list"):
+        list(formats.iter_records(str(path), "json"))
+
+
+def test_account_items_tree_and_mapping():
+    tree = [{
+        "name": {"de": "Aktiva", "en": "Assets"},
+        "value": 100,
+        "children": [
+            {"name": {"de": "Umlaufvermögen"}, "value": 60, "children": []},
+            {"name": {"de": "Anlagevermögen"}, "value": 40},
+        ],
+    }]
+    assert list(formats.account_items(tree)) == [
+        ("Aktiva", 100),
+        ("Aktiva > Umlaufvermögen", 60),
+        ("Aktiva > Anlagevermögen", 40),
+    ]
+    assert list(formats.account_items({"assets": 1000, "equity": {"subscribed": 25}})) == [
+        ("assets", 1000),
+        ("equity > subscribed", 25),
+    ]
+
+
+def test_result_columns(sample_organization_response):
+    row = formats.result_columns(sample_organization_response)
+    assert row["hr_name"] == sample_organization_response["name"]
+    assert row["hr_registration_number"] == sample_organization_response["registration"]["register_number"]
+    assert {"year": 2022, "metric": "revenue", "value": 1213678.77} in row["hr_financial_kpi"]
+    assert row["hr_balance_sheet_accounts"] == [{"year": 2022, "path": "assets", "value": 1000.0}]
+    assert row["hr_request_credit_cost"] == 35
+
+
+def test_result_columns_empty_result():
+    row = formats.result_columns(None)
+    assert row["hr_name"] is None
+    assert row["hr_financial_kpi"] is None
+
+
+def test_parquet_writer_row_groups(tmp_path, sample_organization_response):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "out.parquet"
+    items = [
+        {"id": i, "name": f"Company {i}", "_handelsregister_result": sample_organization_response}
+        for i in range(5)
+    ]
+    with formats.ParquetWriter(str(path), ["id", "name", "_handelsregister_result"], lambda r: "s", 2) as writer:
+        for item in items:
+            writer.write(item)
+
+    parquet_file = pq.ParquetFile(str(path))
+    assert parquet_file.metadata.num_rows == 5
+    assert parquet_file.metadata.num_row_groups == 3
+    table = parquet_file.read()
+    assert "_handelsregister_result" not in table.column_names
+    assert str(table.schema.field("hr_financial_kpi").type).startswith("list<")
+    assert table.column("hr_name").to_pylist()[0] == sample_organization_response["name"]
+
+
+def test_parquet_writer_types_change_after_first_row_group(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    path = tmp_path / "out.parquet"
+    schema = pa.schema([("id", pa.int64())])
+    with formats.ParquetWriter(str(path), ["id", "zip", "tags"], lambda r: "", 2, schema) as writer:
+        for i, zip_code in enumerate([10115, 10117, "D-80331", None]):
+            writer.write({"id": i, "zip": zip_code, "tags": ["a"] if i == 3 else None})
+
+    table = pa.parquet.read_table(str(path))
+    assert table.schema.field("id").type == pa.int64()
+    assert table.schema.field("zip").type == pa.string()
+    assert table.column("zip").to_pylist() == ["10115", "10117", "D-80331", None]
+    assert table.column("tags").to_pylist() == [None, None, None, '["a"]']
+
+
+def test_field_tree_shorter_path_wins():
+    tree = formats.field_tree(["name", "registration.court", "registration", "address.city"])
+    assert tree == {"name": None, "registration": None, "address": {"city": None}}
+
+
+def test_project_nested_and_lists():
+    result = {
+        "name": "Test GmbH",
+        "registration": {"court": "Berlin", "register_number": "HRB 1"},
+        "financial_kpi": [{"year": 2022, "revenue": 1}, {"year": 2023, "revenue": 2}],
+        "publications": [{"text": "long"}],
+    }
+    tree = formats.field_tree(["name", "registration.register_number", "financial_kpi.year", "missing.path"])
+
+    assert formats.project(result, tree) == {
+        "name": "Test GmbH",
+        "registration": {"register_number": "HRB 1"},
+        "financial_kpi": [{"year": 2022}, {"year": 2023}],
+    }
+    assert formats.project(None, tree) is None
+    assert formats.project(result, None) is result
+
+
+def test_flat_columns_projection():
+    columns = formats.flat_columns({"id": 1}, formats.field_tree(["name", "registration.court"]))
+    assert columns == [
+        "id", "hr_name", "hr_registration", "_handelsregister_summary", "_handelsregister_error",
+        "_handelsregister_fetched_at",
+    ]
+
+
+def test_xlsx_writer_splits_sheets(tmp_path):
+    path = tmp_path / "out.xlsx"
+    with formats.XLSXWriter(str(path), ["id", "data", "missing"], sheet_rows=3) as writer:
+        for i in range(5):
+            writer.write({"id": i, "data": {"nested": [i]} if i == 0 else float("nan")})
+
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    assert wb.sheetnames == ["Sheet1", "Sheet1 (2)", "Sheet1 (3)"]
+    wb.close()
+
+    records = list(formats.iter_records(str(path), "xlsx"))
+    assert [r["id"] for r in records] == [0, 1, 2, 3, 4]
+    assert records[0]["data"] == '{"nested": [0]}'
+    assert records[1]["data"] is None
+    assert len(formats.read_xlsx(str(path))) == 5
+
+
+def test_xlsx_writer_without_split(tmp_path):
+    with pytest.raises(ValueError):
+        with formats.XLSXWriter(str(tmp_path / "out.xlsx"), ["id"], sheet_rows=2, split_sheets=False) as writer:
+            writer.write({"id": 1})
+            writer.write({"id": 2})
+
+
+def test_csv_writer_keeps_first_record_layout(tmp_path):
+    path = tmp_path / "out.csv"
+    with patch.object(formats.logger, "warning") as warning:
+        with formats.open_writer(str(path), "csv", {"id": 1}) as writer:
+            writer.write({"id": 1, "hr_name": "A"})
+            writer.write({"id": 2, "hr_name": "B", "late": "x"})
+            writer.write({"id": 3, "late": "y"})
+
+    header, *rows = path.read_text(encoding="utf-8").splitlines()
+    assert header.split(",")[:2] == ["id", "hr_name"]
+    assert "late" not in header
+    assert [row.split(",")[0] for row in rows] == ["1", "2", "3"]
+    # One warning, naming the dropped column
+    warning.assert_called_once()
+    assert "late" in warning.call_args.args[2]
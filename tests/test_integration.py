@@ -1,9 +1,19 @@
+import csv
+import io
 import json
 import os
+import signal
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 import pytest
 
-from handelsregister import Handelsregister
+import pandas as pd
+
+from handelsregister import Handelsregister, formats
+from handelsregister.exceptions import AuthenticationError, EnrichmentInterrupted, HandelsregisterError
+from handelsregister.spill import SPILL_FIELD
+from handelsregister.workqueue import WorkQueue
 
 
 class TestEnrichIntegration:
@@ -111,6 +121,44 @@ class TestEnrichIntegration:
         example_item = next(item for item in snapshot_data if item["company_name"] == "Example AG")
         assert example_item["_handelsregister_result"] == sample_organization_response
 
+    def test_resume_with_missing_query_field(self, mock_client, tmp_path, snapshot_directory):
+        """Rows with an empty CSV cell (NaN) are matched to their snapshot items."""
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        input_file = tmp_path / "input.csv"
+        input_file.write_text("company_name,city\nA GmbH,\nB AG,Berlin\n")
+        kwargs = dict(
+            file_path=str(input_file),
+            input_type="csv",
+            query_properties={"name": "company_name", "location": "city"},
+            snapshot_dir=snapshot_directory,
+            output_file=str(tmp_path / "out.csv"),
+        )
+
+        client.enrich(**kwargs)
+        client._cache.clear()
+        client.enrich(**kwargs)
+
+        assert mock_session.get.call_count == 2
+
+    def test_csv_and_xlsx_share_the_column_layout(self, mock_client, sample_json_file, tmp_path):
+        client, _ = mock_client
+        columns = {}
+        for output_type in ("csv", "xlsx"):
+            output_file = tmp_path / f"out.{output_type}"
+            client.enrich(
+                file_path=sample_json_file,
+                query_properties={"name": "company_name", "location": "city"},
+                output_file=str(output_file),
+                output_type=output_type,
+            )
+            columns[output_type] = list(
+                pd.read_csv(output_file) if output_type == "csv" else formats.read_xlsx(str(output_file))
+            )
+
+        assert columns["csv"] == columns["xlsx"]
+        assert [c for c in columns["csv"] if c.startswith("hr_")] == [f"hr_{k}" for k in formats.FLAT_RESULT_KEYS]
+
     def test_invalid_input_type(self, mock_client):
         """Test enrich with invalid input_type."""
         client, _ = mock_client
@@ -158,6 +206,813 @@ class TestEnrichIntegration:
         )
         assert mock_session.get.call_count == 3
 
+    def test_enrich_parquet_roundtrip(self, mock_client, sample_json_file, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        client, mock_httpx = mock_client
+        parquet_input = tmp_path / "in.parquet"
+
+        client.enrich(
+            file_path=sample_json_file,
+            input_type="json",
+            query_properties={"name": "company_name", "location": "city"},
+            output_file=str(parquet_input),
+            output_type="parquet",
+        )
+        client.enrich(
+            file_path=str(parquet_input),
+            input_type="parquet",
+            query_properties={"name": "company_name", "location": "city"},
+        )
+
+        output = tmp_path / "in_handelsregister_ai_enriched.parquet"
+        table = pq.read_table(str(output))
+        assert table.num_rows == 3
+        assert "hr_financial_kpi" in table.column_names
+        # The second run hits the in-memory cache only
+        assert mock_httpx.return_value.__enter__.return_value.get.call_count == 3
+
+
+class TestFailedItems:
+    @pytest.fixture
+    def flaky_fetch(self, monkeypatch):
+        """fetch_organization that fails for 'Flaky' a given number of times."""
+        calls = []
+
+        def install(failures, error=HandelsregisterError("boom")):
+            def fake_fetch(self, q="", **kwargs):
+                calls.append(q)
+                if q.startswith("Flaky") and calls.count(q) <= failures:
+                    raise error
+                return {"name": q}
+            monkeypatch.setattr(Handelsregister, "fetch_organization", fake_fetch)
+            return calls
+
+        return install
+
+    @pytest.fixture
+    def input_file(self, tmp_path):
+        path = tmp_path / "input.json"
+        path.write_text(json.dumps([
+            {"company_name": "Flaky GmbH"},
+            {"company_name": "Solid GmbH"},
+        ]))
+        return str(path)
+
+    def test_failed_item_is_retried_at_the_end(self, flaky_fetch, input_file, tmp_path):
+        calls = flaky_fetch(failures=1)
+        output_file = tmp_path / "out.json"
+
+        Handelsregister(api_key="dummy").enrich(
+            file_path=input_file, query_properties={"name": "company_name"}, output_file=str(output_file)
+        )
+
+        assert calls == ["Flaky GmbH", "Solid GmbH", "Flaky GmbH"]
+        items = json.loads(output_file.read_text())
+        assert [item["_handelsregister_result"]["name"] for item in items] == ["Flaky GmbH", "Solid GmbH"]
+        assert "_handelsregister_error" not in items[0]
+
+    def test_persistent_failure_is_recorded(self, flaky_fetch, input_file, tmp_path, snapshot_directory):
+        calls = flaky_fetch(failures=10)
+        output_file = tmp_path / "out.csv"
+
+        Handelsregister(api_key="dummy").enrich(
+            file_path=input_file,
+            query_properties={"name": "company_name"},
+            snapshot_dir=snapshot_directory,
+            output_file=str(output_file),
+            output_type="csv",
+            retry_failed=2,
+        )
+
+        assert calls.count("Flaky GmbH") == 3
+        rows = pd.read_csv(output_file)
+        assert rows.loc[0, "_handelsregister_error"] == "HandelsregisterError: boom (attempts: 3)"
+        assert rows.loc[1, "hr_name"] == "Solid GmbH"
+
+        # The next run only retries the failed item
+        Handelsregister(api_key="dummy").enrich(
+            file_path=input_file,
+            query_properties={"name": "company_name"},
+            snapshot_dir=snapshot_directory,
+            output_file=str(output_file),
+            output_type="csv",
+            retry_failed=0,
+        )
+        assert calls.count("Flaky GmbH") == 4
+        assert calls.count("Solid GmbH") == 1
+        # The attempts of both runs are counted
+        rows = pd.read_csv(output_file)
+        assert rows.loc[0, "_handelsregister_error"] == "HandelsregisterError: boom (attempts: 4)"
+
+    def test_authentication_error_aborts(self, flaky_fetch, input_file):
+        flaky_fetch(failures=1, error=AuthenticationError("bad key"))
+
+        with pytest.raises(AuthenticationError):
+            Handelsregister(api_key="dummy").enrich(file_path=input_file, query_properties={"name": "company_name"})
+
+    def test_stream_records_failures(self, flaky_fetch, tmp_path):
+        flaky_fetch(failures=10)
+        input_file = tmp_path / "input.jsonl"
+        input_file.write_text('{"company_name": "Flaky GmbH"}\n{"company_name": "Solid GmbH"}\n')
+        output_file = tmp_path / "out.jsonl"
+
+        Handelsregister(api_key="dummy").enrich(
+            file_path=str(input_file),
+            input_type="jsonl",
+            query_properties={"name": "company_name"},
+            output_file=str(output_file),
+            stream=True,
+        )
+
+        items = [json.loads(line) for line in output_file.read_text().splitlines()]
+        assert items[0]["_handelsregister_error"]["type"] == "HandelsregisterError"
+        assert items[1]["_handelsregister_result"] == {"name": "Solid GmbH"}
+
+
+class TestInterruptedEnrich:
+    @pytest.fixture
+    def interrupting_fetch(self, monkeypatch):
+        """fetch_organization that sends the process a signal on its second call."""
+        calls = []
+
+        def install(signum=signal.SIGTERM):
+            def fake_fetch(self, q="", **kwargs):
+                calls.append(q)
+                if len(calls) == 2:
+                    os.kill(os.getpid(), signum)
+                return {"name": q}
+            monkeypatch.setattr(Handelsregister, "fetch_organization", fake_fetch)
+            return calls
+
+        return install
+
+    @pytest.fixture
+    def input_rows(self):
+        return [{"company_name": f"Company {i}"} for i in range(5)]
+
+    def test_snapshot_saved_and_resumed(self, interrupting_fetch, input_rows, tmp_path, snapshot_directory):
+        calls = interrupting_fetch(signal.SIGINT)
+        input_file = tmp_path / "input.json"
+        input_file.write_text(json.dumps(input_rows))
+        previous_handler = signal.getsignal(signal.SIGINT)
+        options = dict(
+            file_path=str(input_file),
+            query_properties={"name": "company_name"},
+            snapshot_dir=snapshot_directory,
+            snapshot_steps=100,
+        )
+
+        with pytest.raises(EnrichmentInterrupted, match="run again to resume"):
+            Handelsregister(api_key="dummy").enrich(**options)
+
+        # The in-flight item was finished, nothing new was started
+        assert len(calls) == 2
+        assert signal.getsignal(signal.SIGINT) is previous_handler
+        assert not (tmp_path / "input_handelsregister_ai_enriched.json").exists()
+
+        Handelsregister(api_key="dummy").enrich(**options)
+        assert calls == [row["company_name"] for row in input_rows]
+
+    def test_stream_checkpoint_flushed(self, interrupting_fetch, input_rows, tmp_path, snapshot_directory):
+        calls = interrupting_fetch()
+        input_file = tmp_path / "input.jsonl"
+        input_file.write_text("".join(json.dumps(row) + "\n" for row in input_rows))
+        output_file = tmp_path / "out.jsonl"
+        options = dict(
+            file_path=str(input_file),
+            input_type="jsonl",
+            query_properties={"name": "company_name"},
+            snapshot_dir=snapshot_directory,
+            snapshot_steps=100,
+            output_file=str(output_file),
+            stream=True,
+        )
+
+        with pytest.raises(EnrichmentInterrupted):
+            Handelsregister(api_key="dummy").enrich(**options)
+        assert len(output_file.read_text().splitlines()) == 2
+
+        Handelsregister(api_key="dummy").enrich(**options)
+        assert len(calls) == 5
+        items = [json.loads(line) for line in output_file.read_text().splitlines()]
+        assert [item["company_name"] for item in items] == [row["company_name"] for row in input_rows]
+
+    def test_queue_releases_leases(self, interrupting_fetch, input_rows, tmp_path):
+        calls = interrupting_fetch()
+        input_file = tmp_path / "input.jsonl"
+        input_file.write_text("".join(json.dumps(row) + "\n" for row in input_rows))
+        queue_path = str(tmp_path / "queue.sqlite")
+
+        with pytest.raises(EnrichmentInterrupted):
+            Handelsregister(api_key="dummy").enrich(
+                file_path=str(input_file),
+                input_type="jsonl",
+                query_properties={"name": "company_name"},
+                queue_path=queue_path,
+            )
+
+        with WorkQueue(queue_path) as queue:
+            assert queue.counts() == {"pending": 3, "leased": 0, "done": 2}
+        assert len(calls) == 2
+
+
+class TestFieldProjection:
+    def test_enrich_keeps_only_requested_fields(self, mock_client, sample_jsonl_file, tmp_path, snapshot_directory):
+        client, _ = mock_client
+        output_file = tmp_path / "out.jsonl"
+
+        client.enrich(
+            file_path=sample_jsonl_file,
+            input_type="jsonl",
+            query_properties={"name": "company_name", "location": "city"},
+            snapshot_dir=snapshot_directory,
+            output_file=str(output_file),
+            fields=["name", "registration.register_number"],
+        )
+
+        items = [json.loads(line) for line in output_file.read_text().splitlines()]
+        result = items[0]["_handelsregister_result"]
+        assert set(result) <= {"name", "registration", "meta"}
+        assert set(result["registration"]) == {"register_number"}
+        # The field selection is part of the snapshot identity
+        assert not any(name.startswith("snapshot_noparams") for name in os.listdir(snapshot_directory))
+
+    def test_stream_csv_has_only_projected_columns(self, mock_client, sample_csv_file, tmp_path):
+        client, _ = mock_client
+        output_file = tmp_path / "out.csv"
+
+        client.enrich(
+            file_path=sample_csv_file,
+            input_type="csv",
+            query_properties={"name": "company_name", "location": "city"},
+            output_file=str(output_file),
+            stream=True,
+            fields=["name", "status"],
+        )
+
+        columns = list(pd.read_csv(output_file).columns)
+        assert [c for c in columns if c.startswith("hr_")] == ["hr_name", "hr_status"]
+
+
+class TestSpilledResults:
+    def test_snapshots_hold_references(self, mock_client, sample_json_file, tmp_path, snapshot_directory,
+                                       sample_organization_response):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        output_file = tmp_path / "out.json"
+        kwargs = dict(
+            file_path=sample_json_file,
+            query_properties={"name": "company_name", "location": "city"},
+            snapshot_dir=snapshot_directory,
+            output_file=str(output_file),
+        )
+
+        client.enrich(spill_results=True, **kwargs)
+
+        snapshot_file = client._get_latest_snapshot(Path(snapshot_directory), "noparams")
+        with open(snapshot_file) as f:
+            snapshot = json.load(f)
+        assert all(item["_handelsregister_result"] is None for item in snapshot)
+        assert all(SPILL_FIELD in item for item in snapshot)
+        records = json.loads(output_file.read_text())
+        assert [r["_handelsregister_result"] for r in records] == [sample_organization_response] * 3
+        assert all(SPILL_FIELD not in r for r in records)
+
+        # A run without spilling takes the results back from the store
+        client._cache.clear()
+        client.enrich(**kwargs)
+        assert mock_session.get.call_count == 3
+        records = json.loads(output_file.read_text())
+        assert [r["_handelsregister_result"] for r in records] == [sample_organization_response] * 3
+
+    def test_plan_reads_credit_costs_from_store(self, mock_client, sample_json_file, snapshot_directory,
+                                                sample_organization_response):
+        client, _ = mock_client
+        kwargs = dict(
+            file_path=sample_json_file,
+            query_properties={"name": "company_name", "location": "city"},
+            snapshot_dir=snapshot_directory,
+        )
+        client.enrich(spill_results=True, **kwargs)
+        client._cache.clear()
+
+        plan = client.plan_enrichment(**kwargs)
+
+        assert plan["already_enriched"] == 3
+        assert plan["avg_credit_cost"] == float(sample_organization_response["meta"]["request_credit_cost"])
+
+    def test_missing_store_enriches_again(self, mock_client, sample_json_file, snapshot_directory):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        kwargs = dict(
+            file_path=sample_json_file,
+            query_properties={"name": "company_name", "location": "city"},
+            snapshot_dir=snapshot_directory,
+            spill_results=True,
+        )
+        client.enrich(**kwargs)
+        os.remove(os.path.join(snapshot_directory, "results_noparams.sqlite"))
+        client._cache.clear()
+
+        client.enrich(**kwargs)
+
+        assert mock_session.get.call_count == 6
+
+
+class TestRefreshStaleItems:
+    @pytest.fixture
+    def fetch_calls(self, monkeypatch):
+        calls = []
+        failing = set()
+
+        def fake_fetch(self, q="", **kwargs):
+            calls.append(q)
+            if q in failing:
+                raise HandelsregisterError("boom")
+            return {"name": q, "run": len(calls)}
+
+        monkeypatch.setattr(Handelsregister, "fetch_organization", fake_fetch)
+        return calls, failing
+
+    @pytest.fixture
+    def enriched_run(self, fetch_calls, tmp_path, snapshot_directory):
+        """Enrich three rows, then age their timestamps to 40 days, 10 days and unknown."""
+        input_file = tmp_path / "input.json"
+        input_file.write_text(json.dumps([{"company_name": name} for name in ("A", "B", "C")]))
+        kwargs = dict(
+            file_path=str(input_file),
+            query_properties={"name": "company_name"},
+            snapshot_dir=snapshot_directory,
+            output_file=str(tmp_path / "out.json"),
+        )
+        client = Handelsregister(api_key="dummy", cache_enabled=False)
+        client.enrich(**kwargs)
+        assert all(item[formats.FETCHED_AT_FIELD] for item in json.loads((tmp_path / "out.json").read_text()))
+
+        snapshot_file = client._get_latest_snapshot(Path(snapshot_directory), "noparams")
+        with open(snapshot_file) as f:
+            items = json.load(f)
+        now = datetime.now(timezone.utc)
+        items[0][formats.FETCHED_AT_FIELD] = (now - timedelta(days=40)).isoformat()
+        items[1][formats.FETCHED_AT_FIELD] = (now - timedelta(days=10)).isoformat()
+        del items[2][formats.FETCHED_AT_FIELD]
+        with open(snapshot_file, "w") as f:
+            json.dump(items, f)
+        fetch_calls[0].clear()
+        return client, kwargs
+
+    def test_refresh_oldest_first_with_cap(self, fetch_calls, enriched_run):
+        client, kwargs = enriched_run
+        calls, _ = fetch_calls
+
+        plan = client.enrich(max_age=timedelta(days=30), dry_run=True, **kwargs)
+        assert plan["stale"] == 2
+        assert plan["new_calls"] == 2
+
+        client.enrich(max_age=timedelta(days=30), max_refresh=1, **kwargs)
+        assert calls == ["C"]
+
+        client.enrich(max_age=30 * 86400, **kwargs)
+        assert calls == ["C", "A"]
+
+        client.enrich(max_age=30 * 86400, **kwargs)
+        assert calls == ["C", "A"]
+
+    def test_failed_refresh_keeps_result(self, fetch_calls, enriched_run):
+        client, kwargs = enriched_run
+        calls, failing = fetch_calls
+        failing.add("A")
+
+        client.enrich(max_age=timedelta(days=30), retry_failed=0, **kwargs)
+
+        assert calls == ["C", "A"]
+        items = json.loads(open(kwargs["output_file"]).read())
+        assert items[0]["_handelsregister_result"]["name"] == "A"
+        assert "_handelsregister_error" not in items[0]
+
+
+class TestRunReport:
+    def test_enrich_writes_run_report(self, mock_client, tmp_path, snapshot_directory):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        rows = [
+            {"company_name": "A GmbH", "city": "Berlin"},
+            {"company_name": "B GmbH", "city": "Berlin"},
+        ]
+        input_file = tmp_path / "input.json"
+        input_file.write_text(json.dumps(rows))
+        client.fetch_organization(q="A GmbH Berlin")
+
+        client.enrich(
+            file_path=str(input_file),
+            query_properties={"name": "company_name", "location": "city"},
+            snapshot_dir=snapshot_directory,
+        )
+
+        report_file = os.path.join(snapshot_directory, "run_report_noparams.json")
+        with open(report_file) as f:
+            report = json.load(f)
+        assert report["items_total"] == 2
+        assert report["items_done"] == 2
+        assert report["requests"] == 1
+        assert report["cache_hits"] == 1
+        assert report["latency_p50"] is not None
+        assert mock_session.get.call_count == 2
+        # Metrics are only collected while enrich() runs
+        assert client._metrics is None
+
+    def test_plan_uses_reported_latency(self, mock_client, sample_json_file, tmp_path):
+        client, _ = mock_client
+        report_file = tmp_path / "report.json"
+        report_file.write_text(json.dumps({"latency_p50": 0.5}))
+
+        plan = client.plan_enrichment(
+            sample_json_file,
+            query_properties={"name": "company_name", "location": "city"},
+            report_file=str(report_file),
+        )
+
+        assert plan["estimated_seconds"] == pytest.approx(plan["new_calls"] * 0.5)
+
+
+class TestStreamingEnrich:
+    def test_stream_jsonl(self, mock_client, sample_jsonl_file, tmp_path, sample_organization_response):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        output_file = tmp_path / "out.jsonl"
+
+        client.enrich(
+            file_path=sample_jsonl_file,
+            input_type="jsonl",
+            query_properties={"name": "company_name", "location": "city"},
+            output_file=str(output_file),
+            stream=True,
+        )
+
+        lines = output_file.read_text(encoding="utf-8").splitlines()
+        records = [json.loads(line) for line in lines]
+        assert [r["company_name"] for r in records] == ["OroraTech GmbH", "Example AG", "Test GmbH"]
+        assert all(r["_handelsregister_result"] == sample_organization_response for r in records)
+        # Each q string is different, so every record hits the API
+        assert mock_session.get.call_count == 3
+
+    def test_stream_csv_chunks(self, mock_client, sample_csv_file, tmp_path):
+        import pandas as pd
+        client, _ = mock_client
+        output_file = tmp_path / "out.csv"
+
+        client.enrich(
+            file_path=sample_csv_file,
+            input_type="csv",
+            query_properties={"name": "company_name", "location": "city"},
+            output_file=str(output_file),
+            stream=True,
+            chunk_size=2,
+        )
+
+        df = pd.read_csv(output_file)
+        assert len(df) == 3
+        assert "hr_name" in df.columns
+        assert "_handelsregister_summary" in df.columns
+        assert "_handelsregister_result" not in df.columns
+
+    def test_stream_xlsx(self, mock_client, sample_csv_file, tmp_path, sample_organization_response):
+        client, _ = mock_client
+        output_file = tmp_path / "out.xlsx"
+
+        client.enrich(
+            file_path=sample_csv_file,
+            input_type="csv",
+            query_properties={"name": "company_name", "location": "city"},
+            output_file=str(output_file),
+            output_type="xlsx",
+            stream=True,
+        )
+
+        records = list(formats.iter_records(str(output_file), "xlsx"))
+        assert [r["company_name"] for r in records] == ["OroraTech GmbH", "Example AG", "Test GmbH"]
+        assert records[0]["hr_name"] == sample_organization_response["name"]
+        assert "_handelsregister_result" not in records[0]
+
+    def test_stream_concurrent_keeps_order(self, mock_client, tmp_path):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        input_file = tmp_path / "input.jsonl"
+        input_file.write_text("".join(json.dumps({"company_name": f"C{i}"}) + "\n" for i in range(30)))
+        output_file = tmp_path / "out.jsonl"
+
+        client.enrich(
+            file_path=str(input_file),
+            input_type="jsonl",
+            query_properties={"name": "company_name"},
+            output_file=str(output_file),
+            stream=True,
+            concurrency=4,
+        )
+
+        records = [json.loads(line) for line in output_file.read_text().splitlines()]
+        assert [r["company_name"] for r in records] == [f"C{i}" for i in range(30)]
+        assert all(r["_handelsregister_result"] for r in records)
+        assert mock_session.get.call_count == 30
+
+    def test_snapshots_concurrent(self, mock_client, tmp_path, snapshot_directory):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        input_file = tmp_path / "input.json"
+        input_file.write_text(json.dumps([{"company_name": f"C{i}"} for i in range(30)]))
+        output_file = tmp_path / "out.json"
+
+        client.enrich(
+            file_path=str(input_file),
+            query_properties={"name": "company_name"},
+            snapshot_dir=snapshot_directory,
+            snapshot_steps=7,
+            output_file=str(output_file),
+            concurrency=4,
+        )
+
+        records = json.loads(output_file.read_text())
+        assert [r["company_name"] for r in records] == [f"C{i}" for i in range(30)]
+        assert all(r["_handelsregister_result"] for r in records)
+        assert mock_session.get.call_count == 30
+
+    def test_stream_resume_from_checkpoint(self, mock_client, sample_jsonl_file, tmp_path, snapshot_directory):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        output_file = tmp_path / "out.jsonl"
+        kwargs = dict(
+            file_path=sample_jsonl_file,
+            input_type="jsonl",
+            query_properties={"name": "company_name", "location": "city"},
+            output_file=str(output_file),
+            snapshot_dir=snapshot_directory,
+            snapshot_steps=1,
+            stream=True,
+        )
+        client.enrich(**kwargs)
+        assert mock_session.get.call_count == 3
+
+        # Simulate a crash after the first record: trailing garbage is cut off
+        first_line = output_file.read_text(encoding="utf-8").splitlines()[0] + "\n"
+        output_file.write_text(first_line + '{"partial', encoding="utf-8")
+        checkpoint = {
+            "input": sample_jsonl_file,
+            "output": str(output_file),
+            "records": 1,
+            "offset": len(first_line.encode("utf-8")),
+        }
+        with open(os.path.join(snapshot_directory, "stream_noparams.json"), "w") as f:
+            json.dump(checkpoint, f)
+
+        client.cache_enabled = False
+        client.enrich(**kwargs)
+        records = [json.loads(line) for line in output_file.read_text(encoding="utf-8").splitlines()]
+        assert [r["id"] for r in records] == ["1", "2", "3"]
+        assert mock_session.get.call_count == 5
+
+    def test_stream_parquet(self, mock_client, sample_csv_file, tmp_path, sample_organization_response):
+        pq = pytest.importorskip("pyarrow.parquet")
+        client, _ = mock_client
+        output_file = tmp_path / "out.parquet"
+
+        client.enrich(
+            file_path=sample_csv_file,
+            input_type="csv",
+            query_properties={"name": "company_name", "location": "city"},
+            output_file=str(output_file),
+            output_type="parquet",
+            stream=True,
+            chunk_size=2,
+        )
+
+        table = pq.read_table(str(output_file))
+        assert table.num_rows == 3
+        assert table.column("company_name").to_pylist() == ["OroraTech GmbH", "Example AG", "Test GmbH"]
+        assert table.column("hr_status").to_pylist() == [sample_organization_response["status"]] * 3
+
+    def test_stdin_to_stdout(self, mock_client, tmp_path, monkeypatch, capsys, snapshot_directory):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        rows = "".join(json.dumps({"company_name": f"C{i}"}) + "\n" for i in range(5))
+        monkeypatch.setattr("sys.stdin", io.StringIO(rows))
+
+        client.enrich(
+            file_path="-",
+            input_type="jsonl",
+            query_properties={"name": "company_name"},
+            snapshot_dir=snapshot_directory,
+            snapshot_steps=1,
+        )
+
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [r["company_name"] for r in records] == [f"C{i}" for i in range(5)]
+        assert all(r["_handelsregister_result"] for r in records)
+        assert mock_session.get.call_count == 5
+        # A pipe cannot be resumed, so no checkpoint is written
+        assert not os.path.exists(os.path.join(snapshot_directory, "stream_noparams.json"))
+
+    def test_stdout_unordered_has_sequence(self, mock_client, tmp_path, monkeypatch, capsys):
+        client, _ = mock_client
+        input_file = tmp_path / "input.csv"
+        input_file.write_text("company_name\n" + "".join(f"C{i}\n" for i in range(20)))
+
+        client.enrich(
+            file_path=str(input_file),
+            input_type="csv",
+            query_properties={"name": "company_name"},
+            output_file="-",
+            concurrency=3,
+            ordered=False,
+        )
+
+        out = capsys.readouterr().out
+        rows = list(csv.DictReader(io.StringIO(out)))
+        assert sorted(int(r["_input_index"]) for r in rows) == list(range(20))
+        assert all(r["company_name"] == f"C{r['_input_index']}" for r in rows)
+        assert all(r["hr_name"] for r in rows)
+
+    def test_stdout_rejects_json_output(self, mock_client, sample_json_file):
+        client, _ = mock_client
+        with pytest.raises(ValueError, match="stdout"):
+            client.enrich(file_path=sample_json_file, input_type="json", output_file="-")
+
+    def test_stream_rejects_json_output(self, mock_client, sample_json_file):
+        client, _ = mock_client
+        with pytest.raises(ValueError, match="Streaming enrichment"):
+            client.enrich(file_path=sample_json_file, input_type="json", stream=True)
+
+
+class TestShardedEnrich:
+    @pytest.mark.parametrize("stream,file_type", [(False, "json"), (True, "jsonl"), (True, "csv")])
+    def test_shards_merge_to_original_order(self, mock_client, tmp_path, snapshot_directory, stream, file_type):
+        import pandas as pd
+        from handelsregister.sharding import merge_shards
+
+        client, _ = mock_client
+        rows = [{"company_name": f"Company {i}", "city": "Berlin", "id": str(i)} for i in range(20)]
+        input_file = tmp_path / f"input.{file_type}"
+        if file_type == "json":
+            input_file.write_text(json.dumps(rows))
+        elif file_type == "jsonl":
+            input_file.write_text("".join(json.dumps(r) + "\n" for r in rows))
+        else:
+            pd.DataFrame(rows).to_csv(input_file, index=False)
+
+        for shard_index in range(3):
+            client.enrich(
+                file_path=str(input_file),
+                input_type=file_type,
+                query_properties={"name": "company_name", "location": "city"},
+                snapshot_dir=snapshot_directory,
+                stream=stream,
+                shard_index=shard_index,
+                shard_count=3,
+            )
+
+        shard_files = sorted(str(p) for p in tmp_path.glob("input_handelsregister_ai_enriched_shard*of3.*"))
+        assert len(shard_files) == 3
+        assert sorted(os.listdir(snapshot_directory)) == ["shard0of3", "shard1of3", "shard2of3"]
+
+        merged_file = tmp_path / f"merged.{file_type}"
+        assert merge_shards(shard_files, str(merged_file)) == 20
+        if file_type == "json":
+            merged = json.loads(merged_file.read_text())
+        elif file_type == "jsonl":
+            merged = [json.loads(line) for line in merged_file.read_text().splitlines()]
+        else:
+            merged = pd.read_csv(merged_file).to_dict(orient="records")
+        assert [str(r["id"]) for r in merged] == [str(i) for i in range(20)]
+        assert all("_input_index" not in r for r in merged)
+
+    def test_invalid_shard(self, mock_client, sample_json_file):
+        client, _ = mock_client
+        with pytest.raises(ValueError, match="shard_index"):
+            client.enrich(file_path=sample_json_file, shard_index=2, shard_count=2)
+
+
+class TestQueueEnrich:
+    def test_two_workers_share_queue(self, mock_client, sample_jsonl_file, tmp_path, sample_organization_response):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        queue_path = str(tmp_path / "queue.sqlite")
+        output_file = tmp_path / "out.jsonl"
+        kwargs = dict(
+            file_path=sample_jsonl_file,
+            input_type="jsonl",
+            query_properties={"name": "company_name", "location": "city"},
+            output_file=str(output_file),
+            queue_path=queue_path,
+        )
+
+        # A first worker leases an item and dies without finishing it
+        from handelsregister.workqueue import WorkQueue
+        with WorkQueue(queue_path, worker_id="crashed", lease_timeout=-1) as queue:
+            queue.populate(
+                [json.loads(line) for line in open(sample_jsonl_file, encoding="utf-8")],
+                source=f"{os.path.realpath(sample_jsonl_file)}|noparams",
+            )
+            assert len(queue.lease(1)) == 1
+
+        client.enrich(worker_id="survivor", **kwargs)
+
+        records = [json.loads(line) for line in output_file.read_text(encoding="utf-8").splitlines()]
+        assert [r["id"] for r in records] == ["1", "2", "3"]
+        assert all(r["_handelsregister_result"] == sample_organization_response for r in records)
+        assert mock_session.get.call_count == 3
+
+    def test_failed_finalize_is_written_by_next_worker(self, mock_client, sample_jsonl_file, tmp_path):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        output_file = tmp_path / "out.jsonl"
+        kwargs = dict(
+            file_path=sample_jsonl_file,
+            input_type="jsonl",
+            query_properties={"name": "company_name", "location": "city"},
+            output_file=str(output_file),
+            queue_path=str(tmp_path / "queue.sqlite"),
+        )
+
+        with patch.object(client, "_write_output", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                client.enrich(worker_id="first", **kwargs)
+        assert not output_file.exists()
+
+        client.enrich(worker_id="second", **kwargs)
+        records = [json.loads(line) for line in output_file.read_text(encoding="utf-8").splitlines()]
+        assert [r["id"] for r in records] == ["1", "2", "3"]
+        assert mock_session.get.call_count == 3
+
+    def test_queue_rejects_sharding(self, mock_client, sample_jsonl_file, tmp_path):
+        client, _ = mock_client
+        with pytest.raises(ValueError, match="queue_path"):
+            client.enrich(
+                file_path=sample_jsonl_file,
+                input_type="jsonl",
+                queue_path=str(tmp_path / "q.sqlite"),
+                shard_count=2,
+            )
+
+
+class TestDryRun:
+    def test_plan_counts(self, mock_client, tmp_path, snapshot_directory):
+        client, mock_httpx = mock_client
+        mock_session = mock_httpx.return_value.__enter__.return_value
+        rows = [
+            {"company_name": "Done GmbH", "city": "Berlin"},
+            {"company_name": "Cached GmbH", "city": "Berlin"},
+            {"company_name": "New GmbH", "city": "Berlin"},
+            {"company_name": "New GmbH", "city": "Berlin", "note": "duplicate"},
+            {"company_name": "", "city": None},
+        ]
+        input_file = tmp_path / "input.json"
+        input_file.write_text(json.dumps(rows))
+        snapshot = [dict(rows[0], _handelsregister_result={"name": "Done GmbH", "meta": {"request_credit_cost": 10}})]
+        with open(os.path.join(snapshot_directory, "snapshot_noparams_20230101_120000.json"), "w") as f:
+            json.dump(snapshot, f)
+        client.fetch_organization(q="Cached GmbH Berlin")
+        client.rate_limit = 0.5
+
+        plan = client.enrich(
+            file_path=str(input_file),
+            query_properties={"name": "company_name", "location": "city"},
+            snapshot_dir=snapshot_directory,
+            dry_run=True,
+        )
+
+        # The two "New GmbH" rows share a key, so the merge keeps one of them
+        assert plan["total_items"] == 4
+        assert plan["already_enriched"] == 1
+        assert plan["empty_query"] == 1
+        assert plan["cached"] == 1
+        assert plan["new_calls"] == 1
+        assert plan["estimated_seconds"] == pytest.approx(2.0)
+        assert plan["avg_credit_cost"] is not None
+        assert plan["estimated_credits"] == pytest.approx(plan["avg_credit_cost"])
+        # Only the explicit fetch above hit the API; nothing was written
+        assert mock_session.get.call_count == 1
+        assert not (tmp_path / "input_handelsregister_ai_enriched.json").exists()
+
+    def test_plan_stream_duplicates(self, mock_client, tmp_path):
+        client, _ = mock_client
+        input_file = tmp_path / "input.jsonl"
+        rows = [{"company_name": "A"}, {"company_name": "A"}, {"company_name": "B"}]
+        input_file.write_text("".join(json.dumps(r) + "\n" for r in rows))
+
+        plan = client.plan_enrichment(
+            file_path=str(input_file),
+            input_type="jsonl",
+            query_properties={"name": "company_name"},
+            stream=True,
+            concurrency=4,
+            latency=2.0,
+        )
+        assert plan["total_items"] == 3
+        assert plan["duplicates"] == 1
+        assert plan["new_calls"] == 2
+        assert plan["avg_credit_cost"] is None
+        assert plan["estimated_credits"] is None
+        assert plan["estimated_seconds"] == pytest.approx(1.0)
+
 
 @patch('httpx.Client')
 def test_full_client_workflow(mock_httpx_client, api_key, sample_organization_response):
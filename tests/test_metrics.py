@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from handelsregister.metrics import EnrichmentMetrics, read_report
+
+
+def test_report_counts_and_percentiles():
+    metrics = EnrichmentMetrics(total_items=4)
+    for latency in (0.1, 0.2, 0.3, 0.4, 1.0):
+        metrics.record_request(latency, credits=2)
+    metrics.record_cache_hit()
+    metrics.record_retry()
+    metrics.record_failure()
+    metrics.record_item()
+    metrics.record_item()
+
+    report = metrics.report()
+    assert report["requests"] == 5
+    assert report["latency_p50"] == pytest.approx(0.3)
+    assert report["latency_p95"] == pytest.approx(1.0)
+    assert report["cache_hits"] == 1
+    assert report["cache_hit_ratio"] == pytest.approx(1 / 6, abs=1e-4)
+    assert report["retries"] == 1
+    assert report["failures"] == 1
+    assert report["credits_used"] == 10
+    assert report["items_done"] == 2
+    assert report["eta_seconds"] is not None
+
+
+def test_empty_metrics():
+    metrics = EnrichmentMetrics()
+    report = metrics.report()
+    assert report["latency_p50"] is None
+    assert report["cache_hit_ratio"] is None
+    assert report["eta_seconds"] is None
+    assert "p50=-" in metrics.postfix()
+
+
+def test_save_and_read_report(tmp_path):
+    path = tmp_path / "report.json"
+    metrics = EnrichmentMetrics(report_path=path)
+    metrics.record_request(0.5)
+    metrics.save()
+
+    assert json.loads(path.read_text())["requests"] == 1
+    assert read_report(path)["latency_p50"] == 0.5
+    assert read_report(tmp_path / "missing.json") is None
+
+    # Without a report path save() does nothing
+    EnrichmentMetrics().save()
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from handelsregister import KPIPanel
+
+
+@pytest.fixture
+def payloads():
+    return [
+        {"financial_kpi": [
+            {"year": 2022, "revenue": 330.0, "employees": 3},
+            {"year": 2020, "revenue": 200.0, "employees": 2},
+            {"year": 2021, "revenue": 300.0},
+        ]},
+        {"financial_kpi": [{"year": 2021, "revenue": "50", "employees": 0, "rating": "A"}]},
+        None,
+        {"financial_kpi": [{"year": 2022, "revenue": 1.0}, {"year": 2022, "revenue": 2.0}]},
+    ]
+
+
+def test_dense_panel(payloads):
+    panel = KPIPanel.from_data(payloads)
+    assert panel.values.shape == (4, 3, 2)
+    assert panel.values.dtype == np.float64
+    assert list(panel.years) == [2020, 2021, 2022]
+    assert panel.metrics == ["employees", "revenue"]
+    np.testing.assert_array_equal(panel.metric("revenue", 2021), [300.0, 50.0, np.nan, np.nan])
+    # The first entry of a year wins
+    assert panel.metric("revenue", 2022)[3] == 1.0
+    assert np.isnan(panel.metric("revenue", 2019)).all()
+    assert np.isnan(panel.metric("unknown")).all()
+    np.testing.assert_array_equal(panel.latest("employees"), [3.0, 0.0, np.nan, np.nan])
+
+
+def test_years_and_metrics_selection(payloads):
+    panel = KPIPanel.from_data(payloads, metrics=["revenue"], years=[2022, 2021])
+    assert panel.values.shape == (4, 2, 1)
+    assert list(panel.years) == [2021, 2022]
+    np.testing.assert_array_equal(panel.metric("revenue"), [[300.0, 330.0], [50.0, np.nan], [np.nan, np.nan], [np.nan, 1.0]])
+
+
+def test_contiguous_years_for_growth():
+    panel = KPIPanel.from_data([{"financial_kpi": [{"year": 2018, "revenue": 100.0}, {"year": 2020, "revenue": 150.0}]}])
+    assert list(panel.years) == [2018, 2019, 2020]
+    np.testing.assert_allclose(panel.growth("revenue", periods=2), [[np.nan, np.nan, 0.5]])
+    assert np.isnan(panel.growth("revenue")).all()
+
+
+def test_growth_and_ratio(payloads):
+    panel = KPIPanel.from_data(payloads)
+    growth = panel.growth("revenue")
+    np.testing.assert_allclose(growth[0], [np.nan, 0.5, 0.1])
+    ratio = panel.ratio("revenue", "employees")
+    assert ratio[0, 0] == 100.0
+    # Division by zero is NaN, not inf
+    assert np.isnan(ratio[1, 1])
+
+
+def test_take_and_to_frame(payloads):
+    panel = KPIPanel.from_data(payloads).take([0, 1])
+    df = panel.to_frame(labels=["a", "b"])
+    assert df.index.names == ["company", "year"]
+    assert df.shape == (6, 2)
+    assert df.loc[("a", 2020), "revenue"] == 200.0
+    assert len(panel.to_frame(dropna=True)) == 4
+
+
+def test_empty():
+    panel = KPIPanel.from_data([None, {}])
+    assert panel.values.shape == (2, 0, 0)
+    assert np.isnan(panel.latest("revenue")).all()
+
+
+def test_entries_without_integer_year_are_skipped():
+    panel = KPIPanel.from_data([
+        {"financial_kpi": [
+            {"year": "2022/23", "revenue": 1.0},
+            {"year": None, "revenue": 2.0},
+            {"year": "2021", "revenue": 3.0},
+        ]},
+        {"financial_kpi": [{"year": 2022, "revenue": 4.0}]},
+    ])
+    assert list(panel.years) == [2021, 2022]
+    np.testing.assert_array_equal(panel.metric("revenue"), [[3.0, np.nan], [np.nan, 4.0]])
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from handelsregister.pipeline import Pipeline
+
+
+def test_outcomes_keep_input_order():
+    def process(n):
+        time.sleep(0.001 * (n % 3))
+        return n * n
+
+    pipeline = Pipeline(process, workers=4)
+    assert list(pipeline.run(range(50))) == [(n, n * n) for n in range(50)]
+    assert not pipeline.stopped
+
+
+def test_inline_without_workers():
+    threads = set()
+
+    def process(n):
+        threads.add(threading.current_thread())
+        return n
+
+    assert list(Pipeline(process, workers=0).run(range(3))) == [(0, 0), (1, 1), (2, 2)]
+    assert threads == {threading.current_thread()}
+
+
+def test_capacity_bounds_records_in_flight():
+    read = []
+
+    def records():
+        for n in range(20):
+            read.append(n)
+            yield n
+
+    pipeline = Pipeline(lambda n: n, workers=2, capacity=3)
+    for n, _ in pipeline.run(records()):
+        if n == 0:
+            time.sleep(0.05)
+            # Record 0 is not consumed yet, so only its slot and two more are taken
+            assert len(read) <= 4
+    assert len(read) == 20
+
+
+def test_errors_surface_at_their_position():
+    def process(n):
+        if n == 3:
+            raise ValueError("boom")
+        return n
+
+    seen = []
+    with pytest.raises(ValueError):
+        for n, _ in Pipeline(process, workers=3).run(range(10)):
+            seen.append(n)
+    assert seen == [0, 1, 2]
+
+
+def test_stop_finishes_records_already_read():
+    stop = threading.Event()
+    pipeline = Pipeline(lambda n: n, workers=2, capacity=2, stop=stop)
+    seen = []
+    for n, _ in pipeline.run(range(100)):
+        seen.append(n)
+        stop.set()
+    assert pipeline.stopped
+    assert seen == list(range(len(seen)))
+    assert len(seen) < 100
+
+
+def test_unordered_yields_in_completion_order():
+    def process(n):
+        # The first record is by far the slowest
+        time.sleep(0.2 if n == 0 else 0)
+        return n
+
+    pipeline = Pipeline(process, workers=2, ordered=False)
+    outcomes = [outcome for _, outcome in pipeline.run(range(10))]
+    assert sorted(outcomes) == list(range(10))
+    assert outcomes[-1] == 0
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from handelsregister import sharding
+
+
+def test_shard_of_is_stable():
+    key = ["OroraTech GmbH", "München"]
+    assert sharding.shard_of(key, 8) == sharding.shard_of(list(key), 8)
+    assert 0 <= sharding.shard_of(key, 8) < 8
+    assert sharding.shard_of(key, 1) == 0
+
+
+def test_validate_shard():
+    sharding.validate_shard(0, 1)
+    sharding.validate_shard(3, 4)
+    with pytest.raises(ValueError):
+        sharding.validate_shard(4, 4)
+    with pytest.raises(ValueError):
+        sharding.validate_shard(0, 0)
+
+
+def test_merge_jsonl_shards(tmp_path):
+    shards = [
+        [{"_input_index": 0, "id": "a"}, {"_input_index": 3, "id": "d"}],
+        [{"_input_index": 1, "id": "b"}, {"_input_index": 2, "id": "c"}, {"_input_index": None, "id": "old"}],
+    ]
+    paths = []
+    for i, records in enumerate(shards):
+        path = tmp_path / f"out_shard{i}of2.jsonl"
+        path.write_text("".join(json.dumps(r) + "\n" for r in records))
+        paths.append(str(path))
+
+    output = tmp_path / "merged.jsonl"
+    assert sharding.merge_shards(paths, str(output)) == 5
+    merged = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["id"] for r in merged] == ["a", "b", "c", "d", "old"]
+    assert all("_input_index" not in r for r in merged)
+
+
+def test_merge_csv_keeps_cells(tmp_path):
+    (tmp_path / "s0.csv").write_text("id,_input_index,value\na,0,\nc,2,1.50\n")
+    (tmp_path / "s1.csv").write_text("id,_input_index,value\nb,1,x\n")
+    output = tmp_path / "merged.csv"
+    sharding.merge_shards([str(tmp_path / "s0.csv"), str(tmp_path / "s1.csv")], str(output))
+    assert output.read_text().splitlines() == ["id,value", "a,", "b,x", "c,1.50"]
+
+
+def test_merge_parquet_shards_with_different_schemas(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    pq.write_table(pa.table({"_input_index": [2, 0], "id": ["c", "a"], "note": [None, None]}), tmp_path / "s0.parquet")
+    pq.write_table(pa.table({"id": ["b"], "_input_index": [1], "note": ["x"], "extra": [1.5]}), tmp_path / "s1.parquet")
+    output = tmp_path / "merged.parquet"
+    assert sharding.merge_shards([str(tmp_path / "s0.parquet"), str(tmp_path / "s1.parquet")], str(output)) == 3
+
+    table = pq.read_table(output)
+    assert table.column_names == ["id", "note", "extra"]
+    assert table.column("id").to_pylist() == ["a", "b", "c"]
+    assert table.column("note").to_pylist() == [None, "x", None]
+    assert table.column("extra").to_pylist() == [None, 1.5, None]
@@ -0,0 +1,37 @@
+import os
+
+from handelsregister.spill import SPILL_FIELD, ResultStore
+
+
+def test_spill_and_join(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    items = [
+        {"id": 1, "_handelsregister_result": {"name": "A"}},
+        {"id": 2, "_handelsregister_result": None},
+    ]
+    with ResultStore(path) as store:
+        for item in items:
+            store.spill(item, f"ref{item['id']}")
+        store.commit()
+
+        assert items[0] == {"id": 1, "_handelsregister_result": None, SPILL_FIELD: "ref1"}
+        assert SPILL_FIELD not in items[1]
+        assert "ref1" in store and "ref2" not in store
+
+        joined = list(store.join(items))
+        assert joined[0] == {"id": 1, "_handelsregister_result": {"name": "A"}}
+        assert joined[1] is items[1]
+        # The items themselves keep only the reference
+        assert items[0][SPILL_FIELD] == "ref1"
+
+    with ResultStore(path) as store:
+        assert store.get("ref1") == {"name": "A"}
+        assert store.restore({SPILL_FIELD: "unknown"}) is False
+
+
+def test_temporary_store_is_removed():
+    store = ResultStore()
+    store.put("ref", {"name": "A"})
+    assert os.path.exists(store.path)
+    store.close()
+    assert not os.path.exists(store.path)
@@ -0,0 +1,81 @@
+import pytest
+
+from handelsregister.workqueue import WorkQueue
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / "queue.sqlite")
+
+
+def test_populate_once(queue_path):
+    records = [{"id": i} for i in range(3)]
+    with WorkQueue(queue_path, worker_id="a") as first, WorkQueue(queue_path, worker_id="b") as second:
+        assert first.populate(records, source="job") is True
+        assert second.populate(records, source="job") is False
+        assert first.counts() == {"pending": 3, "leased": 0, "done": 0}
+        with pytest.raises(ValueError, match="different job"):
+            second.populate(records, source="other job")
+
+
+def test_workers_never_share_items(queue_path):
+    with WorkQueue(queue_path, worker_id="a") as a, WorkQueue(queue_path, worker_id="b") as b:
+        a.populate([{"id": i} for i in range(5)], source="job")
+        batch_a = a.lease(3)
+        batch_b = b.lease(3)
+        assert [p for p, _ in batch_a] == [0, 1, 2]
+        assert [p for p, _ in batch_b] == [3, 4]
+        assert a.lease(1) == []
+
+
+def test_expired_lease_is_reclaimed(queue_path):
+    with WorkQueue(queue_path, worker_id="crashed", lease_timeout=-1) as crashed, \
+            WorkQueue(queue_path, worker_id="survivor") as survivor:
+        crashed.populate([{"id": 0}], source="job")
+        assert len(crashed.lease(1)) == 1
+        # The lease is already expired, so another worker takes over
+        [(position, item)] = survivor.lease(1)
+        item["done"] = True
+        survivor.complete(position, item)
+        assert survivor.is_drained()
+        assert list(survivor.iter_results()) == [{"id": 0, "done": True}]
+
+
+def test_release_and_finalize(queue_path):
+    with WorkQueue(queue_path, worker_id="a") as a, WorkQueue(queue_path, worker_id="b") as b:
+        a.populate([{"id": 0}], source="job")
+        [(position, item)] = a.lease(1)
+        a.release(position)
+        assert a.counts()["pending"] == 1
+        assert a.claim_finalize() is False
+
+        [(position, item)] = b.lease(1)
+        b.complete(position, item)
+        assert b.claim_finalize() is True
+        assert a.claim_finalize() is False
+
+
+def test_failed_finalize_can_be_claimed_again(queue_path):
+    with WorkQueue(queue_path, worker_id="a") as a, WorkQueue(queue_path, worker_id="b") as b:
+        a.populate([{"id": 0}], source="job")
+        [(position, item)] = a.lease(1)
+        a.complete(position, item)
+        assert a.claim_finalize() is True
+        assert b.claim_finalize() is False
+
+        # Writing the output failed: a gives the claim back
+        a.release_finalize()
+        assert b.claim_finalize() is True
+        b.finish_finalize()
+        assert a.claim_finalize() is False
+        assert b.claim_finalize() is False
+
+
+def test_expired_finalize_claim_is_taken_over(queue_path):
+    with WorkQueue(queue_path, worker_id="crashed", lease_timeout=-1) as crashed, \
+            WorkQueue(queue_path, worker_id="survivor") as survivor:
+        crashed.populate([], source="job")
+        assert crashed.claim_finalize() is True
+        # The claiming worker died before writing the output
+        assert survivor.claim_finalize() is True
+        assert crashed.claim_finalize() is False